@@ -14,8 +14,8 @@
 # (at your option) any later version.
 ################################################################################
 
-from ImaerPlugin.imaer_plugin import ImaerPlugin
-
 
 def classFactory(iface):
+    # Imported here so the imaer6 package can be used without QGIS (e.g. in worker processes)
+    from ImaerPlugin.imaer_plugin import ImaerPlugin
     return ImaerPlugin(iface)
@@ -95,8 +95,10 @@ class RelateAlgorithm(QgsProcessingAlgorithm):
         if feedback is not None:
             feedback.pushInfo(repr(layer_type))
 
+        # Layers imported with a projection only have some of the value fields
         value_fields = self.field_factory.create_fields_for_layer_type(layer_type, value_fields_only=True)
-        value_field_names = value_fields.names()
+        layer_field_names = layer.fields().names()
+        value_field_names = [field_name for field_name in value_fields.names() if field_name in layer_field_names]
 
         if feedback is not None:
             feedback.pushInfo(repr(value_field_names))
@@ -8,13 +8,17 @@ from qgis.PyQt.QtCore import (
     Qt
 )
 from qgis.PyQt.QtWidgets import (
+    QCheckBox,
     QDialog,
     QFileDialog
 )
 
-from qgis.core import QgsApplication
+from qgis.core import QgsApplication, QgsProject, Qgis
 
 from ImaerPlugin.config import ui_settings
+from ImaerPlugin.gpkg.layer_config import layer_type_config, result_types, substances
+
+_substance_labels = {'nox': 'NOx', 'nh3': 'NH3', 'no2': 'NO2', 'pm10': 'PM10', 'pm25': 'PM2.5'}
 
 
 FORM_CLASS, _ = uic.loadUiType(os.path.join(
@@ -45,6 +49,36 @@ class ConfigurationDialog(QDialog, FORM_CLASS):
         self.label_connect_ver.setToolTip('Select the version of Connect from the dropdown menu')
         self.label_email.setToolTip('Enter the email address registered the Connect server')
         self.label_key.setToolTip('Enter your api key for the Connect server')
+        self.label_import_filter_layer.setToolTip('Import only the receptors inside the polygons of this layer')
+        self.combo_import_filter_layer.setFilters(Qgis.LayerFilter.PolygonLayer)
+        self.combo_import_filter_layer.setAllowEmptyLayer(True)
+        self.checkbox_catalog_join_on_load.setToolTip(
+            'Keep the receptor geometries only in the receptor catalog. Smaller files, but slow drawing of large layers'
+        )
+        # One check box per name, by setting key. None or all checked imports all.
+        self.import_name_checkboxes = {}
+        for key, names, layout, labels in [
+            ('import_layer_types', list(layer_type_config), self.layout_import_layer_types, {}),
+            ('import_result_types', result_types, self.layout_import_result_types, {}),
+            ('import_substances', substances, self.layout_import_substances, _substance_labels)
+        ]:
+            checkboxes = {}
+            for name in names:
+                checkbox = QCheckBox(labels.get(name, name.replace('_', ' ').capitalize()))
+                layout.addWidget(checkbox)
+                checkboxes[name] = checkbox
+            self.import_name_checkboxes[key] = checkboxes
+        self.label_import_layer_types.setToolTip('Import only the checked result layers')
+        self.label_import_result_types.setToolTip('Import only the values of the checked result types')
+        self.label_import_substances.setToolTip('Import only the values of the checked substances')
+        self.checkbox_import_synthesize_hexagons.setToolTip('Create the receptor hexagons from the receptor ids instead of reading them')
+        self.checkbox_import_verify_hexagons.setToolTip('Read the hexagons anyway and log where they differ from the synthesized ones')
+        self.label_import_max_tasks.setToolTip('Number of result files that are imported at the same time')
+        self.label_import_memory_budget.setToolTip('Estimated memory the parallel imports may use together')
+        self.label_import_append_gpkg.setToolTip('Import all result files as situations into this GeoPackage. Leave empty for one GeoPackage per file')
+        self.label_import_receptor_catalog.setToolTip('Keep the receptor geometries in this shared GeoPackage. Leave empty to store them with every import')
+        self.button_browse_import_append_gpkg.clicked.connect(lambda: self.browse_gpkg(self.edit_import_append_gpkg, 'Select GeoPackage to append to'))
+        self.button_browse_import_receptor_catalog.clicked.connect(lambda: self.browse_gpkg(self.edit_import_receptor_catalog, 'Select receptor catalog'))
         self.combo_country.addItems([''] + ui_settings['countries'])
         self.combo_crs.addItem('')
         for crs in ui_settings['crs']:
@@ -94,6 +128,39 @@ class ConfigurationDialog(QDialog, FORM_CLASS):
         key_setting = self.plugin.settings.value('imaer_plugin/connect_key', defaultValue='')
         self.edit_key.setText(key_setting)
 
+        # A layer id only exists in its project, so it is stored in the project
+        filter_layer_setting, _ = QgsProject.instance().readEntry('imaer_plugin', 'import_filter_layer', '')
+        self.combo_import_filter_layer.setLayer(QgsProject.instance().mapLayer(filter_layer_setting or ''))
+
+        filter_selected_only_setting = self.plugin.settings.value('imaer_plugin/import_filter_selected_only', defaultValue=False, type=bool)
+        self.checkbox_import_filter_selected_only.setChecked(filter_selected_only_setting)
+
+        for key, checkboxes in self.import_name_checkboxes.items():
+            names_setting = self.plugin.get_list_setting(f'imaer_plugin/{key}')
+            for name, checkbox in checkboxes.items():
+                checkbox.setChecked(names_setting is None or name in [item.lower() for item in names_setting])
+
+        synthesize_hexagons_setting = self.plugin.settings.value('imaer_plugin/import_synthesize_hexagons', defaultValue=False, type=bool)
+        self.checkbox_import_synthesize_hexagons.setChecked(synthesize_hexagons_setting)
+
+        verify_hexagons_setting = self.plugin.settings.value('imaer_plugin/import_verify_hexagons', defaultValue=False, type=bool)
+        self.checkbox_import_verify_hexagons.setChecked(verify_hexagons_setting)
+
+        max_tasks_setting = self.plugin.settings.value('imaer_plugin/import_max_tasks', defaultValue=2, type=int)
+        self.spin_import_max_tasks.setValue(max_tasks_setting)
+
+        memory_budget_setting = self.plugin.settings.value('imaer_plugin/import_memory_budget_mb', defaultValue=2048, type=int)
+        self.spin_import_memory_budget.setValue(memory_budget_setting)
+
+        append_gpkg_setting = self.plugin.settings.value('imaer_plugin/import_append_gpkg', defaultValue='')
+        self.edit_import_append_gpkg.setText(append_gpkg_setting)
+
+        receptor_catalog_setting = self.plugin.settings.value('imaer_plugin/import_receptor_catalog', defaultValue='')
+        self.edit_import_receptor_catalog.setText(receptor_catalog_setting)
+
+        catalog_join_on_load_setting = self.plugin.settings.value('imaer_plugin/catalog_join_on_load', defaultValue=False, type=bool)
+        self.checkbox_catalog_join_on_load.setChecked(catalog_join_on_load_setting)
+
     def save_ui_to_settings(self):
         self.plugin.settings.setValue('imaer_plugin/country', self.combo_country.currentText())
         self.plugin.settings.setValue('imaer_plugin/crs', self.combo_crs.currentData())
@@ -102,6 +169,21 @@ class ConfigurationDialog(QDialog, FORM_CLASS):
         self.plugin.settings.setValue('imaer_plugin/connect_version', self.combo_connect_ver.currentText())
         self.plugin.settings.setValue('imaer_plugin/connect_email', self.edit_email.text())
         self.plugin.settings.setValue('imaer_plugin/connect_key', self.edit_key.text())
+        filter_layer = self.combo_import_filter_layer.currentLayer()
+        QgsProject.instance().writeEntry('imaer_plugin', 'import_filter_layer', '' if filter_layer is None else filter_layer.id())
+        self.plugin.settings.setValue('imaer_plugin/import_filter_selected_only', self.checkbox_import_filter_selected_only.isChecked())
+        for key, checkboxes in self.import_name_checkboxes.items():
+            checked_names = [name for name, checkbox in checkboxes.items() if checkbox.isChecked()]
+            if len(checked_names) == len(checkboxes):
+                checked_names = []
+            self.plugin.settings.setValue(f'imaer_plugin/{key}', ','.join(checked_names))
+        self.plugin.settings.setValue('imaer_plugin/import_synthesize_hexagons', self.checkbox_import_synthesize_hexagons.isChecked())
+        self.plugin.settings.setValue('imaer_plugin/import_verify_hexagons', self.checkbox_import_verify_hexagons.isChecked())
+        self.plugin.settings.setValue('imaer_plugin/import_max_tasks', self.spin_import_max_tasks.value())
+        self.plugin.settings.setValue('imaer_plugin/import_memory_budget_mb', self.spin_import_memory_budget.value())
+        self.plugin.settings.setValue('imaer_plugin/import_append_gpkg', self.edit_import_append_gpkg.text())
+        self.plugin.settings.setValue('imaer_plugin/import_receptor_catalog', self.edit_import_receptor_catalog.text())
+        self.plugin.settings.setValue('imaer_plugin/catalog_join_on_load', self.checkbox_catalog_join_on_load.isChecked())
         
         country = self.combo_country.currentText()
         if country in ui_settings['connect_countries']:
@@ -141,3 +223,14 @@ class ConfigurationDialog(QDialog, FORM_CLASS):
         self.file_dialog.setDirectory(current_work_dir)
         new_dir = self.file_dialog.getExistingDirectory(caption='Select work directory', parent=self)
         self.edit_work_dir.setText(new_dir)
+
+    def browse_gpkg(self, edit, caption):
+        gpkg_fn, _ = self.file_dialog.getSaveFileName(
+            caption=caption,
+            directory=edit.text() or self.edit_work_dir.text(),
+            filter='GeoPackage (*.gpkg)',
+            options=QFileDialog.DontConfirmOverwrite,
+            parent=self
+        )
+        if gpkg_fn != '':
+            edit.setText(gpkg_fn)
@@ -25,6 +25,8 @@ from qgis.core import (
 
 from qgis import processing
 
+from ImaerPlugin.imaer6.gml_file import list_zip_gml_members
+
 
 class AeriusConnection():
 
@@ -279,10 +281,12 @@ class AeriusConnection():
         response = self.run_request(end_point, 'DELETE')
         return response
 
-    def download_result_zip(self, url, work_dir, base_name, unzip_gmls=True):
+    def download_result_zip(self, url, work_dir, base_name, unzip_gmls=True, extract=False):
         '''
-        Downloads a zipfile and extracts all containing gml files in the
-        same directory. Returns a list of absolute gml file names.
+        Downloads a zipfile and returns a list of the containing gml files.
+        These are zip:// file names, which are read straight from the archive,
+        unless extract is True, then the gml files are extracted in the same
+        directory and their absolute file names are returned.
         '''
         self._log('download_result_zip()')
         params = {}
@@ -299,6 +303,9 @@ class AeriusConnection():
         if not unzip_gmls:
             return []
 
+        if not extract:
+            return list_zip_gml_members(zip_fn)
+
         with ZipFile(zip_fn) as my_zip:
             # print(my_zip)
             for fn in my_zip.namelist():
@@ -16,6 +16,7 @@ from qgis.PyQt.QtCore import Qt
 from qgis.core import QgsApplication
 
 from ImaerPlugin.config import ui_settings
+from ImaerPlugin.task_timer import TaskTimer
 
 FORM_CLASS, _ = uic.loadUiType(os.path.join(
     os.path.dirname(__file__), 'connect_jobs_dlg.ui'))
@@ -212,6 +213,8 @@ class ConnectJobsDialog(QDialog, FORM_CLASS):
     def download_jobs(self):
         '''Downloads the selected job to the work directory if COMPLETED'''
         items = self.table_jobs.selectedItems()
+        gml_fns = []
+        timer = TaskTimer('download')
 
         QgsApplication.setOverrideCursor(Qt.WaitCursor)
         for item in items:
@@ -222,12 +225,21 @@ class ConnectJobsDialog(QDialog, FORM_CLASS):
                 if status == 'COMPLETED':
                     base_name = download_url.split('/')[-1]
                     work_dir = self.plugin.settings.value('imaer_plugin/work_dir')
-                    result = self.plugin.aerius_connection.download_result_zip(download_url, work_dir, base_name)
+                    with timer.phase('download'):
+                        result = self.plugin.aerius_connection.download_result_zip(download_url, work_dir, base_name)
+                        zip_fn = os.path.join(work_dir, base_name)
+                        if os.path.exists(zip_fn):
+                            timer.count('bytes', os.path.getsize(zip_fn))
+                        timer.count('files')
 
                     # self.show_feedback(result)
-                    for gml_fn in result:
-                        self.plugin.run_import_calc_result(gml_fns=[gml_fn])
+                    gml_fns.extend(result)
         QgsApplication.restoreOverrideCursor()
+        timer.stop()
+        timer.log_to(self.plugin.log)
+
+        if len(gml_fns) > 0:
+            self.plugin.run_import_calc_result(gml_fns=gml_fns)
 
     def get_data_widget_matrix(self):
         '''Creates a matrix with all data widgets, for quickly finding related widgets.'''
@@ -44,6 +44,7 @@ from ImaerPlugin.config import (
 )
 
 from ImaerPlugin.time_varying_profile import TimeVaryingProfileDialog
+from ImaerPlugin.task_timer import TaskTimer
 
 from ImaerPlugin.imaer6 import (
     ADMSRoad,
@@ -368,12 +369,19 @@ class GenerateCalcInputDialog(QDialog, FORM_CLASS):
 
     def generate_imaer_gml(self):
         self.plugin.log('starting calcinput generation ...', user='user')
-        imaer_doc = self.get_imaer_doc_from_gui()
+        timer = TaskTimer('generate')
+        with timer.phase('collect features'):
+            imaer_doc = self.get_imaer_doc_from_gui()
         if imaer_doc is None:  # Something went wrong during IMAER doc generation...
             self.plugin.log('Something went wrong during IMAER doc generation.')
             return
+        timer.count('features', len(imaer_doc.feature_members))
         fn = self.edit_outfile.text()
-        imaer_doc.to_xml_file(fn)
+        with timer.phase('write gml'):
+            imaer_doc.to_xml_file(fn)
+            timer.count('bytes', os.path.getsize(fn))
+        timer.stop()
+        timer.log_to(self.plugin.log)
         self.plugin.log('Imaer GML file saved as: <a href="{0}">{0}</a>'.format(fn), lvl='Info', bar=True, duration=10)
 
     def get_imaer_doc_from_gui(self):
@@ -1,2 +1,10 @@
-from .field_factory import ImaerGpkgFieldFactory
-from .imaer_gpkg import ImaerGpkg
+from .layer_config import field_config, layer_type_config, get_layer_field_names, ResultProjection
+
+# Not available without QGIS, e.g. in worker processes. Other import errors are raised.
+try:
+    from .field_factory import ImaerGpkgFieldFactory
+    from .imaer_gpkg import ImaerGpkg, read_gpkg_metadata, read_gpkg_situations, get_gpkg_metadata, read_values_table_range, read_table_column_names
+    from .receptor_catalog import ReceptorCatalog
+except ModuleNotFoundError as e:
+    if e.name is None or e.name.split('.')[0] not in ['qgis', 'PyQt5']:
+        raise
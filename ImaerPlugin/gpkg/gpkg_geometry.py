@@ -0,0 +1,68 @@
+import struct
+
+# GeoPackage binary header: magic, version, flags, srs_id, envelope [minx, maxx, miny, maxy]
+# flags 0b011: little endian, envelope type 1 (xy)
+_gpkg_header = struct.Struct('<2sBBi4d')
+_gpkg_flags = 0b011
+_wkb_point = struct.Struct('<BIdd')
+_wkb_polygon_start = struct.Struct('<BIII')
+
+
+def encode_point(x, y, srs_id):
+    '''Returns a GeoPackage geometry blob for a point.'''
+    return _gpkg_header.pack(b'GP', 0, _gpkg_flags, srs_id, x, x, y, y) + _wkb_point.pack(1, 1, x, y)
+
+
+def encode_polygon(coords, srs_id):
+    '''Returns a GeoPackage geometry blob for a polygon with only an exterior
+    ring. The coords are a flat (closed) list like [x, y, x, y, ...].'''
+    xs = coords[0::2]
+    ys = coords[1::2]
+    num_points = len(xs)
+    header = _gpkg_header.pack(b'GP', 0, _gpkg_flags, srs_id, min(xs), max(xs), min(ys), max(ys))
+    wkb = _wkb_polygon_start.pack(1, 3, 1, num_points) + struct.pack(f'<{num_points * 2}d', *coords)
+    return header + wkb
+
+
+def get_envelope(blob):
+    '''Returns (minx, maxx, miny, maxy) from a GeoPackage geometry blob, or None
+    for empty geometries. Blobs without an envelope are only supported for points.'''
+    if blob is None or len(blob) < 8:
+        return None
+    flags = blob[3]
+    if flags & 0b10000:
+        return None
+    byte_order = '<' if flags & 1 else '>'
+    envelope_type = (flags >> 1) & 0b111
+    if envelope_type > 0:
+        return struct.unpack_from(f'{byte_order}4d', blob, 8)
+
+    wkb_byte_order = '<' if blob[8] == 1 else '>'
+    wkb_type, x, y = struct.unpack_from(f'{wkb_byte_order}Idd', blob, 9)
+    if wkb_type != 1:
+        return None
+    return (x, x, y, y)
+
+
+def register_gpkg_functions(sqlite_conn):
+    '''Registers the ST_ functions that are used in the R-tree triggers GDAL
+    creates, so the GeoPackage can be written through a plain sqlite3 connection.'''
+
+    def envelope_value(index):
+        def func(blob):
+            envelope = get_envelope(blob)
+            if envelope is None:
+                return None
+            return envelope[index]
+        return func
+
+    def is_empty(blob):
+        if blob is None:
+            return None
+        return int(get_envelope(blob) is None)
+
+    sqlite_conn.create_function('ST_MinX', 1, envelope_value(0), deterministic=True)
+    sqlite_conn.create_function('ST_MaxX', 1, envelope_value(1), deterministic=True)
+    sqlite_conn.create_function('ST_MinY', 1, envelope_value(2), deterministic=True)
+    sqlite_conn.create_function('ST_MaxY', 1, envelope_value(3), deterministic=True)
+    sqlite_conn.create_function('ST_IsEmpty', 1, is_empty, deterministic=True)
@@ -1,4 +1,5 @@
 import os
+import sqlite3
 
 from PyQt5.QtCore import Qt, QVariant, QDateTime
 
@@ -12,12 +13,157 @@ from qgis.core import (
 )
 
 from ImaerPlugin.gpkg import ImaerGpkgFieldFactory
+from ImaerPlugin.gpkg.layer_config import index_field_names, get_values_table_name, get_table_layer_type
+from ImaerPlugin.gpkg.gpkg_geometry import register_gpkg_functions, get_envelope
+
+# SQLite settings while building a GeoPackage that can be rebuilt from its
+# source: no rollback journal, no syncing, 128 MiB cache, temp tables in memory.
+# Without a journal a failed or interrupted transaction corrupts the file, that
+# is only acceptable because a failed build removes the partial file (see
+# ImportImaerCalculatorResultTask.remove_partial_gpkg()), so not when appending.
+fast_build_pragmas = {
+    'journal_mode': 'OFF',
+    'synchronous': 'OFF',
+    'cache_size': -131072,
+    'temp_store': 'MEMORY'
+}
+fast_build_page_size = 16384
+# Restored by end_fast_build()
+safe_pragmas = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'cache_size': -2000,
+    'temp_store': 'DEFAULT'
+}
+
+# Column types for fields added to existing layers
+_sqlite_types = {
+    QVariant.Double: 'REAL',
+    QVariant.Int: 'INTEGER',
+    QVariant.LongLong: 'INTEGER',
+    QVariant.String: 'TEXT'
+}
+
+# Metadata read by get_gpkg_metadata(), by file name: (file size and time, metadata)
+_metadata_cache = {}
+
+
+def get_metadata_data_type(value):
+    if isinstance(value, str):
+        return 'str'
+    elif isinstance(value, float):
+        return 'float'
+    elif isinstance(value, int):
+        return 'int'
+    return None
+
+
+def convert_metadata_value(str_value, data_type):
+    if data_type == 'int':
+        return int(str_value)
+    elif data_type == 'float':
+        return float(str_value)
+    else:
+        return str_value
+
+
+def read_gpkg_metadata(filename):
+    '''Returns all metadata of a GeoPackage as a dict, read with one query over
+    a plain sqlite3 connection. Returns an empty dict if the file does not
+    exist or has no imaer_metadata table.'''
+    if filename is None or not os.path.isfile(filename):
+        return {}
+    conn = sqlite3.connect(filename)
+    try:
+        rows = conn.execute('SELECT key, value, data_type FROM imaer_metadata;').fetchall()
+    except sqlite3.DatabaseError:
+        return {}
+    finally:
+        conn.close()
+    return {key: convert_metadata_value(str_value, data_type) for key, str_value, data_type in rows}
+
+
+def read_gpkg_situations(filename):
+    '''Returns a list with a dict per situation in an append mode GeoPackage
+    (see ImaerGpkg.begin_append()), or an empty list.'''
+    if filename is None or not os.path.isfile(filename):
+        return []
+    conn = sqlite3.connect(filename)
+    try:
+        cursor = conn.execute('SELECT * FROM imaer_situations ORDER BY situation_id;')
+        column_names = [description[0] for description in cursor.description]
+        return [dict(zip(column_names, row)) for row in cursor.fetchall()]
+    except sqlite3.DatabaseError:
+        return []
+    finally:
+        conn.close()
+
+
+def read_values_table_range(filename, layer_type, situation_id=None):
+    '''Returns (count, min receptor_id, max receptor_id) of the values table of
+    a receptor layer type (see ImaerGpkg.materialize_receptor_layer()), or
+    None if the GeoPackage has no values for it.'''
+    if filename is None or not os.path.isfile(filename):
+        return None
+    values_table_name = get_values_table_name(layer_type)
+    q = f'SELECT count(*), min(receptor_id), max(receptor_id) FROM "{values_table_name}"'
+    params = ()
+    if situation_id is not None:
+        q += ' WHERE situation_id = ?'
+        params = (situation_id,)
+    conn = sqlite3.connect(f'file:{filename}?mode=ro', uri=True)
+    try:
+        row = conn.execute(q, params).fetchone()
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        conn.close()
+    if row[0] == 0:
+        return None
+    return row
+
+
+def read_table_column_names(filename, table_name):
+    '''Returns the column names of a table in a GeoPackage, or an empty list.'''
+    if filename is None or not os.path.isfile(filename):
+        return []
+    conn = sqlite3.connect(f'file:{filename}?mode=ro', uri=True)
+    try:
+        return [row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}");')]
+    except sqlite3.DatabaseError:
+        return []
+    finally:
+        conn.close()
+
+
+def get_situation_view_name(table_name, situation_id):
+    return f'{table_name}_situation_{situation_id}'
+
+
+def get_gpkg_metadata(filename):
+    '''Like read_gpkg_metadata(), but cached until the file changes. For
+    looking up the metadata of many layers from the same GeoPackages.'''
+    try:
+        stat = os.stat(filename)
+    except (OSError, TypeError):
+        return {}
+    file_key = (stat.st_size, stat.st_mtime_ns)
+    cached = _metadata_cache.get(filename)
+    if cached is None or cached[0] != file_key:
+        cached = _metadata_cache[filename] = (file_key, read_gpkg_metadata(filename))
+    return dict(cached[1])
 
 
 class ImaerGpkg():
 
     def __init__(self, filename, version='99.99.99', plugin=None):
         self.conn = None
+        self.sqlite_conn = None
+        self.bulk_extents = {}
+        self.deferred_index_layers = []
+        self.sqlite_pragmas = {}
+        self.append_mode = False
+        self.metadata = None
         self.md = QgsProviderRegistry.instance().providerMetadata('ogr')
         self.filename = filename
         self.version = version
@@ -45,19 +191,32 @@ class ImaerGpkg():
         self.conn = self.md.createConnection(self.filename, {})
 
         self.create_metadata_table()
+        self.metadata = {}
 
+        metadata = {'gpkg_creation_time': QDateTime().currentDateTime().toString(Qt.ISODate)}
         if self.plugin is not None:
-            self.set_metadata('qgis_plugin_version', self.plugin.version)
-        self.set_metadata('gpkg_creation_time', QDateTime().currentDateTime().toString(Qt.ISODate))
-
-    def create_layer(self, name, specific_fields, geometry_type, epsg_id):
+            metadata['qgis_plugin_version'] = self.plugin.version
+        self.set_metadata_items(metadata)
+
+    def create_layer(self, name, specific_fields, geometry_type, epsg_id, spatial_index=True, fid_name='ogc_fid'):
+        '''Creates a layer. With spatial_index=False the R-tree is not created
+        (and not updated on every insert), create_indexes() builds it and the
+        attribute indexes after bulk loading. In append mode the layer gets a
+        situation_id field first.'''
         if self.conn is None:
             return
 
         fields = QgsFields()
+        if self.append_mode and 'situation_id' not in specific_fields.names():
+            fields.append(QgsField('situation_id', QVariant.LongLong))
         for field in specific_fields:
             fields.append(field)
 
+        layer_options = [f'FID={fid_name}']
+        if not spatial_index:
+            layer_options.append('SPATIAL_INDEX=NO')
+            self.deferred_index_layers.append(name)
+
         self.conn.createVectorTable(
             '',
             name,
@@ -65,28 +224,60 @@ class ImaerGpkg():
             geometry_type,
             QgsCoordinateReferenceSystem.fromEpsgId(epsg_id),
             True,
-            {'layerOptions': 'FID=ogc_fid'}
+            {'layerOptions': layer_options}
         )
 
-    def create_layer_receptor_points(self, epsg_id):
+    def create_layer_receptor_points(self, epsg_id, projection=None, spatial_index=True):
         layer_type = 'receptor_points'
-        fields = self.field_factory.create_fields_for_layer_type(layer_type)
-        self.create_layer(layer_type, fields, QgsWkbTypes.Point, epsg_id)
+        fields = self.field_factory.create_fields_for_layer_type(layer_type, projection=projection)
+        self.create_layer(layer_type, fields, QgsWkbTypes.Point, epsg_id, spatial_index)
 
-    def create_layer_receptor_hexagons(self, epsg_id):
+    def create_layer_receptor_hexagons(self, epsg_id, projection=None, spatial_index=True):
         layer_type = 'receptor_hexagons'
-        fields = self.field_factory.create_fields_for_layer_type(layer_type)
-        self.create_layer(layer_type, fields, QgsWkbTypes.Polygon, epsg_id)
+        fields = self.field_factory.create_fields_for_layer_type(layer_type, projection=projection)
+        self.create_layer(layer_type, fields, QgsWkbTypes.Polygon, epsg_id, spatial_index)
 
-    def create_layer_sub_points(self, epsg_id):
+    def create_layer_sub_points(self, epsg_id, projection=None, spatial_index=True):
         layer_type = 'sub_points'
-        fields = self.field_factory.create_fields_for_layer_type(layer_type)
-        self.create_layer(layer_type, fields, QgsWkbTypes.Point, epsg_id)
+        fields = self.field_factory.create_fields_for_layer_type(layer_type, projection=projection)
+        self.create_layer(layer_type, fields, QgsWkbTypes.Point, epsg_id, spatial_index)
 
-    def create_layer_calculation_points(self, epsg_id):
+    def create_layer_calculation_points(self, epsg_id, projection=None, spatial_index=True):
         layer_type = 'calculation_points'
-        fields = self.field_factory.create_fields_for_layer_type(layer_type)
-        self.create_layer(layer_type, fields, QgsWkbTypes.Point, epsg_id)
+        fields = self.field_factory.create_fields_for_layer_type(layer_type, projection=projection)
+        self.create_layer(layer_type, fields, QgsWkbTypes.Point, epsg_id, spatial_index)
+
+    def create_indexes(self):
+        '''Builds the indexes of the layers created with spatial_index=False in
+        one pass: the R-tree (by GDAL, which fills it in bulk and adds the
+        triggers that keep it up to date), B-tree indexes on the id fields,
+        and ANALYZE for the query planner. Call after finish_bulk_insert().'''
+        if len(self.deferred_index_layers) == 0:
+            return
+        conn = self.get_sqlite_connection()
+
+        for table_name in self.deferred_index_layers:
+            geometry_column, _ = self.get_geometry_column(table_name)
+            if geometry_column is not None:
+                self.conn.executeSql(f'SELECT CreateSpatialIndex(\'{table_name}\', \'{geometry_column}\');')
+
+        with conn:
+            for table_name in self.deferred_index_layers:
+                column_names = self.get_column_names(table_name)
+                for field_name in index_field_names.get(get_table_layer_type(table_name), []):
+                    if field_name not in column_names:
+                        continue
+                    # Situation first, for selecting and joining the results of situations
+                    if 'situation_id' in column_names:
+                        q = f'CREATE INDEX IF NOT EXISTS "idx_{table_name}_{field_name}" ON "{table_name}" (situation_id, "{field_name}");'
+                    else:
+                        q = f'CREATE INDEX IF NOT EXISTS "idx_{table_name}_{field_name}" ON "{table_name}" ("{field_name}");'
+                    conn.execute(q)
+        conn.execute('ANALYZE;')
+
+        conn.close()
+        self.sqlite_conn = None
+        self.deferred_index_layers = []
 
     def create_metadata_table(self):
         q = '''
@@ -99,57 +290,374 @@ class ImaerGpkg():
         '''
         self.conn.executeSql(q)
 
-    def set_metadata(self, key, value):
-        if value is None:
-            q = f'DELETE FROM imaer_metadata WHERE key = \'{key}\';'
-            self.conn.executeSql(q)
-            return True
-
-        if isinstance(value, str):
-            data_type = 'str'
-        elif isinstance(value, float):
-            data_type = 'float'
-        elif isinstance(value, int):
-            data_type = 'int'
-        else:
-            return False
-        str_value = str(value)
-
-        q = f'SELECT * FROM imaer_metadata WHERE key = \'{key}\';'
-        result = self.conn.executeSql(q)
-
-        if len(result) == 0:
-            q = f'INSERT INTO imaer_metadata (key, value, data_type) VALUES (\'{key}\', \'{str_value}\', \'{data_type}\');'
-        else:
-            q = f'UPDATE imaer_metadata SET (value, data_type) = (\'{str_value}\', \'{data_type}\') WHERE key = \'{key}\';'
-        result = self.conn.executeSql(q)
+    def begin_append(self):
+        '''Switches to append mode, for importing several situations into one
+        GeoPackage. Result layers get a situation_id field, referring to the
+        imaer_situations table, which is created if needed.'''
+        self.append_mode = True
+        q = '''
+            CREATE TABLE IF NOT EXISTS imaer_situations (
+                situation_id INTEGER PRIMARY KEY,
+                situation_name TEXT,
+                gml_fn TEXT,
+                imaer_version TEXT,
+                import_time TEXT,
+                fingerprint TEXT,
+                import_profile TEXT
+            );
+        '''
+        with self.get_sqlite_connection() as conn:
+            conn.execute(q)
+
+    def add_situation(self, items):
+        '''Adds a situation with the values in the items dict and returns its situation_id.'''
+        column_names = list(items.keys())
+        columns = ', '.join(column_names)
+        placeholders = ', '.join(['?'] * len(column_names))
+        q = f'INSERT INTO imaer_situations ({columns}) VALUES ({placeholders});'
+        with self.get_sqlite_connection() as conn:
+            cursor = conn.execute(q, [items[name] for name in column_names])
+        return cursor.lastrowid
+
+    def update_situation(self, situation_id, items):
+        assignments = ', '.join(f'{name} = ?' for name in items)
+        q = f'UPDATE imaer_situations SET {assignments} WHERE situation_id = ?;'
+        with self.get_sqlite_connection() as conn:
+            conn.execute(q, list(items.values()) + [situation_id])
+
+    def get_situations(self):
+        return read_gpkg_situations(self.filename)
+
+    def get_situation_layers(self):
+        '''Returns the names of the layers and values tables with a situation_id field.'''
+        conn = self.get_sqlite_connection()
+        q = 'SELECT table_name FROM gpkg_contents WHERE data_type IN (\'features\', \'attributes\');'
+        table_names = [row[0] for row in conn.execute(q)]
+        return [table_name for table_name in table_names if 'situation_id' in self.get_column_names(table_name)]
+
+    def remove_situation(self, situation_id):
+        '''Removes a situation with its results and views.'''
+        table_names = self.get_situation_layers()
+        with self.get_sqlite_connection() as conn:
+            for table_name in table_names:
+                conn.execute(f'DROP VIEW IF EXISTS "{get_situation_view_name(table_name, situation_id)}";')
+                conn.execute(f'DELETE FROM "{table_name}" WHERE situation_id = ?;', (situation_id,))
+            conn.execute('DELETE FROM imaer_situations WHERE situation_id = ?;', (situation_id,))
+        for table_name in table_names:
+            self.update_feature_count(table_name)
+
+    def create_situation_views(self, situation_id):
+        '''Creates a view per result layer with the rows of a situation, for
+        comparing situations with SQL.'''
+        table_names = self.get_situation_layers()
+        with self.get_sqlite_connection() as conn:
+            for table_name in table_names:
+                view_name = get_situation_view_name(table_name, situation_id)
+                q = f'CREATE VIEW IF NOT EXISTS "{view_name}" AS SELECT * FROM "{table_name}" WHERE situation_id = {int(situation_id)};'
+                conn.execute(q)
+
+    def has_layer(self, name):
+        q = 'SELECT count(*) FROM gpkg_contents WHERE lower(table_name) = lower(?);'
+        return self.get_sqlite_connection().execute(q, (name,)).fetchone()[0] > 0
+
+    def get_column_names(self, table_name):
+        return [row[1] for row in self.get_sqlite_connection().execute(f'PRAGMA table_info("{table_name}");')]
+
+    def prepare_append_layer(self, name, fields):
+        '''Prepares an existing layer for appending rows: adds the fields
+        (QgsFields) it does not have yet, and starts the bulk extent at the
+        extent of the layer, so finish_bulk_insert() extends it.'''
+        conn = self.get_sqlite_connection()
+        column_names = self.get_column_names(name)
+        with conn:
+            for field in fields:
+                if field.name() not in column_names:
+                    q = f'ALTER TABLE "{name}" ADD COLUMN "{field.name()}" {_sqlite_types.get(field.type(), "TEXT")};'
+                    conn.execute(q)
+
+        q = 'SELECT min_x, max_x, min_y, max_y FROM gpkg_contents WHERE lower(table_name) = lower(?);'
+        extent = conn.execute(q, (name,)).fetchone()
+        if extent is not None and None not in extent and name not in self.bulk_extents:
+            self.bulk_extents[name] = list(extent)
 
+    def set_metadata(self, key, value):
+        return self.set_metadata_items({key: value})
+
+    def set_metadata_items(self, items):
+        '''Writes a dict of metadata in one transaction. Values can be str, int
+        or float, None removes the key. Returns False (writing nothing) if a
+        value has another type.'''
+        upserts = []
+        deletes = []
+        for key, value in items.items():
+            if value is None:
+                deletes.append((key,))
+                continue
+            data_type = get_metadata_data_type(value)
+            if data_type is None:
+                return False
+            upserts.append((key, str(value), data_type))
+
+        conn = self.get_sqlite_connection()
+        with conn:
+            if len(deletes) > 0:
+                conn.executemany('DELETE FROM imaer_metadata WHERE key = ?;', deletes)
+            if len(upserts) > 0:
+                q = '''
+                    INSERT INTO imaer_metadata (key, value, data_type) VALUES (?, ?, ?)
+                    ON CONFLICT (key) DO UPDATE SET value = excluded.value, data_type = excluded.data_type;
+                '''
+                conn.executemany(q, upserts)
+
+        metadata = self.get_all_metadata()
+        for key, value in items.items():
+            if value is None:
+                metadata.pop(key, None)
+            else:
+                metadata[key] = value
         return True
 
     def get_metadata(self, key):
-        q = f'SELECT key, value, data_type FROM imaer_metadata WHERE key = \'{key}\';'
-        result = self.conn.executeSql(q)
-
-        if len(result) == 0:
-            return None
-
-        data_type = result[0][2]
-        str_value = result[0][1]
-        if data_type == 'int':
-            return int(str_value)
-        elif data_type == 'float':
-            return float(str_value)
-        else:
-            return str_value
+        return self.get_all_metadata().get(key)
 
     def get_all_metadata(self):
-        q = 'SELECT key FROM imaer_metadata ORDER BY key;'
-        qr = self.conn.executeSql(q)
+        '''Returns all metadata as a dict. It is read with one query on first
+        use and then kept up to date by set_metadata().'''
+        if self.metadata is None:
+            self.metadata = read_gpkg_metadata(self.filename)
+        return self.metadata
+
+    def get_sqlite_connection(self):
+        '''Returns a sqlite3 connection for bulk writing, with the ST_ functions
+        used by the R-tree triggers registered.'''
+        if self.sqlite_conn is None:
+            self.sqlite_conn = sqlite3.connect(self.filename)
+            register_gpkg_functions(self.sqlite_conn)
+            self.set_pragmas(self.sqlite_pragmas)
+        return self.sqlite_conn
+
+    def set_pragmas(self, pragmas):
+        for key, value in pragmas.items():
+            self.sqlite_conn.execute(f'PRAGMA {key} = {value};')
+
+    def begin_fast_build(self):
+        '''Switches the sqlite3 connection (also when it is reopened) to
+        fast_build_pragmas, for bulk loading a new GeoPackage. This is not crash
+        safe: an interrupted build leaves a file that must be removed. Call
+        before creating the layers, as the page size is changed by a VACUUM,
+        which is cheap while the file is still almost empty. Only for new files
+        that are removed when the build fails (see fast_build_pragmas).'''
+        self.sqlite_pragmas = fast_build_pragmas
+        conn = self.get_sqlite_connection()
+        conn.execute(f'PRAGMA page_size = {fast_build_page_size};')
+        conn.execute('VACUUM;')
+        self.set_pragmas(self.sqlite_pragmas)
+
+    def end_fast_build(self):
+        '''Restores safe_pragmas, on the open sqlite3 connection and on the
+        connections opened later (finish_bulk_insert() and create_indexes()
+        close it). The next commit is synced to disk, which includes the pages
+        written during the fast build.'''
+        self.sqlite_pragmas = safe_pragmas
+        if self.sqlite_conn is not None:
+            self.set_pragmas(self.sqlite_pragmas)
+
+    def get_geometry_column(self, table_name):
+        '''Returns the geometry column name and srs_id of a layer.'''
+        q = 'SELECT column_name, srs_id FROM gpkg_geometry_columns WHERE lower(table_name) = lower(?);'
+        result = self.get_sqlite_connection().execute(q, (table_name,)).fetchone()
+        if result is None:
+            return None, None
+        return result[0], result[1]
+
+    def bulk_insert(self, table_name, column_names, rows):
+        '''Inserts rows into a layer in a single transaction. Each row is a
+        sequence with a GPKG geometry blob followed by the values for
+        column_names. For tables without geometry the blob is left out.'''
+        if len(rows) == 0:
+            return
+        conn = self.get_sqlite_connection()
+        geometry_column, _ = self.get_geometry_column(table_name)
+
+        if geometry_column is None:
+            columns = ', '.join(f'"{name}"' for name in column_names)
+            placeholders = ', '.join(['?'] * len(column_names))
+            q = f'INSERT INTO "{table_name}" ({columns}) VALUES ({placeholders});'
+            with conn:
+                conn.executemany(q, (row[1:] for row in rows))
+            return
 
-        result = {}
+        columns = ', '.join(f'"{name}"' for name in [geometry_column] + list(column_names))
+        placeholders = ', '.join(['?'] * (len(column_names) + 1))
+        q = f'INSERT INTO "{table_name}" ({columns}) VALUES ({placeholders});'
+        with conn:
+            conn.executemany(q, rows)
+
+        extent = self.bulk_extents.get(table_name)
+        for row in rows:
+            envelope = get_envelope(row[0])
+            if envelope is None:
+                continue
+            if extent is None:
+                extent = list(envelope)
+            else:
+                extent[0] = min(extent[0], envelope[0])
+                extent[1] = max(extent[1], envelope[1])
+                extent[2] = min(extent[2], envelope[2])
+                extent[3] = max(extent[3], envelope[3])
+        self.bulk_extents[table_name] = extent
+
+    def get_fields(self, table_name):
+        '''Returns the fields of a table as QgsFields, without the fid.'''
+        q = f'PRAGMA table_info("{table_name}");'
+        result = QgsFields()
+        for _, column_name, column_type, _, _, is_primary_key in self.get_sqlite_connection().execute(q):
+            if is_primary_key:
+                continue
+            column_type = column_type.upper()
+            if column_type in ['REAL', 'FLOAT', 'DOUBLE']:
+                result.append(QgsField(column_name, QVariant.Double))
+            elif column_type in ['INTEGER', 'MEDIUMINT', 'SMALLINT', 'TINYINT', 'BOOLEAN']:
+                result.append(QgsField(column_name, QVariant.LongLong))
+            else:
+                result.append(QgsField(column_name, QVariant.String))
+        return result
 
-        for rec in qr:
-            key = rec[0]
-            result[key] = self.get_metadata(key)
+    def materialize_receptor_layer(self, layer_type, catalog_fn):
+        '''Creates or extends a receptor layer from its values table (written
+        by an import with a receptor catalog), with the geometries joined from
+        the catalog in SQL. The values rows are moved, so the values are not
+        stored twice. Raises a ValueError, without changing the values table,
+        when the catalog is missing or lacks receptors of the values table.
+        Returns the number of features added.'''
+        values_table_name = get_values_table_name(layer_type)
+        if not self.has_layer(values_table_name):
+            return 0
+        if not os.path.isfile(catalog_fn):
+            raise ValueError(f'Receptor catalog not found: {catalog_fn}')
+        conn = self.get_sqlite_connection()
+        max_fid, values_count = conn.execute(f'SELECT max(ogc_fid), count(*) FROM "{values_table_name}";').fetchone()
+        if max_fid is None:
+            return 0
+
+        conn.execute('ATTACH DATABASE ? AS catalog;', (catalog_fn,))
+        try:
+            catalog_geometry_column = conn.execute(
+                'SELECT column_name, srs_id FROM catalog.gpkg_geometry_columns WHERE lower(table_name) = lower(?);',
+                (layer_type,)
+            ).fetchone()
+            if catalog_geometry_column is None:
+                raise ValueError(f'Receptor catalog {catalog_fn} has no {layer_type} layer')
+            catalog_geometry_column, srs_id = catalog_geometry_column
+
+            fields = self.get_fields(values_table_name)
+            if not self.has_layer(layer_type):
+                geometry_types = {'receptor_points': QgsWkbTypes.Point, 'receptor_hexagons': QgsWkbTypes.Polygon}
+                self.create_layer(layer_type, fields, geometry_types[layer_type], srs_id, spatial_index=False)
+            else:
+                self.prepare_append_layer(layer_type, fields)
+            geometry_column, _ = self.get_geometry_column(layer_type)
+
+            q = f'''
+                SELECT min(ST_MinX(c.{catalog_geometry_column})), max(ST_MaxX(c.{catalog_geometry_column})),
+                    min(ST_MinY(c.{catalog_geometry_column})), max(ST_MaxY(c.{catalog_geometry_column}))
+                FROM "{values_table_name}" v
+                JOIN catalog."{layer_type}" c ON c.receptor_id = v.receptor_id
+                WHERE v.ogc_fid <= ?;
+            '''
+            extent = conn.execute(q, (max_fid,)).fetchone()
+
+            columns = ', '.join(f'"{field_name}"' for field_name in fields.names())
+            value_columns = ', '.join(f'v."{field_name}"' for field_name in fields.names())
+            q = f'''
+                INSERT INTO "{layer_type}" ("{geometry_column}", {columns})
+                SELECT c."{catalog_geometry_column}", {value_columns}
+                FROM "{values_table_name}" v
+                JOIN catalog."{layer_type}" c ON c.receptor_id = v.receptor_id
+                WHERE v.ogc_fid <= ?
+                ORDER BY v.ogc_fid;
+            '''
+            # Copy and delete in one transaction, rolled back if a values row has no geometry in the catalog
+            with conn:
+                added_count = conn.execute(q, (max_fid,)).rowcount
+                if added_count != values_count:
+                    raise ValueError(
+                        f'Receptor catalog {catalog_fn} lacks {values_count - added_count} of the '
+                        f'{values_count} receptors in {values_table_name}, nothing stored'
+                    )
+                conn.execute(f'DELETE FROM "{values_table_name}" WHERE ogc_fid <= ?;', (max_fid,))
+        finally:
+            conn.execute('DETACH DATABASE catalog;')
+
+        if None not in extent:
+            previous_extent = self.bulk_extents.get(layer_type)
+            if previous_extent is not None:
+                extent = (
+                    min(extent[0], previous_extent[0]),
+                    max(extent[1], previous_extent[1]),
+                    min(extent[2], previous_extent[2]),
+                    max(extent[3], previous_extent[3])
+                )
+            self.bulk_extents[layer_type] = list(extent)
+        self.finish_bulk_insert()
+        self.update_feature_count(values_table_name)
+        self.create_indexes()
+        if 'situation_id' in fields.names():
+            for situation in self.get_situations():
+                self.create_situation_views(situation['situation_id'])
+        return added_count
+
+    def update_feature_count(self, table_name):
+        '''Updates the feature count of a layer in gpkg_ogr_contents, if the GeoPackage has it.'''
+        conn = self.get_sqlite_connection()
+        q = 'SELECT count(*) FROM sqlite_master WHERE type = \'table\' AND name = \'gpkg_ogr_contents\';'
+        if conn.execute(q).fetchone()[0] == 0:
+            return
+        q = f'''
+            UPDATE gpkg_ogr_contents
+            SET feature_count = (SELECT count(*) FROM "{table_name}")
+            WHERE lower(table_name) = lower(?);
+        '''
+        with conn:
+            conn.execute(q, (table_name,))
 
-        return result
+    def finish_bulk_insert(self):
+        '''Updates extents and feature counts in the GeoPackage contents tables
+        for all bulk written layers and closes the sqlite3 connection.'''
+        if self.sqlite_conn is None:
+            return
+        conn = self.sqlite_conn
+
+        q = 'SELECT count(*) FROM sqlite_master WHERE type = \'table\' AND name = \'gpkg_ogr_contents\';'
+        has_ogr_contents = conn.execute(q).fetchone()[0] > 0
+
+        with conn:
+            for table_name, extent in self.bulk_extents.items():
+                if extent is not None:
+                    q = '''
+                        UPDATE gpkg_contents
+                        SET min_x = ?, max_x = ?, min_y = ?, max_y = ?,
+                            last_change = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+                        WHERE lower(table_name) = lower(?);
+                    '''
+                    conn.execute(q, (*extent, table_name))
+                if has_ogr_contents:
+                    q = f'''
+                        UPDATE gpkg_ogr_contents
+                        SET feature_count = (SELECT count(*) FROM "{table_name}")
+                        WHERE lower(table_name) = lower(?);
+                    '''
+                    conn.execute(q, (table_name,))
+
+        conn.close()
+        self.sqlite_conn = None
+        self.bulk_extents = {}
+
+    def close(self):
+        '''Closes the connections without finishing a bulk insert, e.g. before
+        removing the file of a canceled import.'''
+        if self.sqlite_conn is not None:
+            self.sqlite_conn.close()
+            self.sqlite_conn = None
+        self.bulk_extents = {}
+        self.conn = None
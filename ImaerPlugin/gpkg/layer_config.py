@@ -0,0 +1,193 @@
+# Field names and types per category, and the categories per layer type, of
+# the GeoPackage result layers. Kept free of Qt so it can be used without QGIS.
+field_config = {
+    'deposition': {
+        'deposition_nox_nh3_sum': 'double',
+        'deposition_nox': 'double',
+        'deposition_nh3': 'double'
+    },
+    'concentration': {
+        'concentration_nox': 'double',
+        'concentration_no2': 'double',
+        'concentration_nh3': 'double',
+        'concentration_pm10': 'double',
+        'concentration_pm25': 'double'
+    },
+    'exceedance': {
+        'exceedance_days_pm10': 'integer',
+        'exceedance_days_pm25': 'integer',
+        'exceedance_hours_pm10': 'integer',
+        'exceedance_hours_pm25': 'integer'
+    },
+    'receptor_points': {
+        'receptor_id': 'integer'
+    },
+    'receptor_hexagons': {
+        'receptor_id': 'integer',
+        'edge_effect': 'integer'
+    },
+    'sub_points': {
+        'receptor_id': 'integer',
+        'sub_point_id': 'integer',
+        'level': 'integer'
+    },
+    'calculation_points': {
+        'calculation_point_id': 'string',
+        'label': 'string',
+        'height': 'double',
+        'assessment_category': 'string',
+        'road_local_fraction_no2': 'double'
+    }
+}
+
+layer_type_config = {
+    'receptor_points': [
+        'receptor_points',
+        'concentration',
+        'exceedance'
+    ],
+    'receptor_hexagons': [
+        'receptor_hexagons',
+        'deposition'
+    ],
+    'sub_points': [
+        'sub_points',
+        'deposition',
+        'concentration',
+        'exceedance'
+    ],
+    'calculation_points': [
+        'calculation_points',
+        'deposition',
+        'concentration',
+        'exceedance'
+    ]
+}
+
+# Fields with a B-tree index per layer type, for relating and joining layers
+index_field_names = {
+    'receptor_points': ['receptor_id'],
+    'receptor_hexagons': ['receptor_id'],
+    'sub_points': ['receptor_id', 'sub_point_id'],
+    'calculation_points': ['calculation_point_id']
+}
+
+# Layer types of which the geometries can be taken from a receptor catalog,
+# result GeoPackages then have a table with only the values per layer type
+catalog_layer_types = ['receptor_points', 'receptor_hexagons']
+values_table_suffix = '_values'
+
+
+def get_values_table_name(layer_type):
+    return f'{layer_type}{values_table_suffix}'
+
+
+def get_catalog_join_query(value_column_names, catalog_table='catalog', values_table='result_values', geometry_column='geometry'):
+    '''Returns the SQL query of a receptor layer that takes the geometries from
+    a receptor catalog table and the values from a values table. An inner join
+    on receptor_id, so only the receptors in the values table are returned and
+    not the other receptors a shared catalog holds (of other imports).'''
+    value_columns = ''.join(f', v."{column_name}"' for column_name in value_column_names)
+    return (
+        f'SELECT v.ogc_fid AS ogc_fid, v.receptor_id AS receptor_id{value_columns}, c."{geometry_column}" AS geometry '
+        f'FROM "{values_table}" v JOIN "{catalog_table}" c ON c.receptor_id = v.receptor_id'
+    )
+
+
+def get_table_layer_type(table_name):
+    '''Returns the layer type of a layer or values table.'''
+    if table_name.endswith(values_table_suffix):
+        return table_name[:-len(values_table_suffix)]
+    return table_name
+
+
+result_types = ['deposition', 'concentration', 'exceedance_days', 'exceedance_hours']
+substances = ['nox', 'nh3', 'no2', 'pm10', 'pm25']
+
+# The names a ResultProjection accepts
+_projection_names = {
+    'layer type': list(layer_type_config),
+    'result type': result_types,
+    'substance': substances
+}
+
+# Result type and substances of the value fields, deposition_nox_nh3_sum
+# is the sum of the NOx and NH3 depositions
+_value_field_results = {
+    'deposition_nox_nh3_sum': ('deposition', ['nox', 'nh3'])
+}
+
+
+class ResultProjection():
+    '''The layer types, result types and substances to import, None for all.
+    Result types and substances are the lower case names used in the field
+    names, like 'deposition' or 'exceedance_days' and 'nh3'. Raises a
+    ValueError for unknown names.'''
+
+    def __init__(self, layer_types=None, result_types=None, substances=None):
+        self.layer_types = None if layer_types is None else list(layer_types)
+        self.result_types = None if result_types is None else [name.lower() for name in result_types]
+        self.substances = None if substances is None else [name.lower() for name in substances]
+
+        for kind, names in [('layer type', self.layer_types), ('result type', self.result_types), ('substance', self.substances)]:
+            known_names = _projection_names[kind]
+            unknown_names = [name for name in names or [] if name not in known_names]
+            if len(unknown_names) > 0:
+                raise ValueError(f'Unknown import {kind}: {", ".join(unknown_names)} (use {", ".join(known_names)}).')
+
+    def __str__(self):
+        return f'ResultProjection[{self.layer_types}, {self.result_types}, {self.substances}]'
+
+    def to_dict(self):
+        return {'layer_types': self.layer_types, 'result_types': self.result_types, 'substances': self.substances}
+
+    def keeps_layer_type(self, layer_type):
+        if self.layer_types is not None and layer_type not in self.layer_types:
+            return False
+        return len(get_layer_field_names(layer_type, value_fields_only=True, projection=self)) > 0
+
+    def keeps_result(self, result_type, substance):
+        '''True if the (lower case) result type and substance are imported.'''
+        if self.result_types is not None and result_type not in self.result_types:
+            return False
+        return self.substances is None or substance in self.substances
+
+    def keeps_field(self, field_name):
+        '''True if a value field (like 'concentration_nox') is imported. A sum
+        field is only imported when all its substances are.'''
+        if field_name in _value_field_results:
+            result_type, field_substances = _value_field_results[field_name]
+        else:
+            result_type, _, substance = field_name.rpartition('_')
+            field_substances = [substance]
+        return all(self.keeps_result(result_type, substance) for substance in field_substances)
+
+    def get_result_names(self, layer_types):
+        '''Returns the set of result names (like 'deposition_nh3') that are
+        needed for the fields of those layer types that are kept.'''
+        result = set()
+        for layer_type in layer_types:
+            if not self.keeps_layer_type(layer_type):
+                continue
+            for field_name in get_layer_field_names(layer_type, value_fields_only=True, projection=self):
+                if field_name in _value_field_results:
+                    result_type, field_substances = _value_field_results[field_name]
+                    result.update(f'{result_type}_{substance}' for substance in field_substances)
+                else:
+                    result.add(field_name)
+        return result
+
+
+def get_layer_field_names(layer_type, value_fields_only=False, projection=None):
+    '''Returns the field names (without fid) of a layer type, like
+    ImaerGpkgFieldFactory.create_fields_for_layer_type(...).names(). With a
+    projection only the value fields it keeps are returned.'''
+    categories = layer_type_config[layer_type]
+    result = []
+    if not value_fields_only:
+        result.extend(field_config[categories[0]])
+    for category in categories[1:]:
+        for field_name in field_config[category]:
+            if projection is None or projection.keeps_field(field_name):
+                result.append(field_name)
+    return result
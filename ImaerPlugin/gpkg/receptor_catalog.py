@@ -0,0 +1,78 @@
+import threading
+
+from qgis.core import QgsFields, QgsWkbTypes
+
+from ImaerPlugin.gpkg.imaer_gpkg import ImaerGpkg
+
+# Import tasks run in threads of the same process, only one writes to a catalog at a time
+_write_lock = threading.Lock()
+
+_geometry_types = {
+    'receptor_points': QgsWkbTypes.Point,
+    'receptor_hexagons': QgsWkbTypes.Polygon
+}
+
+# Receptor ids per lookup query, below the SQLite limit of bound parameters
+_lookup_chunk_size = 500
+
+
+class ReceptorCatalog():
+    '''Local GeoPackage with the geometries of the AERIUS receptors (points and
+    hexagons), with the receptor_id as fid. The receptor grid is fixed, so the
+    catalog is filled on demand: imports add the receptors it does not have
+    yet, and the result GeoPackages store only the receptor ids and values
+    (see ImaerGpkg.materialize_receptor_layer()).
+
+    A catalog holds one crs, set by the first import (epsg_id).'''
+
+    def __init__(self, filename, epsg_id, plugin=None):
+        self.filename = filename
+        # Parallel imports may open a new catalog at the same time, the first one creates it
+        with _write_lock:
+            self.gpkg = ImaerGpkg(filename, plugin=plugin)
+            self.epsg_id = self.gpkg.get_metadata('epsg_id')
+            if self.epsg_id is None:
+                self.epsg_id = int(epsg_id)
+                self.gpkg.set_metadata('epsg_id', self.epsg_id)
+        self.added_counts = {}
+
+    def __str__(self):
+        return f'ReceptorCatalog[{self.filename}, EPSG:{self.epsg_id}]'
+
+    def get_missing_receptor_ids(self, layer_type, receptor_ids):
+        '''Returns the set of receptor_ids that are not in the layer.'''
+        if not self.gpkg.has_layer(layer_type):
+            return set(receptor_ids)
+        conn = self.gpkg.get_sqlite_connection()
+        found = set()
+        receptor_ids = list(set(receptor_ids))
+        for start in range(0, len(receptor_ids), _lookup_chunk_size):
+            chunk = receptor_ids[start:start + _lookup_chunk_size]
+            placeholders = ', '.join(['?'] * len(chunk))
+            q = f'SELECT receptor_id FROM "{layer_type}" WHERE receptor_id IN ({placeholders});'
+            found.update(row[0] for row in conn.execute(q, chunk))
+        return set(receptor_ids) - found
+
+    def add_receptors(self, layer_type, rows):
+        '''Adds the receptors that are not in the catalog yet. Rows are
+        (geometry blob, receptor_id) tuples. Returns the number added.'''
+        with _write_lock:
+            if not self.gpkg.has_layer(layer_type):
+                self.gpkg.create_layer(layer_type, QgsFields(), _geometry_types[layer_type], self.epsg_id, fid_name='receptor_id')
+            else:
+                self.gpkg.prepare_append_layer(layer_type, QgsFields())
+
+            missing_ids = self.get_missing_receptor_ids(layer_type, [receptor_id for _, receptor_id in rows])
+            new_rows = []
+            for row in rows:
+                if row[1] in missing_ids:
+                    missing_ids.discard(row[1])
+                    new_rows.append(row)
+            self.gpkg.bulk_insert(layer_type, ['receptor_id'], new_rows)
+            self.gpkg.finish_bulk_insert()
+
+        self.added_counts[layer_type] = self.added_counts.get(layer_type, 0) + len(new_rows)
+        return len(new_rows)
+
+    def close(self):
+        self.gpkg.close()
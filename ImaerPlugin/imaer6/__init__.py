@@ -26,7 +26,6 @@ from .roads import (
     CustomVehicle
 )
 from .buildings import Building
-from .gml import get_gml_element
 from .identifier import Nen3610Id
 
 from .receptors import (
@@ -34,6 +33,14 @@ from .receptors import (
     CalculationPoint,
     NcaCustomCalculationPoint
 )
+from .result_table import ReceptorResultTable
+
+# Not available without QGIS, e.g. in worker processes. Other import errors are raised.
+try:
+    from .gml import get_gml_element
+except ModuleNotFoundError as e:
+    if e.name is None or e.name.split('.')[0] not in ['qgis', 'PyQt5']:
+        raise
 from .entity_reference import (
     CriticalLevel,
     EntityReference
@@ -1,7 +1,6 @@
-from PyQt5.QtXml import QDomDocument
+from .xml_dom import create_dom_document
 
 # from .enumerations import OutflowDirectionType
-from .gml import get_gml_element
 
 
 class Building(object):
@@ -14,7 +13,7 @@ class Building(object):
         self.geometry = geom
         self.epsg_id = epsg_id
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = doc.createElement(f'imaer:Building')
 
         result.setAttribute('gml:id', f'Building.{self.local_id}')
@@ -54,6 +53,7 @@ class Building(object):
         gml_type = gml_types[self.geometry.type()]
 
         gm_elem = doc.createElement(f'imaer:{gm_tag}')
+        from .gml import get_gml_element
         gml_elem = get_gml_element(self.geometry, f'Building.{self.local_id}.{gml_type}', self.epsg_id)
 
         gm_elem.appendChild(gml_elem)
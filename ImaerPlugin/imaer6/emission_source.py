@@ -1,7 +1,5 @@
-from PyQt5.QtXml import QDomDocument
-
-from .gml import get_gml_element
 from .identifier import Nen3610Id
+from .xml_dom import create_dom_document
 
 
 class EmissionSourceType(object):
@@ -21,7 +19,7 @@ class EmissionSourceType(object):
         else:
             self.identifier = identifier
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         class_name = self.__class__.__name__
         result = doc.createElement(f'imaer:{class_name}')
 
@@ -66,6 +64,7 @@ class EmissionSourceType(object):
         gml_type = gml_types[self.geometry.type()]
 
         gm_elem = doc.createElement(f'imaer:{gm_tag}')
+        from .gml import get_gml_element
         gml_elem = get_gml_element(self.geometry, f'ES.{self.local_id}.{gml_type}', self.epsg_id)
 
         gm_elem.appendChild(gml_elem)
@@ -82,9 +81,9 @@ class EmissionSource(EmissionSourceType):
         super().__init__(**kwargs)
         self.emissions = emissions or []
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         if doc is None:
-            doc = QDomDocument()
+            doc = create_dom_document()
 
         result = super().to_xml_elem(doc)
 
@@ -108,7 +107,7 @@ class EmissionSourceCharacteristics(object):
         self.spread = spread
         self.time_varying_profile = time_varying_profile
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = doc.createElement('imaer:EmissionSourceCharacteristics')
 
         # building
@@ -171,7 +170,7 @@ class ADMSSourceCharacteristics(object):
         self.hourly_variation = hourly_variation
         self.monthly_variation = monthly_variation
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = doc.createElement('imaer:ADMSSourceCharacteristics')
 
         # building
@@ -286,7 +285,7 @@ class HeatContent(object):
     def __init__(self):
         pass
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = doc.createElement('imaer:heatContent')
         return result
 
@@ -297,7 +296,7 @@ class SpecifiedHeatContent(HeatContent):
         super().__init__(**kwargs)
         self.value = value
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = super().to_xml_elem(doc)
 
         shc = doc.createElement('imaer:SpecifiedHeatContent')
@@ -312,11 +311,13 @@ class SpecifiedHeatContent(HeatContent):
 
 class Emission(object):
 
+    __slots__ = ('substance', 'value')
+
     def __init__(self, substance, value):
         self.substance = substance
         self.value = value
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = doc.createElement('imaer:Emission')
         result.setAttribute('substance', self.substance)
 
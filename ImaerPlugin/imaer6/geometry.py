@@ -1,16 +1,19 @@
 import sys
 
-from PyQt5.QtXml import QDomDocument
-
-from qgis.core import QgsPoint, QgsLineString, QgsPolygon
-
 # path_qgis_python_folder = "/home/raymond/programs/qgis/qgis-master/share/qgis/python/"
 # sys.path.append(path_qgis_python_folder)
 # from qgis.core import QgsGeometry
 
 
+def parse_pos_list(text):
+    '''Returns the coordinates of a posList text as a flat list [x, y, x, y, ...].'''
+    return list(map(float, text.split()))
+
+
 class GmlGeometry():
 
+    __slots__ = ('epsg_id', 'gml_id')
+
     def __init__(self, epsg_id=None, gml_id=None):
         self.epsg_id = epsg_id
         self.gml_id = gml_id
@@ -31,9 +34,15 @@ class GmlGeometry():
     def is_valid(self):
         return True
 
+    def to_qgis_geometry(self):
+        from .qgis_adapters import gml_geometry_to_qgis
+        return gml_geometry_to_qgis(self)
+
 
 class GmlPoint(GmlGeometry):
 
+    __slots__ = ('x', 'y')
+
     def __init__(self, *, x=None, y=None):
         super().__init__()
         self.x = x
@@ -66,12 +75,11 @@ class GmlPoint(GmlGeometry):
                 self.x = float(parts[0])
                 self.y = float(parts[1])
 
-    def to_qgis_geometry(self):
-        return QgsPoint(round(self.x, 3), round(self.y, 3))
-
 
 class GmlLineString(GmlGeometry):  # NEVER TESTED!!!
 
+    __slots__ = ('coords',)
+
     def __init__(self, *, coords=None):
         super().__init__()
         self.coords = coords or []  # [x, y, x, y, x, y, ...]
@@ -87,15 +95,13 @@ class GmlLineString(GmlGeometry):  # NEVER TESTED!!!
             xml_reader.readNextStartElement()
             if xml_reader.name() == 'posList':
                 xml_reader.readNext()
-                coords = xml_reader.text()
-                print(coords)
-                parts = coords.split()
-                for part in parts:
-                    self.coords.append(float(part))
+                self.coords = parse_pos_list(xml_reader.text())
 
 
 class GmlPolygon(GmlGeometry):
 
+    __slots__ = ('exterior',)
+
     def __init__(self, *, exterior=None):
         super().__init__()
         self.exterior = exterior or []  # [x, y, x, y, x, y, ...]
@@ -132,17 +138,4 @@ class GmlPolygon(GmlGeometry):
 
             if xml_reader.name() == 'posList':
                 xml_reader.readNext()
-                coords = xml_reader.text()
-                parts = coords.split()
-                for part in parts:
-                    self.exterior.append(float(part))
-
-    def to_qgis_geometry(self):
-        line = QgsLineString()
-        for i in range(0, len(self.exterior), 2):
-            line.addVertex(QgsPoint(self.exterior[i], self.exterior[i + 1]))
-
-        result = QgsPolygon()
-        result.setExteriorRing(line)
-
-        return result
+                self.exterior = parse_pos_list(xml_reader.text())
@@ -0,0 +1,143 @@
+import os
+import re
+import gzip
+import hashlib
+from zipfile import ZipFile
+
+# zip://<archive>.zip!<member>, like zip:///data/results.zip!situation_1.gml
+_zip_member_pattern = re.compile(r'^zip://(.+?\.zip)!(.+)$', re.IGNORECASE)
+
+
+def parse_zip_member_fn(fn):
+    '''Returns (archive file name, member name) for a zip:// file name, or None.'''
+    match = _zip_member_pattern.match(fn)
+    if match is None:
+        return None
+    return match.group(1), match.group(2)
+
+
+def get_zip_member_fn(zip_fn, member_name):
+    return f'zip://{zip_fn}!{member_name}'
+
+
+def list_zip_gml_members(zip_fn):
+    '''Returns the zip:// file names of all GML files in a zip archive.'''
+    with ZipFile(zip_fn) as zip_file:
+        return [get_zip_member_fn(zip_fn, name) for name in zip_file.namelist() if name.lower().endswith('.gml')]
+
+
+def is_gzip_fn(fn):
+    return fn.lower().endswith('.gz')
+
+
+def is_plain_gml_fn(fn):
+    '''True if fn is an uncompressed file, which can be read with random access.'''
+    return parse_zip_member_fn(fn) is None and not is_gzip_fn(fn)
+
+
+def get_gml_stem(fn):
+    '''Returns the file name without the .gml (or .gml.gz) extension. For zip
+    members this is the member name in the directory of the archive, so files
+    derived from it (like the GeoPackage) end up next to the archive.'''
+    zip_member = parse_zip_member_fn(fn)
+    if zip_member is not None:
+        zip_fn, member_name = zip_member
+        fn = os.path.join(os.path.dirname(zip_fn), os.path.basename(member_name))
+    elif is_gzip_fn(fn):
+        fn = fn[:-3]
+    stem, _ = os.path.splitext(fn)
+    return stem
+
+
+class GmlParseError(ValueError):
+    '''Raised when a GML file is not well-formed, e.g. when it is truncated.'''
+    pass
+
+
+class GmlFile():
+    '''Binary file object for reading a GML file, which can be a plain .gml
+    file, a gzip compressed .gml.gz file, or a member of a zip archive
+    (zip://archive.zip!member.gml). Compressed files are decompressed while
+    reading, without extracting them to disk.
+
+    pos() returns the number of bytes read and size the total number of bytes,
+    for the progress. For gzip files these are compressed bytes (the size of
+    the uncompressed data is not stored reliably), for zip members and plain
+    files uncompressed bytes.'''
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.raw_file = None
+        zip_member = parse_zip_member_fn(fn)
+
+        if zip_member is not None:
+            zip_fn, member_name = zip_member
+            with ZipFile(zip_fn) as zip_file:
+                # The archive stays open until the member file is closed
+                self.size = zip_file.getinfo(member_name).file_size
+                self.file = zip_file.open(member_name)
+        elif is_gzip_fn(fn):
+            self.raw_file = open(fn, 'rb')
+            self.size = os.path.getsize(fn)
+            self.file = gzip.GzipFile(fileobj=self.raw_file, mode='rb')
+        else:
+            self.file = open(fn, 'rb')
+            self.size = os.path.getsize(fn)
+
+    def read(self, size=-1):
+        return self.file.read(size)
+
+    def pos(self):
+        if self.raw_file is not None:
+            return self.raw_file.tell()
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+        if self.raw_file is not None:
+            self.raw_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def get_gml_size(fn):
+    '''Returns the size of a GML file as counted by GmlFile.pos().'''
+    if is_plain_gml_fn(fn):
+        return os.path.getsize(fn)
+    with GmlFile(fn) as gml_file:
+        return gml_file.size
+
+
+def get_gml_fingerprint(fn, sample_size=1024 * 1024):
+    '''Returns a dict with the size, modification time and a fast content hash
+    of a GML file, to recognize a file that was imported before. The hash is
+    taken over the first and last sample_size bytes and the size, so it does
+    not read the whole file. For zip members the CRC and time stored in the
+    archive are used.'''
+    zip_member = parse_zip_member_fn(fn)
+    if zip_member is not None:
+        zip_fn, member_name = zip_member
+        with ZipFile(zip_fn) as zip_file:
+            info = zip_file.getinfo(member_name)
+        return {
+            'source_size': info.file_size,
+            'source_mtime': '{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}'.format(*info.date_time),
+            'source_hash': f'crc32:{info.CRC:08x}'
+        }
+
+    stat = os.stat(fn)
+    content_hash = hashlib.blake2b(str(stat.st_size).encode(), digest_size=16)
+    with open(fn, 'rb') as in_file:
+        content_hash.update(in_file.read(sample_size))
+        if stat.st_size > sample_size:
+            in_file.seek(max(sample_size, stat.st_size - sample_size))
+            content_hash.update(in_file.read(sample_size))
+    return {
+        'source_size': stat.st_size,
+        'source_mtime': stat.st_mtime_ns,
+        'source_hash': f'blake2b:{content_hash.hexdigest()}'
+    }
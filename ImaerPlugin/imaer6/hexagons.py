@@ -0,0 +1,54 @@
+import math
+from array import array
+
+# Surface of an AERIUS receptor hexagon at zoom level 1 (1 ha). Every next
+# zoom level has hexagons with a 4 times larger surface.
+hexagon_surface_zoom_level_1 = 10000
+
+
+def get_hexagon_vertex_offsets(zoom_level=1):
+    '''Returns the (dx, dy) offsets from the receptor point of the 7 vertices
+    (closed ring) of a flat-topped AERIUS hexagon.'''
+    surface = hexagon_surface_zoom_level_1 * 4 ** (zoom_level - 1)
+    radius = math.sqrt(2 * surface / (3 * math.sqrt(3)))
+    half_height = radius * math.sqrt(3) / 2
+    return [
+        (radius, 0),
+        (radius / 2, half_height),
+        (-radius / 2, half_height),
+        (-radius, 0),
+        (-radius / 2, -half_height),
+        (radius / 2, -half_height),
+        (radius, 0)
+    ]
+
+
+def create_hexagon_coords(xs, ys, zoom_level=1):
+    '''Returns a flat coordinate array with the hexagon rings for all points and
+    an offsets array (like in ReceptorResultTable). The rings are built one
+    vertex column at a time for all points.'''
+    vertex_offsets = get_hexagon_vertex_offsets(zoom_level)
+    ring_length = len(vertex_offsets) * 2
+    point_count = len(xs)
+
+    coords = array('d', [0.0]) * (point_count * ring_length)
+    for i, (dx, dy) in enumerate(vertex_offsets):
+        coords[2 * i::ring_length] = array('d', [round(x + dx, 3) for x in xs])
+        coords[2 * i + 1::ring_length] = array('d', [round(y + dy, 3) for y in ys])
+
+    offsets = array('q', range(0, point_count * ring_length + 1, ring_length))
+    return coords, offsets
+
+
+def hexagons_match(coords_1, coords_2, tolerance=0.01):
+    '''Returns True if two flat closed rings have the same vertices within the
+    tolerance, regardless of the start vertex and direction.'''
+    if len(coords_1) != len(coords_2):
+        return False
+    vertices_2 = [(coords_2[i], coords_2[i + 1]) for i in range(0, len(coords_2), 2)]
+    for i in range(0, len(coords_1), 2):
+        x = coords_1[i]
+        y = coords_1[i + 1]
+        if not any(abs(x - x2) <= tolerance and abs(y - y2) <= tolerance for x2, y2 in vertices_2):
+            return False
+    return True
@@ -1,10 +1,10 @@
 import sys
 
-from PyQt5.QtXml import QDomDocument
-
 
 class Nen3610Id():
 
+    __slots__ = ('namespace', 'local_id')
+
     def __init__(self, namespace='NL.IMAER', local_id=None):
         self.namespace = namespace
         self.local_id = local_id
@@ -1,5 +1,6 @@
-from PyQt5.QtCore import QXmlStreamReader, QFile
-from PyQt5.QtXml import QDomDocument
+import re
+from collections import Counter
+
 
 # Fix for import error while running tests.
 try:
@@ -10,6 +11,12 @@ except ImportError:
 from .metadata import AeriusCalculatorMetadata
 from .emission_source import EmissionSource
 from .receptors import ReceptorPoint, SubPoint, CalculationPoint
+from .result_table import ReceptorResultTable, get_result_table_member_types
+from .parser_backends import get_parser_backend
+from .parallel_parse import iter_result_tables_parallel, get_parse_process_count
+from .xml_stream_reader import XmlFileReader
+from .gml_file import GmlFile, GmlParseError, get_gml_size
+from .xml_dom import create_dom_document, add_xml_declaration, dom_to_string
 
 _default_namespaces = {
     'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
@@ -23,11 +30,29 @@ _default_attributes = {
     'xsi:schemaLocation': 'http://imaer.aerius.nl/6.0 http://imaer.aerius.nl/6.0/IMAER.xsd'
 }
 
+_member_count_pattern = re.compile(
+    rb'<(?:[\w.-]+:)?(ReceptorPoint|SubPoint|CalculationPoint|NcaCustomCalculationPoint|CalculationResult)[\s/>]'
+)
+
+_feature_member_classes = {
+    'ReceptorPoint': ReceptorPoint,
+    'SubPoint': SubPoint,
+    'CalculationPoint': CalculationPoint,
+    'NcaCustomCalculationPoint': CalculationPoint
+}
+
 
 class ImaerDocument():
+    '''Elements are dispatched on tag name through the header_element_handlers
+    and feature_member_classes dicts, which can be replaced to read a variant
+    for another IMAER version.'''
 
     def __init__(self):
         self.gml_fn = None
+        self.bytes_read = 0
+        self.bytes_total = 0
+        self.filtered_count = 0
+        self.parser_backend = None
         self.namespaces = _default_namespaces
         self.attributes = _default_attributes
 
@@ -35,7 +60,13 @@ class ImaerDocument():
         self.feature_members = []
         self.definitions = []
 
-        self.doc = QDomDocument()
+        self.header_element_handlers = {
+            'FeatureCollectionCalculator': ImaerDocument._read_feature_collection,
+            'AeriusCalculatorMetadata': ImaerDocument._read_metadata
+        }
+        self.feature_member_classes = _feature_member_classes
+
+        self.doc = create_dom_document()
 
     def __str__(self):
         result = 'ImaerDocument[{}, feature_members:{}]'.format(
@@ -56,15 +87,18 @@ class ImaerDocument():
         result.from_string(imaer_version_str)
         return result
 
+    def get_situation_name(self):
+        if self.metadata is None or self.metadata.situation is None:
+            return ''
+        return self.metadata.situation.get('name', '')
+
     def clear(self):
         self.metadata = None
         self.feature_members = []
         self.definitions = []
 
     def to_xml_elem(self):
-
-        inst = self.doc.createProcessingInstruction('xml', 'version="1.0" encoding="utf-8" standalone="yes"')
-        self.doc.appendChild(inst)
+        add_xml_declaration(self.doc)
 
         fcc_elem = self.doc.createElement('imaer:FeatureCollectionCalculator')
         for k, v in self.namespaces.items():
@@ -97,59 +131,187 @@ class ImaerDocument():
         self.to_xml_elem()
 
         with open(fn, 'w') as out_file:
-            out_file.write(self.doc.toString(4))
+            out_file.write(dom_to_string(self.doc, 4))
 
     def from_xml_file(self, fn):
+        for member in self.iter_feature_members(fn):
+            self.feature_members.append(member)
+
+    def iter_feature_members(self, fn, use_qt=True):
+        '''Generator that yields the valid result feature members (ReceptorPoint,
+        SubPoint and CalculationPoint) one at a time, without storing them in
+        self.feature_members. Namespaces, attributes and metadata are set on
+        the document while reading, before the first member is yielded.
+        Reading progress is available in self.bytes_read and self.bytes_total.
+        With use_qt False the file is read with XmlStreamReader, also when Qt
+        is available (see XmlFileReader).
+        Raises a GmlParseError when the file is not well-formed, like a
+        truncated file.'''
         self.gml_fn = fn
-        file = QFile(fn)
-        file.open(QFile.ReadOnly | QFile.Text)
-        xml_reader = QXmlStreamReader(file)
+        xml_file = XmlFileReader(fn, use_qt)
+        xml_reader = xml_file.xml_reader
+        self.bytes_read = 0
+        self.bytes_total = get_gml_size(fn)
 
         while not xml_reader.atEnd():
-            if xml_reader.isStartElement():
+            if xml_reader.readNext() == xml_reader.StartElement:
                 tag_name = xml_reader.name()
 
-                if tag_name == 'FeatureCollectionCalculator' and xml_reader.isStartElement():
-                    self.namespaces = {}
-                    for ns_declaration in xml_reader.namespaceDeclarations():
-                        self.namespaces[f'xmlns:{ns_declaration.prefix()}'] = ns_declaration.namespaceUri()
-                    self.attributes = {}
-                    for attrib in xml_reader.attributes():
-                        self.attributes[f'{attrib.prefix()}:{attrib.name()}'] = attrib.value()
+                if tag_name == 'featureMember':
+                    member = self._read_feature_member(xml_reader)
+                    if member is not None:
+                        self.bytes_read = xml_file.pos()
+                        yield member
+                else:
+                    self._read_header_element(xml_reader, tag_name)
+        if xml_reader.hasError():
+            error = f'{xml_reader.errorString()} (offset {xml_reader.characterOffset()})'
+            xml_file.close()
+            raise GmlParseError(error)
+        self.bytes_read = self.bytes_total
+        xml_file.close()
+
+    def iter_result_tables(self, fn, chunk_size=50000, read_hexagons=True, parser_backend=None, process_count=1, projection=None, spatial_filter=None,
+                           progress_callback=None, progress_interval=1000):
+        '''Generator that reads the result members directly into a
+        ReceptorResultTable per member type, without creating member objects.
+        A table is yielded as soon as it holds chunk_size rows, the remaining
+        tables are yielded at the end of the file. With read_hexagons False the
+        representation polygons are skipped (e.g. to synthesize them).
+        parser_backend is the name of a backend in parser_backends, by default
+        the fastest available one is used. With a process_count other than 1
+        the file is read by that many worker processes (None for one per CPU),
+        see parallel_parse. chunk_size does not apply then. Compressed and
+        small files are read sequentially (see get_parse_process_count()). With a projection (a ResultProjection)
+        the members, hexagons and result values it does not keep are skipped.
+        With a spatial_filter (a SpatialFilter) only the members inside it are
+        read, the number of skipped members is kept in self.filtered_count.
+
+        progress_callback is called with (bytes_read, bytes_total) every
+        progress_interval members, reading stops (without yielding the
+        remaining tables) when it returns True, like when a task is canceled.'''
+        if projection is not None and not projection.keeps_layer_type('receptor_hexagons'):
+            read_hexagons = False
+
+        self.filtered_count = 0
+        process_count = get_parse_process_count(fn, process_count)
+        if process_count != 1:
+            self.gml_fn = fn
+            self.bytes_read = 0
+            self.bytes_total = get_gml_size(fn)
+            yield from iter_result_tables_parallel(
+                self, fn, process_count, read_hexagons, parser_backend,
+                projection=projection, spatial_filter=spatial_filter, progress_callback=progress_callback
+            )
+            self.bytes_read = self.bytes_total
+            return
 
-                if tag_name == 'AeriusCalculatorMetadata':
-                    self.metadata = AeriusCalculatorMetadata()
-                    self.metadata.from_xml_reader(xml_reader)
+        self.gml_fn = fn
+        backend = get_parser_backend(parser_backend)
+        self.parser_backend = backend.name
+        self.bytes_read = 0
+        self.bytes_total = get_gml_size(fn)
+        tables = {}
+        member_types = get_result_table_member_types(projection)
+
+        member_count = 0
+
+        for tag_name, source in backend.iter_members(self, fn):
+            member_count += 1
+            if progress_callback is not None and member_count % progress_interval == 0:
+                self.bytes_read = backend.get_position()
+                if progress_callback(self.bytes_read, self.bytes_total):
+                    return
+            member_type = member_types.get(tag_name)
+            if member_type is None:
+                backend.skip_member(source)
+                continue
+            if member_type not in tables:
+                tables[member_type] = ReceptorResultTable(member_type, projection, spatial_filter)
+            table = tables[member_type]
+            backend.append_member(table, source, read_hexagons)
+            if len(table) >= chunk_size:
+                self.bytes_read = backend.get_position()
+                self.filtered_count += table.filtered_count
+                yield table
+                tables[member_type] = ReceptorResultTable(member_type, projection, spatial_filter)
+                tables[member_type].epsg_id = table.epsg_id
+        self.bytes_read = self.bytes_total
+
+        for table in tables.values():
+            self.filtered_count += table.filtered_count
+            if len(table) > 0:
+                yield table
+
+    def peek_header(self, fn):
+        '''Reads only the FeatureCollectionCalculator namespaces and attributes and
+        the AeriusCalculatorMetadata, and stops without reading any feature
+        members. Returns the document, e.g. ImaerDocument().peek_header(fn).get_version()'''
+        self.gml_fn = fn
+        xml_file = XmlFileReader(fn)
+        xml_reader = xml_file.xml_reader
 
+        while not xml_reader.atEnd():
+            if xml_reader.readNext() == xml_reader.StartElement:
+                tag_name = xml_reader.name()
                 if tag_name == 'featureMember':
-                    xml_reader.readNextStartElement()
-                    tag_name = xml_reader.name()
-
-                    if tag_name == 'ReceptorPoint':
-                        # print(f'  Processing {tag_name}')
-                        member = ReceptorPoint()
-                        member.from_xml_reader(xml_reader)
-                        if member.is_valid():
-                            self.feature_members.append(member)
-                    elif tag_name == 'SubPoint':
-                        # print(f'  Processing {tag_name}')
-                        member = SubPoint()
-                        member.from_xml_reader(xml_reader)
-                        if member.is_valid():
-                            self.feature_members.append(member)
-                    elif tag_name in ['CalculationPoint', 'NcaCustomCalculationPoint']:
-                        # print(f'  Processing {tag_name}')
-                        member = CalculationPoint()
-                        member.from_xml_reader(xml_reader)
-                        if member.is_valid():
-                            self.feature_members.append(member)
-                    else:
-                        # print(f'  Skipping {tag_name}')
-                        xml_reader.skipCurrentElement()
-
-            xml_reader.readNext()
-        if xml_reader.hasError():
-            pass  # TODO?
+                    break
+                self._read_header_element(xml_reader, tag_name)
+                if tag_name == 'AeriusCalculatorMetadata':
+                    break
+        xml_file.close()
+        return self
+
+    def peek_epsg_id(self, fn):
+        '''Returns the EPSG id (as a string, like ReceptorResultTable.epsg_id)
+        of the first srsName in the document, which is that of the first
+        feature member, or None if there is none. Reads only up to there.'''
+        xml_file = XmlFileReader(fn)
+        xml_reader = xml_file.xml_reader
+        epsg_id = None
+        while not xml_reader.atEnd():
+            if xml_reader.readNext() == xml_reader.StartElement:
+                srs_name = xml_reader.attributes().value('srsName')
+                if srs_name != '':
+                    epsg_id = srs_name.split(':')[-1]
+                    break
+        xml_file.close()
+        return epsg_id
+
+    def _read_header_element(self, xml_reader, tag_name):
+        '''Reads a start element outside the feature members (like the
+        FeatureCollectionCalculator or AeriusCalculatorMetadata) if there is a
+        handler for it.'''
+        handler = self.header_element_handlers.get(tag_name)
+        if handler is not None:
+            handler(self, xml_reader)
+
+    def _read_feature_collection(self, xml_reader):
+        self.namespaces = {}
+        for ns_declaration in xml_reader.namespaceDeclarations():
+            self.namespaces[f'xmlns:{ns_declaration.prefix()}'] = ns_declaration.namespaceUri()
+        self.attributes = {}
+        for attrib in xml_reader.attributes():
+            self.attributes[f'{attrib.prefix()}:{attrib.name()}'] = attrib.value()
+
+    def _read_metadata(self, xml_reader):
+        self.metadata = AeriusCalculatorMetadata()
+        self.metadata.from_xml_reader(xml_reader)
+
+    def _read_feature_member(self, xml_reader):
+        '''Reads the element inside a featureMember and returns it as a result
+        member, or None for invalid or unsupported members (which are skipped).'''
+        xml_reader.readNextStartElement()
+        member_class = self.feature_member_classes.get(xml_reader.name())
+        if member_class is None:
+            xml_reader.skipCurrentElement()
+            return None
+
+        member = member_class()
+        member.from_xml_reader(xml_reader)
+        if member.is_valid():
+            return member
+        return None
 
     def get_member_count(self):
         feature_members = {}
@@ -161,3 +323,46 @@ class ImaerDocument():
             else:
                 feature_members[class_name] = 1
         return feature_members
+
+    def has_result_members(self, fn, chunk_size=1024 * 1024):
+        '''Returns True if a file has a ReceptorPoint, SubPoint or
+        CalculationPoint member. A byte scan like count_members() that stops at
+        the first member, so only files without members are read to the end.'''
+        tail = b''
+        with GmlFile(fn) as in_file:
+            while True:
+                chunk = in_file.read(chunk_size)
+                buffer = tail + chunk
+                # Keep the last (possibly incomplete) tag for the next chunk
+                cut = max(buffer.rfind(b'<'), 0) if chunk else len(buffer)
+                for match in _member_count_pattern.finditer(buffer, 0, cut):
+                    if match.group(1) != b'CalculationResult':
+                        return True
+                if not chunk:
+                    return False
+                tail = buffer[cut:]
+
+    def count_members(self, fn, chunk_size=16 * 1024 * 1024):
+        '''Returns the number of result members per type and the total number
+        of CalculationResult elements in a file, using a raw byte scan for the
+        start tags instead of parsing. NcaCustomCalculationPoint members are
+        counted as CalculationPoint, like they are read.'''
+        counter = Counter()
+        tail = b''
+        with GmlFile(fn) as in_file:
+            while True:
+                chunk = in_file.read(chunk_size)
+                if not chunk:
+                    break
+                buffer = tail + chunk
+                # Keep the last (possibly incomplete) tag for the next chunk
+                cut = max(buffer.rfind(b'<'), 0)
+                counter.update(_member_count_pattern.findall(buffer, 0, cut))
+                tail = buffer[cut:]
+        counter.update(_member_count_pattern.findall(tail))
+
+        result = {}
+        for name in ['ReceptorPoint', 'SubPoint', 'CalculationPoint', 'CalculationResult']:
+            result[name] = counter[name.encode()]
+        result['CalculationPoint'] += counter[b'NcaCustomCalculationPoint']
+        return result
@@ -1,7 +1,3 @@
-from PyQt5.QtCore import QXmlStreamReader
-from PyQt5.QtXml import QDomDocument
-
-
 class AeriusCalculatorMetadata():
 
     def __init__(self, project=None, situation=None, calculation=None, version=None, gml_creator=None):
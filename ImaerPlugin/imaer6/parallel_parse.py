@@ -0,0 +1,231 @@
+import os
+import re
+import math
+import sys
+import multiprocessing
+from collections import deque
+from xml.parsers import expat
+from xml.sax.saxutils import quoteattr
+
+from .gml_file import GmlParseError, is_plain_gml_fn
+from .parser_backends import get_parser_backend
+from .result_table import ReceptorResultTable, get_result_table_member_types
+
+_feature_member_start_pattern = re.compile(rb'<(?:[\w.-]+:)?featureMember[\s>]')
+_feature_member_end_pattern = re.compile(rb'</(?:[\w.-]+:)?featureMember\s*>')
+
+# Longest tag that has to be found across window boundaries
+_window_overlap = 256
+
+default_range_size = 64 * 1024 * 1024
+# Files with fewer byte ranges are read sequentially, starting the worker
+# processes costs more than they gain (a 34 MB file took 3.36 s with 2
+# processes and 1.78 s sequentially)
+min_parallel_ranges = 4
+
+
+def get_parse_process_count(fn, process_count=None, range_size=default_range_size):
+    '''Returns the number of worker processes to read a GML file with: 1 (read
+    sequentially) for compressed files, with one CPU and for files smaller
+    than min_parallel_ranges byte ranges, otherwise process_count (None for
+    one per CPU) limited to the number of ranges.'''
+    cpu_count = os.cpu_count() or 1
+    if process_count is None or process_count < 1:
+        process_count = cpu_count
+    if process_count == 1 or cpu_count == 1 or not is_plain_gml_fn(fn):
+        return 1
+    try:
+        range_count = os.path.getsize(fn) / range_size
+    except OSError:
+        return 1
+    if range_count < min_parallel_ranges:
+        return 1
+    return min(process_count, math.ceil(range_count))
+
+
+def find_feature_member_ranges(fn, range_size=default_range_size, window_size=1024 * 1024):
+    '''Returns a list of (start, end) byte ranges of about range_size bytes that
+    together hold all featureMembers of a GML file. Every range starts at a
+    featureMember start tag and ends where the next range starts, the last
+    range ends after the last featureMember end tag. Raises a GmlParseError
+    when the document without its featureMembers is not well-formed, like a
+    truncated file (see _check_document_tail()). The tags are found with a
+    byte scan, so featureMember tags in comments or CDATA are not supported.'''
+    file_size = os.path.getsize(fn)
+    starts = []
+
+    with open(fn, 'rb') as in_file:
+        position = 0
+        while position < file_size:
+            start = _find_first(in_file, _feature_member_start_pattern, position, window_size)
+            if start is None:
+                break
+            starts.append(start)
+            position = start + range_size
+
+        if len(starts) == 0:
+            return []
+        end = _find_last_end(in_file, file_size, starts[-1], window_size)
+        if end == starts[-1]:
+            raise GmlParseError(f'Unexpected end of document after byte {end}')
+        _check_document_tail(in_file, starts[0], end, file_size, window_size)
+
+    ends = starts[1:] + [end]
+    return [(start, end) for start, end in zip(starts, ends) if start < end]
+
+
+def _check_document_tail(in_file, head_end, tail_start, file_size, window_size):
+    '''Raises a GmlParseError when the head of a file (up to the first
+    featureMember) followed by its tail (after the last featureMember) is not
+    a well-formed document. The head leaves the elements around the
+    featureMembers open, the tail has to close them. Anything valid may come in
+    between, like imaer:definitions, comments or processing instructions.'''
+    parser = expat.ParserCreate()
+    try:
+        for position, block_end in ((0, head_end), (tail_start, file_size)):
+            while position < block_end:
+                in_file.seek(position)
+                block = in_file.read(min(block_end - position, window_size))
+                parser.Parse(block, False)
+                position += len(block)
+        parser.Parse(b'', True)
+    except expat.ExpatError as e:
+        raise GmlParseError(f'Unexpected end of document after byte {tail_start}: {e}') from e
+
+
+def _find_first(in_file, pattern, position, window_size):
+    '''Returns the file position of the first match of pattern at or after position.'''
+    while True:
+        in_file.seek(position)
+        window = in_file.read(window_size)
+        if len(window) == 0:
+            return None
+        match = pattern.search(window)
+        if match is not None:
+            return position + match.start()
+        if len(window) < window_size:
+            return None
+        position += window_size - _window_overlap
+
+
+def _find_last_end(in_file, file_size, min_position, window_size):
+    '''Returns the file position just after the last featureMember end tag.'''
+    window_end = file_size
+    while window_end > min_position:
+        window_start = max(min_position, window_end - window_size)
+        in_file.seek(window_start)
+        window = in_file.read(window_end - window_start)
+        matches = list(_feature_member_end_pattern.finditer(window))
+        if len(matches) > 0:
+            return window_start + matches[-1].end()
+        if window_start == min_position:
+            break
+        window_end = window_start + _window_overlap
+    return min_position
+
+
+def get_fragment_start_tag(namespaces):
+    '''Returns the start tag of the element that wraps a byte range, declaring
+    the namespaces of the document (like {'xmlns:imaer': 'http://...'}).'''
+    declarations = []
+    for key, uri in namespaces.items():
+        if key == 'xmlns:':
+            key = 'xmlns'  # default namespace
+        declarations.append(f'{key}={quoteattr(uri)}')
+    return f'<fragment {" ".join(declarations)}>'.encode('utf-8')
+
+
+def read_range_tables(fn, start, end, fragment_start_tag, parser_backend=None, read_hexagons=True, projection=None, spatial_filter=None):
+    '''Reads the featureMembers in a byte range of a GML file into one
+    ReceptorResultTable per member type. Runs in the worker processes.'''
+    with open(fn, 'rb') as in_file:
+        in_file.seek(start)
+        data = fragment_start_tag + in_file.read(end - start) + b'</fragment>'
+
+    backend = get_parser_backend(parser_backend)
+    tables = {}
+    member_types = get_result_table_member_types(projection)
+    for tag_name, source in backend.iter_fragment_members(data):
+        member_type = member_types.get(tag_name)
+        if member_type is None:
+            backend.skip_member(source)
+            continue
+        if member_type not in tables:
+            tables[member_type] = ReceptorResultTable(member_type, projection, spatial_filter)
+        backend.append_member(tables[member_type], source, read_hexagons)
+
+    # Also the empty tables, for their filtered_count
+    return list(tables.values())
+
+
+def get_python_executable():
+    '''Returns the Python interpreter for worker processes. Inside QGIS
+    sys.executable is the QGIS application itself.'''
+    executable = sys.executable
+    if os.path.basename(executable).lower().startswith('python'):
+        return executable
+
+    if sys.platform == 'win32':
+        candidate = os.path.join(sys.exec_prefix, 'pythonw.exe')
+    else:
+        candidate = os.path.join(sys.exec_prefix, 'bin', f'python{sys.version_info.major}.{sys.version_info.minor}')
+    if os.path.isfile(candidate):
+        return candidate
+    return executable
+
+
+def get_process_context():
+    '''Returns a multiprocessing context that starts fresh Python worker
+    processes (forking a running QGIS is not safe).'''
+    context = multiprocessing.get_context('spawn')
+    context.set_executable(get_python_executable())
+    return context
+
+
+def iter_result_tables_parallel(doc, fn, process_count=None, read_hexagons=True, parser_backend=None, range_size=default_range_size, projection=None, spatial_filter=None,
+                                progress_callback=None, progress_wait=0.5):
+    '''Generator that reads the result tables of a GML file with a pool of
+    worker processes. The file is split in byte ranges aligned on featureMember
+    start tags, every range is read into result tables by a worker, and the
+    tables are yielded in document order. At most two ranges per process are
+    read ahead, to limit memory use. doc.bytes_read is set to the end of the
+    range of the last yielded tables.
+
+    While waiting for a range progress_callback is called with (bytes_read,
+    bytes_total) every progress_wait seconds, the workers are stopped when it
+    returns True.'''
+    if process_count is None or process_count < 1:
+        process_count = os.cpu_count() or 1
+
+    doc.peek_header(fn)
+    fragment_start_tag = get_fragment_start_tag(doc.namespaces)
+    backend_name = get_parser_backend(parser_backend).name
+    doc.parser_backend = backend_name
+
+    ranges = iter(find_feature_member_ranges(fn, range_size))
+
+    with get_process_context().Pool(process_count) as pool:
+        pending = deque()
+
+        def submit_next_range():
+            byte_range = next(ranges, None)
+            if byte_range is not None:
+                args = (fn, byte_range[0], byte_range[1], fragment_start_tag, backend_name, read_hexagons, projection, spatial_filter)
+                pending.append((byte_range, pool.apply_async(read_range_tables, args)))
+
+        for _ in range(process_count * 2):
+            submit_next_range()
+
+        while len(pending) > 0:
+            byte_range, async_result = pending.popleft()
+            while progress_callback is not None and not async_result.ready():
+                if progress_callback(doc.bytes_read, doc.bytes_total):
+                    return  # Leaving the with block terminates the pool
+                async_result.wait(progress_wait)
+            tables = async_result.get()
+            submit_next_range()
+            doc.bytes_read = byte_range[1]
+            for table in tables:
+                doc.filtered_count += table.filtered_count
+                if len(table) > 0:
+                    yield table
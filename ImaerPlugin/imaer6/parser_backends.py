@@ -0,0 +1,171 @@
+import io
+from abc import ABC, abstractmethod
+
+from .gml_file import GmlFile, GmlParseError
+from .xml_stream_reader import QXmlStreamReader, XmlFileReader, create_xml_reader
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+
+class ParserBackend(ABC):
+    '''Reads the result members of a GML file for ImaerDocument.iter_result_tables().
+
+    iter_members() sets the document header (namespaces, attributes and
+    metadata) and yields a (tag_name, source) tuple for every featureMember.
+    The document then passes the source to append_member() or skip_member()
+    before the next member is read. iter_fragment_members() does the same for
+    a well-formed fragment of featureMembers, like the byte ranges read by
+    worker processes in parallel_parse. Both raise a GmlParseError when the
+    XML is not well-formed, also after the last member (a truncated file).'''
+
+    name = None
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    @abstractmethod
+    def iter_members(self, doc, fn):
+        pass
+
+    @abstractmethod
+    def iter_fragment_members(self, data):
+        pass
+
+    @abstractmethod
+    def get_position(self):
+        '''Returns the number of bytes read from the file.'''
+        pass
+
+    @abstractmethod
+    def append_member(self, table, source, read_hexagons=True):
+        pass
+
+    def skip_member(self, source):
+        pass
+
+
+class QtParserBackend(ParserBackend):
+    '''Backend using QXmlStreamReader.'''
+
+    name = 'qt'
+    use_qt = True
+
+    def __init__(self):
+        self.xml_file = None
+
+    @classmethod
+    def is_available(cls):
+        return QXmlStreamReader is not None
+
+    def iter_members(self, doc, fn):
+        self.xml_file = XmlFileReader(fn, self.use_qt)
+        try:
+            yield from self._iter_members(self.xml_file.xml_reader, doc)
+        finally:
+            self.xml_file.close()
+
+    def iter_fragment_members(self, data):
+        yield from self._iter_members(create_xml_reader(data, self.use_qt), None)
+
+    def _iter_members(self, xml_reader, doc):
+        while not xml_reader.atEnd():
+            if xml_reader.readNext() == xml_reader.StartElement:
+                tag_name = xml_reader.name()
+
+                if tag_name == 'featureMember':
+                    xml_reader.readNextStartElement()
+                    yield xml_reader.name(), xml_reader
+                elif doc is not None:
+                    doc._read_header_element(xml_reader, tag_name)
+        if xml_reader.hasError():
+            raise GmlParseError(f'{xml_reader.errorString()} (offset {xml_reader.characterOffset()})')
+
+    def get_position(self):
+        return self.xml_file.pos()
+
+    def append_member(self, table, source, read_hexagons=True):
+        return table.append_from_xml_reader(source, read_hexagons)
+
+    def skip_member(self, source):
+        source.skipCurrentElement()
+
+
+class PythonParserBackend(QtParserBackend):
+    '''Backend using the pure Python XmlStreamReader. Always available, but
+    slower than the other backends.'''
+
+    name = 'python'
+    use_qt = False
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+
+class LxmlParserBackend(ParserBackend):
+    '''Backend using lxml.etree.iterparse(), which builds every featureMember
+    element in C. Processed featureMembers are cleared so memory use does not
+    grow with the file. The header is read with ImaerDocument.peek_header().'''
+
+    name = 'lxml'
+
+    def __init__(self):
+        self.file = None
+
+    @classmethod
+    def is_available(cls):
+        return etree is not None
+
+    def iter_members(self, doc, fn):
+        doc.peek_header(fn)
+
+        with GmlFile(fn) as self.file:
+            yield from self._iter_members(self.file)
+
+    def iter_fragment_members(self, data):
+        yield from self._iter_members(io.BytesIO(data))
+
+    def _iter_members(self, in_file):
+        try:
+            for _, element in etree.iterparse(in_file, events=('end',), tag='{*}featureMember'):
+                for member in element:
+                    if isinstance(member.tag, str):
+                        yield etree.QName(member).localname, member
+                        break
+                element.clear(keep_tail=True)
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+        except etree.XMLSyntaxError as e:
+            raise GmlParseError(str(e)) from e
+
+    def get_position(self):
+        return self.file.pos()
+
+    def append_member(self, table, source, read_hexagons=True):
+        return table.append_from_element(source, read_hexagons)
+
+
+parser_backends = {
+    'lxml': LxmlParserBackend,
+    'qt': QtParserBackend,
+    'python': PythonParserBackend
+}
+
+# Fastest first
+_parser_backend_preference = ['lxml', 'qt', 'python']
+
+
+def get_available_parser_backends():
+    return [name for name in _parser_backend_preference if parser_backends[name].is_available()]
+
+
+def get_parser_backend(name=None):
+    '''Returns a new instance of the named parser backend, or of the fastest
+    available backend if name is None or the named backend is not available.'''
+    if name is not None and name in parser_backends and parser_backends[name].is_available():
+        return parser_backends[name]()
+    return parser_backends[get_available_parser_backends()[0]]()
@@ -0,0 +1,59 @@
+'''
+Conversion of the Qt-free imaer6 objects to QGIS objects. This is the only
+imaer6 module that imports qgis.core for reading results, the model classes
+import it where a conversion is needed, so they can be used (and pickled)
+without QGIS.
+'''
+from qgis.core import QgsFeature, QgsPoint, QgsLineString, QgsPolygon
+
+from .geometry import GmlPoint, GmlLineString, GmlPolygon
+from .spatial_filter import SpatialFilter
+
+
+def coords_to_line_string(coords):
+    '''Returns a QgsLineString for a flat [x, y, x, y, ...] coordinate sequence,
+    constructed at once from the x and y lists instead of per vertex.'''
+    return QgsLineString(list(coords[0::2]), list(coords[1::2]))
+
+
+def gml_geometry_to_qgis(geom):
+    '''Returns a QgsPoint, QgsLineString or QgsPolygon for a GmlPoint,
+    GmlLineString or GmlPolygon.'''
+    if isinstance(geom, GmlPoint):
+        return QgsPoint(round(geom.x, 3), round(geom.y, 3))
+    if isinstance(geom, GmlLineString):
+        return coords_to_line_string(geom.coords)
+    if isinstance(geom, GmlPolygon):
+        result = QgsPolygon()
+        result.setExteriorRing(coords_to_line_string(geom.exterior))
+        return result
+    raise TypeError(f'Cannot convert {geom} to a QGIS geometry')
+
+
+def create_feature(geom, attributes, fid=None):
+    '''Returns a QgsFeature with the geometry of a Gml geometry, and the fid
+    followed by the attribute values as attributes.'''
+    feat = QgsFeature()
+    feat.setGeometry(gml_geometry_to_qgis(geom))
+    feat.setAttributes([fid] + attributes)
+    return feat
+
+
+def create_spatial_filter(geometries=None, epsg_id=None, bbox=None):
+    '''Returns a SpatialFilter for QgsGeometry polygons and/or a QgsRectangle,
+    which should already be in the crs of epsg_id.'''
+    polygons = []
+    for geometry in geometries or []:
+        if geometry is None or geometry.isEmpty():
+            continue
+        if geometry.isMultipart():
+            parts = geometry.asMultiPolygon()
+        else:
+            parts = [geometry.asPolygon()]
+        for part in parts:
+            rings = [[coord for point in ring for coord in (point.x(), point.y())] for ring in part]
+            polygons.append([ring for ring in rings if len(ring) >= 6])
+
+    if bbox is not None:
+        bbox = (bbox.xMinimum(), bbox.yMinimum(), bbox.xMaximum(), bbox.yMaximum())
+    return SpatialFilter(bbox, polygons, epsg_id)
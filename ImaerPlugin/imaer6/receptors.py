@@ -1,12 +1,10 @@
-from qgis.core import QgsFeature
-
 from .geometry import GmlPoint, GmlPolygon
 from .identifier import Nen3610Id
-from .gml import get_gml_element
-from ..gpkg.field_factory import field_config
 
 class CalculationResult(object):
 
+    __slots__ = ('result_type', 'substance', 'value')
+
     def __init__(self, result_type=None, substance=None, value=None):
         self.result_type = result_type
         self.substance = substance
@@ -47,37 +45,23 @@ class CalculationResult(object):
 
 
 class Receptor():
+    '''Base class for result members. Subclasses only add the attributes of
+    their own type, and all classes use __slots__ to keep parsed receptors small.
+
+    Child elements are read through element_handlers, a dict from tag name to
+    reader function. Subclasses extend the dict of their base class, and a
+    variant for another IMAER version can be read by passing another dict
+    to from_xml_reader().'''
+
+    __slots__ = ('local_id', 'identifier', 'gm_point', 'epsg_id', 'results')
+    domain = 'XX'
 
     def __init__(self, local_id=None, identifier=None, geom=None, epsg_id=None, results=None):
         self.local_id = local_id
-        self.identifier = identifier
         self.gm_point = geom
         self.epsg_id = epsg_id
-        self.representation = None
-        self.edge_effect = None
-        self.level = None
         self.results = results or []
 
-        # SubPoint attributes
-        self.sub_point_id = None
-        self.level = None
-
-        # CalculationPoint attributes
-        self.label = None
-        self.height = None
-        self.assessment_category = None
-        self.road_local_fraction_no2 = None
-
-        class_name = self.__class__.__name__
-        if class_name == 'ReceptorPoint':
-            self.domain = 'RP'
-        elif class_name == 'SubPoint':
-            self.domain = 'SP'
-        elif class_name in ['CalculationPoint', 'NcaCustomCalculationPoint']:
-            self.domain = 'CP'
-        else:
-            self.domain = 'XX'
-
         if identifier is None:
             self.identifier = Nen3610Id(local_id=f'{self.domain}.{self.local_id}')
         else:
@@ -104,13 +88,15 @@ class Receptor():
             gmp_elem = doc.createElement('imaer:GM_Point')
             # pnt_elem = self.gm_point.to_xml_elem(doc)
             gml_type = 'POINT'
+            from .gml import get_gml_element
             pnt_elem = get_gml_element(self.gm_point, f'{self.domain}.{self.local_id}.{gml_type}', self.epsg_id)
             gmp_elem.appendChild(pnt_elem)
             result.appendChild(gmp_elem)
 
-        if self.representation is not None:
+        representation = getattr(self, 'representation', None)
+        if representation is not None:
             repr_elem = doc.createElement('imaer:representation')
-            poly_elem = self.representation.to_xml_elem(doc)
+            poly_elem = representation.to_xml_elem(doc)
             repr_elem.appendChild(poly_elem)
             result.appendChild(repr_elem)
 
@@ -121,83 +107,60 @@ class Receptor():
 
         return result
 
-    def from_xml_reader(self, xml_reader):
+    def from_xml_reader(self, xml_reader, element_handlers=None):
         start_tag_name = xml_reader.name()
 
         if start_tag_name not in ['ReceptorPoint', 'SubPoint', 'CalculationPoint', 'NcaCustomCalculationPoint']:
             return
 
+        if element_handlers is None:
+            element_handlers = self.element_handlers
+
         attributes = xml_reader.attributes()
         if attributes.hasAttribute('receptorPointId'):
             self.local_id = attributes.value('receptorPointId')
-        if attributes.hasAttribute('subPointId'):
-            self.sub_point_id = attributes.value('subPointId')
-        while not (xml_reader.name() == start_tag_name and xml_reader.isEndElement()):
-            xml_reader.readNextStartElement()
-
-            if xml_reader.name() == 'identifier':
-                xml_reader.readNextStartElement()
-                if xml_reader.name() == 'NEN3610ID':
-                    identifier = Nen3610Id()
-                    identifier.from_xml_reader(xml_reader)
-                    # print(identifier)
-                    if identifier.is_valid():
-                        self.identifier = identifier
-
-            if xml_reader.name() == 'GM_Point':
-                xml_reader.readNextStartElement()
-                if xml_reader.name() == 'Point':
-                    geom = GmlPoint()
-                    geom.from_xml_reader(xml_reader)
-                    # print(geom)
-                    if geom.is_valid():
-                        self.gm_point = geom
-
-            if xml_reader.name() == 'representation':
-                xml_reader.readNextStartElement()
-                if xml_reader.name() == 'Polygon':
-                    geom = GmlPolygon()
-                    geom.from_xml_reader(xml_reader)
-                    # print(geom)
-                    if geom.is_valid():
-                        self.representation = geom
-
-            if xml_reader.name() == 'CalculationResult':
-                result = CalculationResult()
-                result.from_xml_reader(xml_reader)
-                if result.is_valid():
-                    self.results.append(result)
-
-            if xml_reader.name() == 'edgeEffect' and xml_reader.isStartElement():
-                xml_reader.readNext()
-                text = xml_reader.text().strip()
-                if text == 'true':
-                    self.edge_effect = 1
-                else:
-                    self.edge_effect = 0
-
-            if xml_reader.name() == 'level' and xml_reader.isStartElement():
-                xml_reader.readNext()
-                text = xml_reader.text().strip()
-                self.level = int(text)
-
-            if xml_reader.name() == 'label' and xml_reader.isStartElement():
-                xml_reader.readNext()
-                self.label = xml_reader.text()
-
-            if xml_reader.name() == 'height' and xml_reader.isStartElement():
-                xml_reader.readNext()
-                text = xml_reader.text().strip()
-                self.height = float(text)
-
-            if xml_reader.name() == 'assessmentCategory' and xml_reader.isStartElement():
-                xml_reader.readNext()
-                self.assessment_category = xml_reader.text()
-
-            if xml_reader.name() == 'roadLocalFractionNO2' and xml_reader.isStartElement():
-                xml_reader.readNext()
-                text = xml_reader.text().strip()
-                self.road_local_fraction_no2 = float(text)
+        self._read_attributes(attributes)
+
+        while not xml_reader.atEnd():
+            token = xml_reader.readNext()
+            if token == xml_reader.StartElement:
+                handler = element_handlers.get(xml_reader.name())
+                if handler is not None:
+                    handler(self, xml_reader)
+            elif token == xml_reader.EndElement and xml_reader.name() == start_tag_name:
+                break
+
+    def _read_attributes(self, attributes):
+        '''Reads type specific attributes of the start element.'''
+        pass
+
+    def _read_identifier(self, xml_reader):
+        xml_reader.readNextStartElement()
+        if xml_reader.name() == 'NEN3610ID':
+            identifier = Nen3610Id()
+            identifier.from_xml_reader(xml_reader)
+            if identifier.is_valid():
+                self.identifier = identifier
+
+    def _read_gm_point(self, xml_reader):
+        xml_reader.readNextStartElement()
+        if xml_reader.name() == 'Point':
+            geom = GmlPoint()
+            geom.from_xml_reader(xml_reader)
+            if geom.is_valid():
+                self.gm_point = geom
+
+    def _read_calculation_result(self, xml_reader):
+        result = CalculationResult()
+        result.from_xml_reader(xml_reader)
+        if result.is_valid():
+            self.results.append(result)
+
+    element_handlers = {
+        'identifier': _read_identifier,
+        'GM_Point': _read_gm_point,
+        'CalculationResult': _read_calculation_result
+    }
 
     def get_results_dict(self):
         results_dict = {}
@@ -210,12 +173,12 @@ class Receptor():
     def get_attributes_dict(self):
         result = {}
         result['receptor_id'] = self.local_id
-        result['edge_effect'] = self.edge_effect
-        result['sub_point_id'] = self.sub_point_id
-        result['level'] = self.level
-        result['label'] = self.label
-        result['height'] = self.height
-        result['assessment_category'] = self.assessment_category
+        result['edge_effect'] = getattr(self, 'edge_effect', None)
+        result['sub_point_id'] = getattr(self, 'sub_point_id', None)
+        result['level'] = getattr(self, 'level', None)
+        result['label'] = getattr(self, 'label', None)
+        result['height'] = getattr(self, 'height', None)
+        result['assessment_category'] = getattr(self, 'assessment_category', None)
         result['deposition_nh3'] = None
         result['deposition_nox'] = None
         result['deposition_nox_nh3_sum'] = None
@@ -242,8 +205,35 @@ class Receptor():
 
 class ReceptorPoint(Receptor):
 
+    __slots__ = ('representation', 'edge_effect')
+    domain = 'RP'
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.representation = None
+        self.edge_effect = None
+
+    def _read_representation(self, xml_reader):
+        xml_reader.readNextStartElement()
+        if xml_reader.name() == 'Polygon':
+            geom = GmlPolygon()
+            geom.from_xml_reader(xml_reader)
+            if geom.is_valid():
+                self.representation = geom
+
+    def _read_edge_effect(self, xml_reader):
+        xml_reader.readNext()
+        text = xml_reader.text().strip()
+        if text == 'true':
+            self.edge_effect = 1
+        else:
+            self.edge_effect = 0
+
+    element_handlers = dict(
+        Receptor.element_handlers,
+        representation=_read_representation,
+        edgeEffect=_read_edge_effect
+    )
 
     def is_valid(self):
         return self.local_id is not None
@@ -251,15 +241,10 @@ class ReceptorPoint(Receptor):
     def __str__(self):
         return f'ReceptorPoint[{self.local_id}, {len(self.results)}]'
 
-    def to_point_feature(self, fid=None):
-        if not self.is_valid():
-            return
-
-        feat = QgsFeature()
-        feat.setGeometry(self.gm_point.to_qgis_geometry())
-
+    def get_point_attributes(self):
+        '''Returns the attribute values for the receptor_points layer (without
+        fid), or None if the receptor does not have any point result values.'''
         attributes = []
-        attributes.append(fid)
 
         attr_dict = self.get_attributes_dict()
         attributes.append(attr_dict['receptor_id'])
@@ -279,18 +264,23 @@ class ReceptorPoint(Receptor):
         if all(v is None for v in attributes[first_result_attribute:]):
             return None
 
-        feat.setAttributes(attributes)
-        return feat
+        return attributes
 
-    def to_polygon_feature(self, fid=None):
+    def to_point_feature(self, fid=None):
         if not self.is_valid():
             return
 
-        feat = QgsFeature()
-        feat.setGeometry(self.representation.to_qgis_geometry())
+        attributes = self.get_point_attributes()
+        if attributes is None:
+            return None
+
+        from .qgis_adapters import create_feature
+        return create_feature(self.gm_point, attributes, fid)
 
+    def get_polygon_attributes(self):
+        '''Returns the attribute values for the receptor_hexagons layer (without
+        fid), or None if the receptor does not have any deposition values.'''
         attributes = []
-        attributes.append(fid)
 
         attr_dict = self.get_attributes_dict()
         attributes.append(attr_dict['receptor_id'])
@@ -305,8 +295,18 @@ class ReceptorPoint(Receptor):
         if all(v is None for v in attributes[first_result_attribute:]):
             return None
 
-        feat.setAttributes(attributes)
-        return feat
+        return attributes
+
+    def to_polygon_feature(self, fid=None):
+        if not self.is_valid():
+            return
+
+        attributes = self.get_polygon_attributes()
+        if attributes is None:
+            return None
+
+        from .qgis_adapters import create_feature
+        return create_feature(self.representation, attributes, fid)
 
     def to_xml_elem(self, doc):
         result = super().to_xml_elem(doc)
@@ -325,8 +325,24 @@ class ReceptorPoint(Receptor):
 
 class SubPoint(Receptor):
 
+    __slots__ = ('sub_point_id', 'level')
+    domain = 'SP'
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.sub_point_id = None
+        self.level = None
+
+    def _read_attributes(self, attributes):
+        if attributes.hasAttribute('subPointId'):
+            self.sub_point_id = attributes.value('subPointId')
+
+    def _read_level(self, xml_reader):
+        xml_reader.readNext()
+        text = xml_reader.text().strip()
+        self.level = int(text)
+
+    element_handlers = dict(Receptor.element_handlers, level=_read_level)
 
     def is_valid(self):
         return self.local_id is not None and self.sub_point_id is not None
@@ -334,15 +350,10 @@ class SubPoint(Receptor):
     def __str__(self):
         return f'SubPoint[{self.local_id}, {self.sub_point_id}, {self.level}, {len(self.results)}]'
 
-    def to_point_feature(self, fid=None):
-        if not self.is_valid():
-            return
-
-        feat = QgsFeature()
-        feat.setGeometry(self.gm_point.to_qgis_geometry())
-
+    def get_point_attributes(self):
+        '''Returns the attribute values for the sub_points layer (without fid),
+        or None if the sub point does not have any result values.'''
         attributes = []
-        attributes.append(fid)
         attributes.append(self.local_id)
         attributes.append(self.sub_point_id)
         attributes.append(self.level)
@@ -367,8 +378,18 @@ class SubPoint(Receptor):
         if all(v is None for v in attributes[first_result_attribute:]):
             return None
 
-        feat.setAttributes(attributes)
-        return feat
+        return attributes
+
+    def to_point_feature(self, fid=None):
+        if not self.is_valid():
+            return
+
+        attributes = self.get_point_attributes()
+        if attributes is None:
+            return None
+
+        from .qgis_adapters import create_feature
+        return create_feature(self.gm_point, attributes, fid)
 
     def to_xml_elem(self, doc):
         result = super().to_xml_elem(doc)
@@ -383,6 +404,9 @@ class SubPoint(Receptor):
 
 class CalculationPoint(Receptor):
 
+    __slots__ = ('label', 'height', 'assessment_category', 'description', 'road_local_fraction_no2', 'entity_reference')
+    domain = 'CP'
+
     def __init__(self, label=None, height=None, assessment_category=None, description=None, road_local_fraction_no2=None, entity_reference=None, **kwargs):
         super().__init__(**kwargs)
 
@@ -393,6 +417,32 @@ class CalculationPoint(Receptor):
         self.road_local_fraction_no2 = road_local_fraction_no2
         self.entity_reference = entity_reference
 
+    def _read_label(self, xml_reader):
+        xml_reader.readNext()
+        self.label = xml_reader.text()
+
+    def _read_height(self, xml_reader):
+        xml_reader.readNext()
+        text = xml_reader.text().strip()
+        self.height = float(text)
+
+    def _read_assessment_category(self, xml_reader):
+        xml_reader.readNext()
+        self.assessment_category = xml_reader.text()
+
+    def _read_road_local_fraction_no2(self, xml_reader):
+        xml_reader.readNext()
+        text = xml_reader.text().strip()
+        self.road_local_fraction_no2 = float(text)
+
+    element_handlers = dict(
+        Receptor.element_handlers,
+        label=_read_label,
+        height=_read_height,
+        assessmentCategory=_read_assessment_category,
+        roadLocalFractionNO2=_read_road_local_fraction_no2
+    )
+
     def __str__(self):
         class_name = self.__class__.__name__
         return f'{class_name}[{self.identifier}, {self.label}, {self.height}, {self.assessment_category}, {self.road_local_fraction_no2}, {len(self.results)}]'
@@ -441,21 +491,15 @@ class CalculationPoint(Receptor):
 
         return result
 
-    def to_point_feature(self, fid=None):
-        if not self.is_valid():
-            print('invalid')
-            return
-
-        feat = QgsFeature()
-        feat.setGeometry(self.gm_point.to_qgis_geometry())
-
+    def get_point_attributes(self):
+        '''Returns the attribute values for the calculation_points layer (without
+        fid), or None if the calculation point does not have any result values.'''
         if self.identifier is not None:
             local_id = self.identifier.local_id
         else:
             local_id = None
 
         attributes = []
-        attributes.append(fid)
         attributes.append(local_id)
         attributes.append(self.label)
         attributes.append(self.height)
@@ -482,8 +526,19 @@ class CalculationPoint(Receptor):
         if all(v is None for v in attributes[first_result_attribute:]):
             return None
 
-        feat.setAttributes(attributes)
-        return feat
+        return attributes
+
+    def to_point_feature(self, fid=None):
+        if not self.is_valid():
+            print('invalid')
+            return
+
+        attributes = self.get_point_attributes()
+        if attributes is None:
+            return None
+
+        from .qgis_adapters import create_feature
+        return create_feature(self.gm_point, attributes, fid)
 
 class NcaCustomCalculationPoint(CalculationPoint):
-    pass
+    __slots__ = ()
@@ -0,0 +1,447 @@
+import math
+from array import array
+
+from ..gpkg.layer_config import get_layer_field_names
+from ..gpkg.gpkg_geometry import encode_point, encode_polygon
+from .geometry import parse_pos_list
+from .hexagons import create_hexagon_coords, hexagons_match
+
+# Attribute columns per member type. A typecode of None means a plain list (for strings).
+# Missing values are stored as -1 in integer arrays and NaN in float arrays.
+_table_columns = {
+    'ReceptorPoint': [
+        ('receptor_id', 'q'),
+        ('edge_effect', 'b')
+    ],
+    'SubPoint': [
+        ('receptor_id', 'q'),
+        ('sub_point_id', 'q'),
+        ('level', 'q')
+    ],
+    'CalculationPoint': [
+        ('calculation_point_id', None),
+        ('label', None),
+        ('height', 'd'),
+        ('assessment_category', None),
+        ('road_local_fraction_no2', 'd')
+    ]
+}
+
+_missing_values = {'q': -1, 'b': -1, 'd': math.nan, None: None}
+
+# Result table member type per feature member tag name
+result_table_member_types = {
+    'ReceptorPoint': 'ReceptorPoint',
+    'SubPoint': 'SubPoint',
+    'CalculationPoint': 'CalculationPoint',
+    'NcaCustomCalculationPoint': 'CalculationPoint'
+}
+
+member_layer_types = {
+    'ReceptorPoint': ['receptor_points', 'receptor_hexagons'],
+    'SubPoint': ['sub_points'],
+    'CalculationPoint': ['calculation_points']
+}
+
+
+def get_result_table_member_types(projection=None):
+    '''Returns result_table_member_types without the member types of which
+    the projection does not keep any layer type.'''
+    if projection is None:
+        return result_table_member_types
+    return {
+        tag_name: member_type for tag_name, member_type in result_table_member_types.items()
+        if any(projection.keeps_layer_type(layer_type) for layer_type in member_layer_types[member_type])
+    }
+
+
+class _Row():
+    '''Values of the row that is being read by ReceptorResultTable.append_from_xml_reader().'''
+
+    __slots__ = ('values', 'x', 'y', 'hexagon', 'results', 'outside')
+
+    def __init__(self):
+        self.values = {}
+        self.x = None
+        self.y = None
+        self.hexagon = None
+        self.results = {}
+        self.outside = False
+
+
+class ReceptorResultTable():
+    '''Columnar storage of the result members of one type (ReceptorPoint, SubPoint
+    or CalculationPoint). Every row is stored in typed arrays: the attribute
+    columns, x/y, the exterior ring of the hexagon (ReceptorPoint only) and one
+    float array per result column like 'deposition_nh3'.
+
+    With a projection (a ResultProjection) the result values it does not keep
+    are skipped while reading. With a spatial_filter (a SpatialFilter) the
+    members outside it are skipped as soon as their point is read, the number
+    of skipped members is kept in filtered_count.'''
+
+    def __init__(self, member_type, projection=None, spatial_filter=None):
+        self.member_type = member_type
+        self.projection = projection
+        self.spatial_filter = spatial_filter
+        self.filtered_count = 0
+        self.epsg_id = None
+        self.row_count = 0
+        # Result column name (or None to skip) per (resultType, substance)
+        self.result_names = {}
+        self.kept_result_names = None
+        if projection is not None:
+            self.kept_result_names = projection.get_result_names(member_layer_types[member_type])
+
+        self.columns = {}
+        for column_name, typecode in _table_columns[member_type]:
+            self.columns[column_name] = [] if typecode is None else array(typecode)
+        self.xs = array('d')
+        self.ys = array('d')
+        # Flat exterior ring coordinates, row i uses hexagon_coords[hexagon_offsets[i]:hexagon_offsets[i + 1]]
+        self.hexagon_coords = array('d')
+        self.hexagon_offsets = array('q', [0])
+        self.results = {}
+
+    def __len__(self):
+        return self.row_count
+
+    def __str__(self):
+        return f'ReceptorResultTable[{self.member_type}, {self.row_count}, {sorted(self.results)}]'
+
+    def append(self, values, x, y, results, hexagon=None):
+        '''Appends a row. The values dict holds the attribute columns, results
+        holds the result values by column name and hexagon is a flat list of
+        exterior ring coordinates or None.'''
+        for column_name, typecode in _table_columns[self.member_type]:
+            value = values.get(column_name)
+            if value is None:
+                value = _missing_values[typecode]
+            self.columns[column_name].append(value)
+
+        self.xs.append(x)
+        self.ys.append(y)
+
+        if hexagon is not None:
+            self.hexagon_coords.extend(hexagon)
+        self.hexagon_offsets.append(len(self.hexagon_coords))
+
+        for result_name, value in results.items():
+            if result_name not in self.results:
+                self.results[result_name] = array('d', [math.nan]) * self.row_count
+            self.results[result_name].append(value)
+        self.row_count += 1
+        for result_array in self.results.values():
+            if len(result_array) < self.row_count:
+                result_array.append(math.nan)
+
+    def append_from_xml_reader(self, xml_reader, read_hexagons=True):
+        '''Reads a ReceptorPoint, SubPoint, CalculationPoint or NcaCustomCalculationPoint
+        element and appends it as a row, without creating any member objects.
+        With read_hexagons False the representation polygons are skipped.
+        Returns True if a valid row was appended.'''
+        start_tag_name = xml_reader.name()
+        if read_hexagons:
+            element_handlers = self.element_handlers
+        else:
+            element_handlers = self.element_handlers_without_hexagons
+
+        row = _Row()
+        attributes = xml_reader.attributes()
+        if attributes.hasAttribute('receptorPointId'):
+            row.values['receptor_id'] = int(attributes.value('receptorPointId'))
+        if attributes.hasAttribute('subPointId'):
+            row.values['sub_point_id'] = int(attributes.value('subPointId'))
+
+        while not xml_reader.atEnd():
+            token = xml_reader.readNext()
+            if token == xml_reader.StartElement:
+                handler = element_handlers.get(xml_reader.name())
+                if handler is not None:
+                    handler(self, xml_reader, row)
+                    if row.outside:
+                        # Only read on to the end of the member
+                        element_handlers = {}
+            elif token == xml_reader.EndElement and xml_reader.name() == start_tag_name:
+                break
+        if xml_reader.hasError():
+            return False
+
+        if row.outside:
+            self.filtered_count += 1
+            return False
+        if row.x is None:
+            return False
+        if self.member_type in ['ReceptorPoint', 'SubPoint'] and 'receptor_id' not in row.values:
+            return False
+        if self.member_type == 'SubPoint' and 'sub_point_id' not in row.values:
+            return False
+
+        self.append(row.values, row.x, row.y, row.results, row.hexagon)
+        return True
+
+    def get_result_name(self, result_type, substance):
+        '''Returns the result column name for a CalculationResult, or None if
+        it is not needed for any layer kept by the projection.'''
+        key = (result_type, substance)
+        if key not in self.result_names:
+            result_name = f'{result_type.lower()}_{substance.lower()}'
+            if self.kept_result_names is None or result_name in self.kept_result_names:
+                self.result_names[key] = result_name
+            else:
+                self.result_names[key] = None
+        return self.result_names[key]
+
+    def _read_calculation_result(self, xml_reader, row):
+        attributes = xml_reader.attributes()
+        result_name = self.get_result_name(attributes.value('resultType'), attributes.value('substance'))
+        if result_name is None:
+            xml_reader.skipCurrentElement()
+            return
+        xml_reader.readNextStartElement()
+        if xml_reader.name() == 'value':
+            row.results[result_name] = float(xml_reader.readElementText())
+
+    def _read_point(self, xml_reader, row):
+        if self.epsg_id is None:
+            srs_name = xml_reader.attributes().value('srsName')
+            if srs_name != '':
+                self.epsg_id = srs_name.split(':')[-1]
+
+    def _read_pos(self, xml_reader, row):
+        parts = xml_reader.readElementText().split()
+        row.x = float(parts[0])
+        row.y = float(parts[1])
+        if self.spatial_filter is not None and not self.spatial_filter.contains(row.x, row.y):
+            row.outside = True
+
+    def _read_pos_list(self, xml_reader, row):
+        row.hexagon = parse_pos_list(xml_reader.readElementText())
+
+    def _skip_element(self, xml_reader, row):
+        xml_reader.skipCurrentElement()
+
+    def _read_local_id(self, xml_reader, row):
+        row.values['calculation_point_id'] = xml_reader.readElementText()
+
+    def _read_edge_effect(self, xml_reader, row):
+        row.values['edge_effect'] = 1 if xml_reader.readElementText().strip() == 'true' else 0
+
+    def _read_level(self, xml_reader, row):
+        row.values['level'] = int(xml_reader.readElementText().strip())
+
+    def _read_label(self, xml_reader, row):
+        row.values['label'] = xml_reader.readElementText()
+
+    def _read_height(self, xml_reader, row):
+        row.values['height'] = float(xml_reader.readElementText().strip())
+
+    def _read_assessment_category(self, xml_reader, row):
+        row.values['assessment_category'] = xml_reader.readElementText()
+
+    def _read_road_local_fraction_no2(self, xml_reader, row):
+        row.values['road_local_fraction_no2'] = float(xml_reader.readElementText().strip())
+
+    element_handlers = {
+        'CalculationResult': _read_calculation_result,
+        'Point': _read_point,
+        'pos': _read_pos,
+        'posList': _read_pos_list,
+        'localId': _read_local_id,
+        'edgeEffect': _read_edge_effect,
+        'level': _read_level,
+        'label': _read_label,
+        'height': _read_height,
+        'assessmentCategory': _read_assessment_category,
+        'roadLocalFractionNO2': _read_road_local_fraction_no2
+    }
+    element_handlers_without_hexagons = dict(element_handlers, representation=_skip_element)
+
+    def append_from_element(self, element, read_hexagons=True):
+        '''Like append_from_xml_reader(), but reads the member from an
+        ElementTree/lxml element.'''
+        if read_hexagons:
+            element_handlers = self.element_tree_handlers
+        else:
+            element_handlers = self.element_tree_handlers_without_hexagons
+
+        row = _Row()
+        attributes = element.attrib
+        if 'receptorPointId' in attributes:
+            row.values['receptor_id'] = int(attributes['receptorPointId'])
+        if 'subPointId' in attributes:
+            row.values['sub_point_id'] = int(attributes['subPointId'])
+
+        for child in element.iter():
+            tag = child.tag
+            if not isinstance(tag, str):
+                continue  # comments and processing instructions
+            handler = element_handlers.get(tag[tag.rfind('}') + 1:])
+            if handler is not None:
+                handler(self, child, row)
+                if row.outside:
+                    self.filtered_count += 1
+                    return False
+
+        if row.x is None:
+            return False
+        if self.member_type in ['ReceptorPoint', 'SubPoint'] and 'receptor_id' not in row.values:
+            return False
+        if self.member_type == 'SubPoint' and 'sub_point_id' not in row.values:
+            return False
+
+        self.append(row.values, row.x, row.y, row.results, row.hexagon)
+        return True
+
+    def _read_calculation_result_element(self, element, row):
+        attributes = element.attrib
+        result_name = self.get_result_name(attributes.get('resultType', ''), attributes.get('substance', ''))
+        if result_name is None:
+            return
+        for child in element:
+            if isinstance(child.tag, str):
+                if child.tag[child.tag.rfind('}') + 1:] == 'value':
+                    row.results[result_name] = float(child.text or '')
+                break
+
+    def _read_point_element(self, element, row):
+        if self.epsg_id is None:
+            srs_name = element.get('srsName', '')
+            if srs_name != '':
+                self.epsg_id = srs_name.split(':')[-1]
+
+    def _read_pos_element(self, element, row):
+        parts = (element.text or '').split()
+        row.x = float(parts[0])
+        row.y = float(parts[1])
+        if self.spatial_filter is not None and not self.spatial_filter.contains(row.x, row.y):
+            row.outside = True
+
+    def _read_pos_list_element(self, element, row):
+        row.hexagon = parse_pos_list(element.text or '')
+
+    def _read_local_id_element(self, element, row):
+        row.values['calculation_point_id'] = element.text or ''
+
+    def _read_edge_effect_element(self, element, row):
+        row.values['edge_effect'] = 1 if (element.text or '').strip() == 'true' else 0
+
+    def _read_level_element(self, element, row):
+        row.values['level'] = int((element.text or '').strip())
+
+    def _read_label_element(self, element, row):
+        row.values['label'] = element.text or ''
+
+    def _read_height_element(self, element, row):
+        row.values['height'] = float((element.text or '').strip())
+
+    def _read_assessment_category_element(self, element, row):
+        row.values['assessment_category'] = element.text or ''
+
+    def _read_road_local_fraction_no2_element(self, element, row):
+        row.values['road_local_fraction_no2'] = float((element.text or '').strip())
+
+    element_tree_handlers = {
+        'CalculationResult': _read_calculation_result_element,
+        'Point': _read_point_element,
+        'pos': _read_pos_element,
+        'posList': _read_pos_list_element,
+        'localId': _read_local_id_element,
+        'edgeEffect': _read_edge_effect_element,
+        'level': _read_level_element,
+        'label': _read_label_element,
+        'height': _read_height_element,
+        'assessmentCategory': _read_assessment_category_element,
+        'roadLocalFractionNO2': _read_road_local_fraction_no2_element
+    }
+    # A posList is only found in the representation of a receptor
+    element_tree_handlers_without_hexagons = {name: handler for name, handler in element_tree_handlers.items() if name != 'posList'}
+
+    def synthesize_hexagons(self, zoom_level=1):
+        '''Replaces the hexagons of all rows with hexagons generated from the
+        receptor points for the zoom level.'''
+        self.hexagon_coords, self.hexagon_offsets = create_hexagon_coords(self.xs, self.ys, zoom_level)
+
+    def compare_hexagons(self, zoom_level=1, tolerance=0.01):
+        '''Compares the parsed hexagons with synthesized ones and returns the
+        number of compared rows and the row indexes that do not match.'''
+        coords, offsets = create_hexagon_coords(self.xs, self.ys, zoom_level)
+        checked = 0
+        mismatches = []
+        for i in range(self.row_count):
+            start = self.hexagon_offsets[i]
+            end = self.hexagon_offsets[i + 1]
+            if end == start:
+                continue
+            checked += 1
+            if not hexagons_match(self.hexagon_coords[start:end], coords[offsets[i]:offsets[i + 1]], tolerance):
+                mismatches.append(i)
+        return checked, mismatches
+
+    def get_column_values(self, column_name):
+        '''Returns a list with the values of an attribute or result column, with
+        None for missing values. The deposition_nox_nh3_sum is calculated from
+        the NOx and NH3 depositions.'''
+        if column_name in self.columns:
+            column = self.columns[column_name]
+            if isinstance(column, list):
+                return list(column)
+            if column.typecode == 'd':
+                return [None if math.isnan(v) else v for v in column]
+            return [None if v == -1 else v for v in column]
+
+        if column_name in self.results:
+            return [None if math.isnan(v) else v for v in self.results[column_name]]
+
+        if column_name == 'deposition_nox_nh3_sum':
+            nox = self.results.get('deposition_nox')
+            nh3 = self.results.get('deposition_nh3')
+            if nox is None and nh3 is None:
+                return [None] * self.row_count
+            if nox is None:
+                return self.get_column_values('deposition_nh3')
+            if nh3 is None:
+                return self.get_column_values('deposition_nox')
+            result = []
+            for v_nox, v_nh3 in zip(nox, nh3):
+                if math.isnan(v_nox) and math.isnan(v_nh3):
+                    result.append(None)
+                else:
+                    result.append((0 if math.isnan(v_nox) else v_nox) + (0 if math.isnan(v_nh3) else v_nh3))
+            return result
+
+        return [None] * self.row_count
+
+    def get_geometry_blobs(self, layer_type, srs_id):
+        '''Returns a list with a GPKG geometry blob (or None) for every row.'''
+        if layer_type == 'receptor_hexagons':
+            result = []
+            offsets = self.hexagon_offsets
+            for i in range(self.row_count):
+                start = offsets[i]
+                end = offsets[i + 1]
+                if end == start:
+                    result.append(None)
+                else:
+                    result.append(encode_polygon(self.hexagon_coords[start:end], srs_id))
+            return result
+        return [encode_point(round(x, 3), round(y, 3), srs_id) for x, y in zip(self.xs, self.ys)]
+
+    def iter_gpkg_rows(self, layer_type, srs_id):
+        '''Yields rows for ImaerGpkg.bulk_insert(): a geometry blob followed by
+        the values for all layer fields (kept by the projection). Rows without
+        a geometry or without any result value for the layer type are skipped.'''
+        column_names = get_layer_field_names(layer_type, projection=self.projection)
+        value_field_count = len(get_layer_field_names(layer_type, value_fields_only=True, projection=self.projection))
+        first_value_index = len(column_names) - value_field_count + 1
+
+        column_values = [self.get_geometry_blobs(layer_type, srs_id)]
+        for column_name in column_names:
+            column_values.append(self.get_column_values(column_name))
+
+        for row in zip(*column_values):
+            if row[0] is None:
+                continue
+            if all(v is None for v in row[first_value_index:]):
+                continue
+            yield row
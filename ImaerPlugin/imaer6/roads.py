@@ -1,6 +1,5 @@
-from PyQt5.QtXml import QDomDocument
-
 from .emission_source import EmissionSourceType
+from .xml_dom import create_dom_document
 
 
 class RoadEmissionSource(EmissionSourceType):
@@ -11,7 +10,7 @@ class RoadEmissionSource(EmissionSourceType):
         self.vehicles = vehicles or []
         self.traffic_direction = traffic_direction
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = super().to_xml_elem(doc)
 
         for veh in self.vehicles:
@@ -34,7 +33,7 @@ class Vehicle(object):
         self.vehicles_per_time_unit = vehicles_per_time_unit
         self.time_unit = time_unit
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
 
         class_name = self.__class__.__name__
         result = doc.createElement(f'imaer:{class_name}')
@@ -59,7 +58,7 @@ class StandardVehicle(Vehicle):
         self.maximum_speed = maximum_speed
         self.strict_enforcement = strict_enforcement
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = super().to_xml_elem(doc)
         result.setAttribute('vehicleType', self.vehicle_type)
 
@@ -87,7 +86,7 @@ class CustomVehicle(Vehicle):
         self.description = description
         self.emissions = emissions or []
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = super().to_xml_elem(doc)
 
         elem = doc.createElement('imaer:description')
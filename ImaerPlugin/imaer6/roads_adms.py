@@ -1,6 +1,5 @@
-from PyQt5.QtXml import QDomDocument
-
 from .roads import RoadEmissionSource
+from .xml_dom import create_dom_document
 
 
 class ADMSRoad(RoadEmissionSource):
@@ -19,7 +18,7 @@ class ADMSRoad(RoadEmissionSource):
         self.hourly_variation = hourly_variation
         self.monthly_variation = monthly_variation
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = super().to_xml_elem(doc)
 
         if self.width is not None:
@@ -82,7 +81,7 @@ class AdmsRoadSideBarrier(object):
         self.Minheight = Minheight
         self.porosity = porosity
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = doc.createElement('imaer:ADMSRoadSideBarrier')
 
         elem = doc.createElement('imaer:barrierType')
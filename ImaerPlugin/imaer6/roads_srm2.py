@@ -1,6 +1,5 @@
-from PyQt5.QtXml import QDomDocument
-
 from .roads import RoadEmissionSource
+from .xml_dom import create_dom_document
 
 
 class SRM2Road(RoadEmissionSource):
@@ -13,7 +12,7 @@ class SRM2Road(RoadEmissionSource):
         self.barrier_left = None
         self.barrier_right = None
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = super().to_xml_elem(doc)
 
         if self.tunnel_factor is not None:
@@ -53,7 +52,7 @@ class Srm2RoadSideBarrier(object):
         self.height = height
         self.distance = distance
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = doc.createElement('imaer:RoadSideBarrier')
 
         elem = doc.createElement('imaer:barrierType')
@@ -0,0 +1,103 @@
+import hashlib
+
+
+class PreparedPolygon():
+    '''Polygon (with holes) prepared for many point-in-polygon tests. The
+    edges are indexed in horizontal bands, so a test only crosses the edges of
+    the band of the point instead of all edges. Rings are flat coordinate
+    lists [x0, y0, x1, y1, ...].'''
+
+    def __init__(self, rings, band_count=None):
+        xs = [x for ring in rings for x in ring[0::2]]
+        ys = [y for ring in rings for y in ring[1::2]]
+        self.bbox = (min(xs), min(ys), max(xs), max(ys))
+
+        edges = []
+        for ring in rings:
+            # Also the closing edge, for rings of which the last point is not the first
+            ring = list(ring) + list(ring[:2])
+            for i in range(0, len(ring) - 2, 2):
+                x1, y1, x2, y2 = ring[i:i + 4]
+                # Horizontal edges never cross a horizontal ray
+                if y1 != y2:
+                    edges.append((x1, y1, x2, y2))
+
+        if band_count is None:
+            band_count = max(1, len(edges) // 4)
+        self.band_count = band_count
+        self.band_height = (self.bbox[3] - self.bbox[1]) / band_count or 1.0
+        self.bands = [[] for _ in range(band_count)]
+        for edge in edges:
+            first_band = self._get_band(min(edge[1], edge[3]))
+            last_band = self._get_band(max(edge[1], edge[3]))
+            for band in range(first_band, last_band + 1):
+                self.bands[band].append(edge)
+
+    def _get_band(self, y):
+        return min(self.band_count - 1, max(0, int((y - self.bbox[1]) / self.band_height)))
+
+    def contains(self, x, y):
+        xmin, ymin, xmax, ymax = self.bbox
+        if x < xmin or x > xmax or y < ymin or y > ymax:
+            return False
+        # Even-odd rule, so holes are handled like the other rings
+        inside = False
+        for x1, y1, x2, y2 in self.bands[self._get_band(y)]:
+            if (y1 > y) != (y2 > y):
+                if x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                    inside = not inside
+        return inside
+
+
+class SpatialFilter():
+    '''Selects the receptors to import by their point coordinates: inside a
+    bounding box (xmin, ymin, xmax, ymax) and, if polygons are given, inside
+    one of the polygons. Every polygon is a list of flat coordinate rings (the
+    exterior and the holes). Coordinates are in the crs of epsg_id, which must
+    be the crs of the result GML.
+
+    Kept free of Qt, so it can be passed to worker processes. Use
+    qgis_adapters.create_spatial_filter() to create one from QGIS geometries.'''
+
+    def __init__(self, bbox=None, polygons=None, epsg_id=None):
+        self.epsg_id = None if epsg_id is None else str(epsg_id)
+        self.polygons = [PreparedPolygon(rings) for rings in polygons or [] if len(rings) > 0]
+        self.fingerprint = self._create_fingerprint(bbox, polygons)
+
+        if len(self.polygons) > 0:
+            polygons_bbox = (
+                min(polygon.bbox[0] for polygon in self.polygons),
+                min(polygon.bbox[1] for polygon in self.polygons),
+                max(polygon.bbox[2] for polygon in self.polygons),
+                max(polygon.bbox[3] for polygon in self.polygons)
+            )
+            if bbox is None:
+                bbox = polygons_bbox
+            else:
+                bbox = (
+                    max(bbox[0], polygons_bbox[0]),
+                    max(bbox[1], polygons_bbox[1]),
+                    min(bbox[2], polygons_bbox[2]),
+                    min(bbox[3], polygons_bbox[3])
+                )
+        self.bbox = None if bbox is None else tuple(float(v) for v in bbox)
+
+    def __str__(self):
+        return f'SpatialFilter[{self.bbox}, {len(self.polygons)} polygons, EPSG:{self.epsg_id}]'
+
+    def _create_fingerprint(self, bbox, polygons):
+        content_hash = hashlib.blake2b(repr((bbox, polygons, self.epsg_id)).encode(), digest_size=16)
+        return content_hash.hexdigest()
+
+    def contains(self, x, y):
+        '''Cheap bounding box test first, then point-in-polygon.'''
+        if self.bbox is not None:
+            xmin, ymin, xmax, ymax = self.bbox
+            if x < xmin or x > xmax or y < ymin or y > ymax:
+                return False
+        if len(self.polygons) == 0:
+            return True
+        for polygon in self.polygons:
+            if polygon.contains(x, y):
+                return True
+        return False
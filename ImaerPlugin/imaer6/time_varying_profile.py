@@ -1,4 +1,4 @@
-from PyQt5.QtXml import QDomDocument
+from .xml_dom import create_dom_document
 
 
 class TimeVaryingProfile(object):
@@ -13,7 +13,7 @@ class StandardTimeVaryingProfile(TimeVaryingProfile):
         super().__init__(**kwargs)
         self.standard_type = standard_type
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = doc.createElement('imaer:StandardTimeVaryingProfile')
 
         st = doc.createElement('imaer:standardType')
@@ -28,7 +28,7 @@ class ReferenceTimeVaryingProfile(TimeVaryingProfile):
         super().__init__(**kwargs)
         self.local_id = local_id
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = doc.createElement('imaer:ReferenceTimeVaryingProfile')
 
         dv = doc.createElement('imaer:customTimeVaryingProfile')
@@ -52,7 +52,7 @@ class CustomTimeVaryingProfile(TimeVaryingProfile):
             'MONTHLY': {'cols': 1, 'rows': 12},
         }
 
-    def to_xml_elem(self, doc=QDomDocument()):
+    def to_xml_elem(self, doc=create_dom_document()):
         result = doc.createElement('imaer:customTimeVaryingProfile')
         dv = doc.createElement('imaer:CustomTimeVaryingProfile')
         dv.setAttribute('gml:id', f'TimeVaryingProfile.{self.local_id}')
@@ -0,0 +1,27 @@
+from xml.dom import minidom
+
+try:
+    from PyQt5.QtXml import QDomDocument
+except ImportError:
+    QDomDocument = None
+
+
+def create_dom_document():
+    '''Returns a new QDomDocument, or a xml.dom.minidom Document when Qt is not
+    available. The to_xml_elem() methods only use the DOM functions both have.'''
+    if QDomDocument is not None:
+        return QDomDocument()
+    return minidom.Document()
+
+
+def add_xml_declaration(doc):
+    if QDomDocument is not None and isinstance(doc, QDomDocument):
+        inst = doc.createProcessingInstruction('xml', 'version="1.0" encoding="utf-8" standalone="yes"')
+        doc.appendChild(inst)
+    # minidom writes the declaration itself
+
+
+def dom_to_string(doc, indent=4):
+    if QDomDocument is not None and isinstance(doc, QDomDocument):
+        return doc.toString(indent)
+    return doc.toprettyxml(indent=' ' * indent, encoding='utf-8', standalone=True).decode('utf-8')
@@ -0,0 +1,274 @@
+from collections import deque
+from xml.parsers import expat
+
+from .gml_file import GmlFile, is_plain_gml_fn
+
+try:
+    from PyQt5.QtCore import QXmlStreamReader, QFile, QByteArray
+except ImportError:
+    QXmlStreamReader = None
+
+
+class XmlStreamAttribute():
+
+    __slots__ = ('qualified_name', '_value')
+
+    def __init__(self, qualified_name, value):
+        self.qualified_name = qualified_name
+        self._value = value
+
+    def prefix(self):
+        prefix, _, _ = self.qualified_name.rpartition(':')
+        return prefix
+
+    def name(self):
+        return self.qualified_name.rpartition(':')[2]
+
+    def qualifiedName(self):
+        return self.qualified_name
+
+    def value(self):
+        return self._value
+
+
+class XmlStreamAttributes(list):
+
+    def _find(self, name):
+        for attribute in self:
+            if attribute.qualified_name == name:
+                return attribute
+        return None
+
+    def hasAttribute(self, name):
+        return self._find(name) is not None
+
+    def value(self, name):
+        attribute = self._find(name)
+        if attribute is None:
+            return ''
+        return attribute._value
+
+
+class XmlStreamNamespaceDeclaration():
+
+    __slots__ = ('_prefix', '_namespace_uri')
+
+    def __init__(self, prefix, namespace_uri):
+        self._prefix = prefix
+        self._namespace_uri = namespace_uri
+
+    def prefix(self):
+        return self._prefix
+
+    def namespaceUri(self):
+        return self._namespace_uri
+
+
+_no_attributes = XmlStreamAttributes()
+
+
+class XmlStreamReader():
+    '''Pure Python implementation of the part of QXmlStreamReader that is used
+    by the imaer6 readers, so they can also run without Qt (in worker processes
+    or tests). Reads from a binary file object or bytes with expat, a block at
+    a time. Element names are local names, attributes are accessed by their
+    qualified names (like 'gml:id').'''
+
+    NoToken = 0
+    Invalid = 1
+    StartDocument = 2
+    EndDocument = 3
+    StartElement = 4
+    EndElement = 5
+    Characters = 6
+    Comment = 7
+    DTD = 8
+    EntityReference = 9
+    ProcessingInstruction = 10
+
+    block_size = 64 * 1024
+
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray)):
+            self.data = bytes(source)
+            self.in_file = None
+        else:
+            self.data = None
+            self.in_file = source
+
+        self.parser = expat.ParserCreate()
+        self.parser.buffer_text = True
+        self.parser.StartElementHandler = self._start_element
+        self.parser.EndElementHandler = self._end_element
+        self.parser.CharacterDataHandler = self._characters
+        self.parser.CommentHandler = self._comment
+        self.parser.ProcessingInstructionHandler = self._processing_instruction
+
+        self.tokens = deque([(self.StartDocument, '', _no_attributes, None, '')])
+        self.token = (self.NoToken, '', _no_attributes, None, '')
+        self.fed_all = False
+        self.at_end = False
+        self.error_string = ''
+        self.bytes_fed = 0
+
+    # expat handlers, every token is (type, name, attributes, namespace declarations, text)
+
+    def _start_element(self, qualified_name, attrs):
+        attributes = XmlStreamAttributes()
+        namespace_declarations = []
+        for key, value in attrs.items():
+            if key == 'xmlns':
+                namespace_declarations.append(XmlStreamNamespaceDeclaration('', value))
+            elif key.startswith('xmlns:'):
+                namespace_declarations.append(XmlStreamNamespaceDeclaration(key[6:], value))
+            else:
+                attributes.append(XmlStreamAttribute(key, value))
+        name = qualified_name.rpartition(':')[2]
+        self.tokens.append((self.StartElement, name, attributes, namespace_declarations, ''))
+
+    def _end_element(self, qualified_name):
+        self.tokens.append((self.EndElement, qualified_name.rpartition(':')[2], _no_attributes, None, ''))
+
+    def _characters(self, text):
+        if len(self.tokens) > 0 and self.tokens[-1][0] == self.Characters:
+            token = self.tokens[-1]
+            self.tokens[-1] = (self.Characters, '', _no_attributes, None, token[4] + text)
+        else:
+            self.tokens.append((self.Characters, '', _no_attributes, None, text))
+
+    def _comment(self, text):
+        self.tokens.append((self.Comment, '', _no_attributes, None, text))
+
+    def _processing_instruction(self, target, data):
+        self.tokens.append((self.ProcessingInstruction, '', _no_attributes, None, data))
+
+    def _feed(self):
+        if self.data is not None:
+            block = self.data
+            self.data = b''
+        else:
+            block = self.in_file.read(self.block_size)
+        self.bytes_fed += len(block)
+        try:
+            if len(block) == 0:
+                self.parser.Parse(b'', True)
+                self.fed_all = True
+                self.tokens.append((self.EndDocument, '', _no_attributes, None, ''))
+            else:
+                self.parser.Parse(block, False)
+        except expat.ExpatError as e:
+            self.error_string = str(e)
+            self.fed_all = True
+            self.tokens.clear()
+            self.tokens.append((self.Invalid, '', _no_attributes, None, ''))
+
+    def readNext(self):
+        if self.at_end:
+            return self.token[0]
+        # Keep one token queued, so character data split over blocks is complete
+        while len(self.tokens) < 2 and not self.fed_all:
+            self._feed()
+        self.token = self.tokens.popleft()
+        if self.token[0] in (self.EndDocument, self.Invalid):
+            self.at_end = True
+        return self.token[0]
+
+    def atEnd(self):
+        return self.at_end
+
+    def hasError(self):
+        return self.token[0] == self.Invalid
+
+    def errorString(self):
+        return self.error_string
+
+    def tokenType(self):
+        return self.token[0]
+
+    def isStartElement(self):
+        return self.token[0] == self.StartElement
+
+    def isEndElement(self):
+        return self.token[0] == self.EndElement
+
+    def isCharacters(self):
+        return self.token[0] == self.Characters
+
+    def name(self):
+        return self.token[1]
+
+    def attributes(self):
+        return self.token[2]
+
+    def namespaceDeclarations(self):
+        return self.token[3] or []
+
+    def text(self):
+        return self.token[4]
+
+    def characterOffset(self):
+        return self.bytes_fed
+
+    def readNextStartElement(self):
+        while self.readNext() not in (self.EndDocument, self.Invalid):
+            if self.isEndElement():
+                return False
+            if self.isStartElement():
+                return True
+        return False
+
+    def readElementText(self):
+        '''Returns the text of the current element (ignoring child elements)
+        and moves to its end element.'''
+        parts = []
+        depth = 0
+        while self.readNext() not in (self.EndDocument, self.Invalid):
+            token_type = self.token[0]
+            if token_type == self.Characters and depth == 0:
+                parts.append(self.token[4])
+            elif token_type == self.StartElement:
+                depth += 1
+            elif token_type == self.EndElement:
+                if depth == 0:
+                    break
+                depth -= 1
+        return ''.join(parts)
+
+    def skipCurrentElement(self):
+        depth = 1
+        while self.readNext() not in (self.EndDocument, self.Invalid):
+            if self.isStartElement():
+                depth += 1
+            elif self.isEndElement():
+                depth -= 1
+                if depth == 0:
+                    return
+
+
+class XmlFileReader():
+    '''Opens a file for reading with QXmlStreamReader, or with XmlStreamReader
+    when Qt is not available (or use_qt is False). Compressed files (.gml.gz
+    and zip:// members, see GmlFile) are always read with XmlStreamReader.
+    pos() returns the number of bytes read from the file.'''
+
+    def __init__(self, fn, use_qt=True):
+        if use_qt and QXmlStreamReader is not None and is_plain_gml_fn(fn):
+            self.file = QFile(fn)
+            self.file.open(QFile.ReadOnly | QFile.Text)
+            self.xml_reader = QXmlStreamReader(self.file)
+        else:
+            self.file = GmlFile(fn)
+            self.xml_reader = XmlStreamReader(self.file)
+
+    def pos(self):
+        return self.file.pos()
+
+    def close(self):
+        self.file.close()
+
+
+def create_xml_reader(data, use_qt=True):
+    '''Returns a QXmlStreamReader (or XmlStreamReader without Qt) for bytes.'''
+    if use_qt and QXmlStreamReader is not None:
+        return QXmlStreamReader(QByteArray(data))
+    return XmlStreamReader(data)
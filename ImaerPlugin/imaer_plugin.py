@@ -29,11 +29,17 @@ from qgis.core import (
     QgsApplication,
     QgsExpressionContextUtils,
     QgsCoordinateTransform,
+    QgsCoordinateReferenceSystem,
+    QgsFeatureRequest,
+    QgsRectangle,
+    QgsWkbTypes,
     QgsSettings,
-    QgsCsException)
+    QgsCsException,
+    QgsMapLayer,
+    QgsVirtualLayerDefinition)
 from qgis.gui import QgsMapLayerComboBox
 
-from ImaerPlugin.tasks import ImportImaerCalculatorResultTask
+from ImaerPlugin.tasks import ImportScheduler, MaterializeReceptorLayerTask
 from ImaerPlugin.algs.provider import ImaerProvider
 from ImaerPlugin.generate_calc_input import GenerateCalcInputDialog
 from ImaerPlugin.configuration import ConfigurationDialog
@@ -47,7 +53,16 @@ from ImaerPlugin.connect import (
 )
 
 from ImaerPlugin.imaer6 import ImaerDocument
-from ImaerPlugin.gpkg import ImaerGpkg
+from ImaerPlugin.imaer6.gml_file import get_gml_stem, list_zip_gml_members
+from ImaerPlugin.imaer6.qgis_adapters import create_spatial_filter
+from ImaerPlugin.gpkg import ImaerGpkg, get_gpkg_metadata, read_gpkg_situations, read_values_table_range, read_table_column_names
+from ImaerPlugin.gpkg.layer_config import (
+    catalog_layer_types,
+    get_values_table_name,
+    get_catalog_join_query,
+    layer_type_config,
+    ResultProjection
+)
 from ImaerPlugin.styles import StyleFactory
 from ImaerPlugin.gpkg import ImaerGpkgFieldFactory
 from ImaerPlugin.config import ui_settings
@@ -66,8 +81,10 @@ class ImaerPlugin:
         self.plugin_dir = os.path.dirname(__file__)
         self.download_dir = QStandardPaths.writableLocation(QStandardPaths.DownloadLocation)
         self.task_manager = QgsApplication.taskManager()
+        self.import_schedulers = []
         self.provider = None
         self.imaer_calc_layers = {}
+        self.materialize_tasks = {}
         self.settings = QgsSettings()
         self.version = '3.6.3'
         self.imaer_doc = ImaerDocument()
@@ -159,6 +176,11 @@ class ImaerPlugin:
             self.toolbar.addAction(action)
             self.actions[action_config['name']] = action
 
+        # Layer tree context menu action for receptor layers joined to the receptor catalog
+        self.materialize_action = QAction('Store Receptor Geometries in GeoPackage', self.iface.mainWindow())
+        self.materialize_action.triggered.connect(self.run_materialize_receptor_layer)
+        self.iface.addCustomActionForLayerType(self.materialize_action, '', QgsMapLayer.VectorLayer, False)
+
         # Widget update logic
         self.update_all_widgets()
         self.initProcessing()
@@ -183,6 +205,10 @@ class ImaerPlugin:
             del action
             self.actions.pop(name)
 
+        self.iface.removeCustomActionForLayerType(self.materialize_action)
+        self.materialize_action.triggered.disconnect(self.run_materialize_receptor_layer)
+        del self.materialize_action
+
         del self.toolbar
 
         # TODO (?) Delete all plugin dialogs?
@@ -200,7 +226,7 @@ class ImaerPlugin:
 
     def run_import_calc_result(self, checked=False, gml_fns=None):
         if gml_fns is None:
-            gml_fns, _ = self.calc_result_file_dialog.getOpenFileNames(caption="Open Calculator result GML file", filter='*.gml', parent=self.iface.mainWindow())
+            gml_fns, _ = self.calc_result_file_dialog.getOpenFileNames(caption="Open Calculator result GML file", filter='*.gml *.gml.gz *.zip', parent=self.iface.mainWindow())
             self.log(f'gml_fns: {gml_fns}')
             # print(gml_fns)
         
@@ -208,39 +234,194 @@ class ImaerPlugin:
             # print('no files selected')
             return
 
+        try:
+            options = self.get_import_options()
+        except ValueError as e:
+            self.log(f'{e} Nothing imported.', lvl='Critical', bar=True, duration=10)
+            return
+        scheduler = ImportScheduler(
+            self,
+            max_tasks=self.settings.value('imaer_plugin/import_max_tasks', defaultValue=2, type=int),
+            memory_budget=self.settings.value('imaer_plugin/import_memory_budget_mb', defaultValue=2048, type=int) * 1024 * 1024,
+            options=options
+        )
+
+        # In append mode all results go into one GeoPackage, as situations
+        append_gpkg_fn = None
+        if options['append']:
+            append_gpkg_fn = self.settings.value('imaer_plugin/import_append_gpkg')
+            if not os.access(os.path.dirname(append_gpkg_fn) or '.', os.W_OK):
+                self.log(f'Cannot create .gpkg file: {append_gpkg_fn}', lvl='Critical', bar=True, duration=5)
+                return
+
+        # Zip archives are imported per GML member, read straight from the archive
+        member_fns = []
         for gml_fn in gml_fns:
+            if gml_fn is not None and gml_fn.lower().endswith('.zip'):
+                member_fns.extend(list_zip_gml_members(gml_fn))
+            else:
+                member_fns.append(gml_fn)
+
+        for gml_fn in member_fns:
             if gml_fn == '' or gml_fn is None:
-                return
+                self.log('Skipped import of a file without name', lvl='Warning', bar=True, duration=5)
+                continue
 
-            gml_path = os.path.dirname(gml_fn)
+            if append_gpkg_fn is not None:
+                scheduler.add_file(gml_fn, append_gpkg_fn)
+                continue
+
+            gml_stem = get_gml_stem(gml_fn)
+            gml_path = os.path.dirname(gml_stem)
             if not os.access(gml_path, os.W_OK):
-                self.log(f'Cannot create .gpkg file in gml directory: {gml_path}', lvl='Critical', bar=True, duration=5)
-                return
+                self.log(f'Cannot create .gpkg file in gml directory, skipped: {gml_fn}', lvl='Warning', bar=True, duration=5)
+                continue
 
-            gml_stem, _ = os.path.splitext(gml_fn)
             gpkg_fn = f'{gml_stem}.gpkg'
 
             if os.path.exists(gpkg_fn):  # TODO Warn for overwriting?
                 pass
                 # self.log(f'Gpkg file already exists: {gpkg_fn}', lvl='Warning', bar=True, duration=5)
 
-            task = ImportImaerCalculatorResultTask(self, gml_fn, gpkg_fn, self.import_calc_result_callback)
-            task_result = self.task_manager.addTask(task)
-            self.log(f'task result: {task_result}')
-
-    def import_calc_result_callback(self, result, gpkg_fn=None):
-        # self.log(result)
-        if result['status'] == 'ok':
-            self.load_calculation_results_gpkg(gpkg_fn)
-        elif result['status'] == 'error':
-            self.log(result['message'], lvl='Critical', bar=True, duration=10)
-        elif result['status'] == 'warning':
-            self.log(result['message'], lvl='Warning', bar=True, duration=10)
-        else:
-            self.log('Something unexpected went wrong (import_calc_result_callback)')
+            if not scheduler.add_file(gml_fn, gpkg_fn):
+                self.log(f'Another file is imported into {gpkg_fn}, skipped: {gml_fn}', lvl='Warning', bar=True, duration=5)
+
+        if len(scheduler.queue) == 0:
+            return
 
-    def load_calculation_results_gpkg(self, gpkg_fn, layer_names=None, zoom=True, make_groups=True):
-        '''Callback function from the import task after finishing the gpkg'''
+        # Keep a reference until all imports are done
+        self.import_schedulers.append(scheduler)
+        scheduler.start()
+
+    def get_import_options(self):
+        '''Returns the options for importing calculation results. Raises a
+        ValueError for unknown layer types, result types or substances, or when
+        they leave no result fields to import.'''
+        options = {
+            'use_cache': self.settings.value('imaer_plugin/import_use_cache', defaultValue=True, type=bool),
+            'synthesize_hexagons': self.settings.value('imaer_plugin/import_synthesize_hexagons', defaultValue=False, type=bool),
+            'verify_hexagons': self.settings.value('imaer_plugin/import_verify_hexagons', defaultValue=False, type=bool),
+            'hexagon_zoom_level': self.settings.value('imaer_plugin/import_hexagon_zoom_level', defaultValue=1, type=int),
+            'parser_backend': self.settings.value('imaer_plugin/import_parser_backend', defaultValue=None) or None,
+            'parse_processes': self.settings.value('imaer_plugin/import_parse_processes', defaultValue=1, type=int),
+            'layer_types': self.get_list_setting('imaer_plugin/import_layer_types'),
+            'result_types': self.get_list_setting('imaer_plugin/import_result_types'),
+            'substances': self.get_list_setting('imaer_plugin/import_substances'),
+            'spatial_filter': self.get_import_spatial_filter(),
+            'append': self.settings.value('imaer_plugin/import_append_gpkg', defaultValue='') not in [None, ''],
+            'receptor_catalog': self.settings.value('imaer_plugin/import_receptor_catalog', defaultValue='') or None
+        }
+        projection = ResultProjection(options['layer_types'], options['result_types'], options['substances'])
+        if not any(projection.keeps_layer_type(layer_type) for layer_type in layer_type_config):
+            raise ValueError('The selected layer types, result types and substances leave no result fields to import.')
+        return options
+
+    def get_list_setting(self, key):
+        '''Returns a comma separated setting as a list, or None if it is empty.'''
+        value = self.settings.value(key, defaultValue='')
+        if isinstance(value, str):
+            value = value.split(',')
+        result = [item.strip() for item in value if item.strip() != '']
+        if len(result) == 0:
+            return None
+        return result
+
+    def get_import_spatial_filter(self):
+        '''Returns a SpatialFilter for the import from the settings, or None.
+        The filter is the extent in imaer_plugin/import_filter_extent
+        ('xmin,ymin,xmax,ymax' in the plugin crs) and/or the polygons of the
+        layer with the id in the import_filter_layer entry of the project (only
+        the selected ones with imaer_plugin/import_filter_selected_only),
+        transformed to the plugin crs. The layer is set in the configuration
+        dialog. Raises a ValueError when a configured filter cannot be used, so
+        nothing is imported unfiltered by mistake.'''
+        extent = self.get_list_setting('imaer_plugin/import_filter_extent')
+        layer_id, _ = QgsProject.instance().readEntry('imaer_plugin', 'import_filter_layer', '')
+        if extent is None and layer_id in [None, '']:
+            return None
+
+        epsg_id = self.settings.value('imaer_plugin/crs', defaultValue=None)
+        if epsg_id in [None, '']:
+            raise ValueError('Set a crs in the configuration to use a spatial filter for importing.')
+
+        bbox = None
+        if extent is not None:
+            bbox = QgsRectangle(*[float(v) for v in extent])
+
+        geometries = []
+        if layer_id not in [None, '']:
+            layer = QgsProject.instance().mapLayer(layer_id)
+            if not isinstance(layer, QgsVectorLayer) or layer.geometryType() != QgsWkbTypes.PolygonGeometry:
+                raise ValueError(f'The spatial filter layer is not a polygon layer in this project: {layer_id}.')
+            transform = QgsCoordinateTransform(layer.crs(), QgsCoordinateReferenceSystem.fromEpsgId(int(epsg_id)), QgsProject.instance())
+            selected_only = self.settings.value('imaer_plugin/import_filter_selected_only', defaultValue=False, type=bool)
+            if selected_only:
+                features = layer.getSelectedFeatures()
+            else:
+                features = layer.getFeatures(QgsFeatureRequest().setNoAttributes())
+            for feat in features:
+                geometry = feat.geometry()
+                try:
+                    geometry.transform(transform)
+                except QgsCsException as e:
+                    raise ValueError(f'Cannot transform spatial filter layer {layer.name()} to EPSG:{epsg_id}: {e}.')
+                geometries.append(geometry)
+            if len(geometries) == 0:
+                if selected_only:
+                    raise ValueError(f'No polygons selected in spatial filter layer {layer.name()}.')
+                raise ValueError(f'No polygons in spatial filter layer {layer.name()}.')
+
+        return create_spatial_filter(geometries, epsg_id, bbox)
+
+    def load_calculation_results_gpkgs(self, gpkg_fns, situation_ids=None, store_geometries=True):
+        '''Loads the results of several imported gpkg files in one batch, with
+        one redraw and one zoom to the extent of all of them. For append mode
+        imports situation_ids has the situation per gpkg file.
+
+        Receptor layers of imports with a receptor catalog are first stored
+        with their geometries in the gpkg (see store_receptor_geometries()), as
+        a layer joined to the catalog has no spatial index. Unless the
+        imaer_plugin/catalog_join_on_load setting is on, then they are loaded as
+        joined layers.'''
+        if len(gpkg_fns) == 0:
+            return
+        if situation_ids is None:
+            situation_ids = [None] * len(gpkg_fns)
+
+        join_on_load = self.settings.value('imaer_plugin/catalog_join_on_load', defaultValue=False, type=bool)
+        if store_geometries and not join_on_load:
+            pending_layer_types = self.get_pending_receptor_layer_types(gpkg_fns)
+            if len(pending_layer_types) > 0:
+                self.store_receptor_geometries(
+                    pending_layer_types,
+                    lambda: self.load_calculation_results_gpkgs(gpkg_fns, situation_ids, store_geometries=False)
+                )
+                return
+
+        canvas = self.iface.mapCanvas()
+        canvas.freeze(True)
+        total_extent = None
+        try:
+            for gpkg_fn, situation_id in zip(gpkg_fns, situation_ids):
+                extent = self.load_calculation_results_gpkg(gpkg_fn, zoom=False, situation_id=situation_id)
+                if extent is None:
+                    continue
+                if total_extent is None:
+                    total_extent = extent
+                else:
+                    total_extent.combineExtentWith(extent)
+        finally:
+            canvas.freeze(False)
+
+        if total_extent is not None:
+            total_extent.scale(1.2)
+            canvas.setExtent(total_extent)
+        canvas.refresh()
+
+    def load_calculation_results_gpkg(self, gpkg_fn, layer_names=None, zoom=True, make_groups=True, situation_id=None):
+        '''Loads the result layers of an imported gpkg and returns their extent
+        in the canvas crs. With a situation_id (append mode) the layers are
+        filtered on that situation.'''
 
         result_layer_names = ['receptor_hexagons', 'receptor_points', 'sub_points', 'calculation_points']
         if make_groups:
@@ -252,13 +433,16 @@ class ImaerPlugin:
         base = os.path.basename(gpkg_fn)
         stem, ext = os.path.splitext(base)
 
-        imaer_metadata_source = f'{gpkg_fn}|layername=imaer_metadata'
-        imaer_metadata_layer = QgsVectorLayer(imaer_metadata_source, 'md', 'ogr')
+        catalog_fn = get_gpkg_metadata(gpkg_fn).get('receptor_catalog')
 
-        situation_name = ''
-        for feat in imaer_metadata_layer.getFeatures():
-            if feat['key'] == 'situation_name':
-                situation_name = feat['value']
+        subset = ''
+        if situation_id is None:
+            situation_name = get_gpkg_metadata(gpkg_fn).get('situation_name', '')
+        else:
+            situations = {situation['situation_id']: situation for situation in read_gpkg_situations(gpkg_fn)}
+            situation_name = situations.get(situation_id, {}).get('situation_name') or f'situation {situation_id}'
+            stem = f'{stem} - {situation_name}'
+            subset = f'|subset="situation_id" = {situation_id}'
 
         total_extent = None
         loaded_layer_cnt = 0
@@ -268,7 +452,7 @@ class ImaerPlugin:
         canvas_crs = self.iface.mapCanvas().mapSettings().destinationCrs()
 
         for result_layer_name in result_layer_names:
-            layer_data_source = f'{gpkg_fn}|layername={result_layer_name}'
+            layer_data_source = f'{gpkg_fn}|layername={result_layer_name}{subset}'
             if make_groups:
                 if situation_name == '':
                     layer_name = result_layer_name
@@ -276,8 +460,17 @@ class ImaerPlugin:
                     layer_name = f'{situation_name} - {result_layer_name}'.strip()
             else:
                 layer_name = f'{stem} - {result_layer_name}'
-            layer = QgsVectorLayer(layer_data_source, layer_name, 'ogr')
-            if not layer.isValid():
+            values_range = None
+            if catalog_fn is not None and result_layer_name in catalog_layer_types:
+                values_range = read_values_table_range(gpkg_fn, result_layer_name, situation_id)
+            if values_range is None:
+                layer = QgsVectorLayer(layer_data_source, layer_name, 'ogr')
+            elif self.settings.value('imaer_plugin/catalog_join_on_load', defaultValue=False, type=bool):
+                layer = self.create_catalog_joined_layer(gpkg_fn, catalog_fn, result_layer_name, layer_name, subset)
+            else:
+                # Storing the geometries failed
+                continue
+            if layer is None or not layer.isValid():
                 continue
 
             layer_crs = layer.crs()
@@ -307,48 +500,8 @@ class ImaerPlugin:
             else:
                 QgsProject.instance().addMapLayer(layer)
 
-            # Set styles (renderers and labels) TODO: Use set_imaer_styles
-            style_name = 'contribution'
-
-            if result_layer_name == 'receptor_hexagons':
-                renderer = self.style_factory.create_renderer(style_name, 'polygon')
-                exp = '"deposition_nox_nh3_sum"'
-                renderer.setClassAttribute(exp)
-                labeling = self.style_factory.create_labeling(exp)
-                self.add_layer_style(layer, renderer, f'{style_name}_deposition', labeling)
-
-            elif result_layer_name == 'receptor_points':
-                renderer = self.style_factory.create_renderer(style_name, 'point')
-                exp = 'coalesce("concentration_nox", 0) + coalesce("concentration_no2", 0) + coalesce("concentration_nh3", 0)'
-                renderer.setClassAttribute(exp)
-                labeling = self.style_factory.create_labeling(exp)
-                self.add_layer_style(layer, renderer, f'{style_name}_concentration', labeling)
-
-            elif result_layer_name == 'sub_points':
-                renderer = self.style_factory.create_renderer(style_name, 'point')
-                exp = '"deposition_nox_nh3_sum"'
-                renderer.setClassAttribute(exp)
-                labeling = self.style_factory.create_labeling(exp)
-                self.add_layer_style(layer, renderer, f'{style_name}_deposition', labeling)
-
-                renderer = self.style_factory.create_renderer(style_name, 'point')
-                exp = 'coalesce("concentration_nox", 0) + coalesce("concentration_no2", 0) + coalesce("concentration_nh3", 0)'
-                renderer.setClassAttribute(exp)
-                labeling = self.style_factory.create_labeling(exp)
-                self.add_layer_style(layer, renderer, f'{style_name}_concentration', labeling)
-
-            elif result_layer_name == 'calculation_points':
-                renderer = self.style_factory.create_renderer(style_name, 'point')
-                exp = '"deposition_nox_nh3_sum"'
-                renderer.setClassAttribute(exp)
-                labeling = self.style_factory.create_labeling(exp)
-                self.add_layer_style(layer, renderer, f'{style_name}_deposition', labeling)
-
-                renderer = self.style_factory.create_renderer(style_name, 'point')
-                exp = 'coalesce("concentration_nox", 0) + coalesce("concentration_no2", 0) + coalesce("concentration_nh3", 0)'
-                renderer.setClassAttribute(exp)
-                labeling = self.style_factory.create_labeling(exp)
-                self.add_layer_style(layer, renderer, f'{style_name}_concentration', labeling)
+            # Set styles (renderers and labels) from the fields the layer has
+            self.set_imaer_styles(layer, 'contribution')
 
             loaded_layer_cnt += 1
 
@@ -360,9 +513,11 @@ class ImaerPlugin:
         if loaded_layer_cnt == 0:
             self.log(f'No result layers found in {stem}.gml', lvl='Warning', bar=True, duration=5)
         else:
-            pass
+            self.log(f'Loaded {loaded_layer_cnt} result layers from {gpkg_fn} ({os.path.getsize(gpkg_fn) / 1024 ** 2:.1f} MB)')
             #self.log(f'Loaded {loaded_layer_cnt} result layers.', lvl='Info', bar=True, duration=3)
 
+        return total_extent
+
     def set_imaer_styles(self, layer, style_name, labeling=None):
         field_names = layer.fields().names()
 
@@ -373,20 +528,34 @@ class ImaerPlugin:
         else:
             return
 
+        # Layers imported with a projection can miss some of the value fields
         if 'deposition_nox_nh3_sum' in field_names:
+            deposition_exp = '"deposition_nox_nh3_sum"'
+        else:
+            deposition_exp = self.get_sum_expression(['deposition_nox', 'deposition_nh3'], field_names)
+        concentration_exp = self.get_sum_expression(['concentration_nox', 'concentration_no2', 'concentration_nh3'], field_names)
+
+        if deposition_exp is not None:
             renderer = self.style_factory.create_renderer(style_name, geometry_type)
-            exp = '"deposition_nox_nh3_sum"'
-            renderer.setClassAttribute(exp)
-            labeling = self.style_factory.create_labeling(exp)
+            renderer.setClassAttribute(deposition_exp)
+            labeling = self.style_factory.create_labeling(deposition_exp)
             self.add_layer_style(layer, renderer, f'{style_name}_deposition', labeling)
 
-        if set(['concentration_nox', 'concentration_no2', 'concentration_nh3']).issubset(field_names):
+        if concentration_exp is not None:
             renderer = self.style_factory.create_renderer(style_name, geometry_type)
-            exp = 'coalesce("concentration_nox", 0) + coalesce("concentration_no2", 0) + coalesce("concentration_nh3", 0)'
-            renderer.setClassAttribute(exp)
-            labeling = self.style_factory.create_labeling(exp)
+            renderer.setClassAttribute(concentration_exp)
+            labeling = self.style_factory.create_labeling(concentration_exp)
             self.add_layer_style(layer, renderer, f'{style_name}_concentration', labeling)
 
+    def get_sum_expression(self, sum_field_names, field_names):
+        '''Returns an expression for the sum of those fields that exist, or None.'''
+        present_field_names = [field_name for field_name in sum_field_names if field_name in field_names]
+        if len(present_field_names) == 0:
+            return None
+        if len(present_field_names) == 1:
+            return f'"{present_field_names[0]}"'
+        return ' + '.join(f'coalesce("{field_name}", 0)' for field_name in present_field_names)
+
     def add_layer_style(self, layer, renderer, layer_style_name, labeling=None):
         if renderer is not None:
             style_manager = layer.styleManager()
@@ -397,6 +566,113 @@ class ImaerPlugin:
                 layer.setLabeling(labeling)
                 # layer.setLabelsEnabled(True)
 
+    def create_catalog_joined_layer(self, gpkg_fn, catalog_fn, layer_type, layer_name, subset=''):
+        '''Returns a virtual layer with the receptor geometries of the receptor
+        catalog joined to the values table of an import with a receptor
+        catalog, holding only the receptors of that import. So the result gpkg
+        only holds the receptor ids and values, until the geometries are stored
+        in it with run_materialize_receptor_layer(). Only used with the
+        imaer_plugin/catalog_join_on_load setting: the join has no spatial
+        index, so every redraw runs it again.'''
+        values_table_name = get_values_table_name(layer_type)
+        value_column_names = [
+            column_name for column_name in read_table_column_names(gpkg_fn, values_table_name)
+            if column_name not in ['ogc_fid', 'receptor_id']
+        ]
+        epsg_id = get_gpkg_metadata(catalog_fn).get('epsg_id')
+        if len(value_column_names) == 0 or epsg_id is None:
+            return None
+
+        definition = QgsVirtualLayerDefinition()
+        definition.addSource('catalog', f'{catalog_fn}|layername={layer_type}', 'ogr')
+        definition.addSource('result_values', f'{gpkg_fn}|layername={values_table_name}{subset}', 'ogr')
+        definition.setQuery(get_catalog_join_query(value_column_names))
+        definition.setUid('ogc_fid')
+        definition.setGeometryField('geometry')
+        definition.setGeometryWkbType(QgsWkbTypes.Point if layer_type == 'receptor_points' else QgsWkbTypes.Polygon)
+        definition.setGeometrySrid(int(epsg_id))
+        layer = QgsVectorLayer(definition.toString(), layer_name, 'virtual')
+
+        layer.setCustomProperty('imaer_plugin/values_gpkg', gpkg_fn)
+        layer.setCustomProperty('imaer_plugin/layer_type', layer_type)
+        layer.setCustomProperty('imaer_plugin/values_subset', subset)
+        self.iface.addCustomActionForLayer(self.materialize_action, layer)
+        return layer
+
+    def get_pending_receptor_layer_types(self, gpkg_fns):
+        '''Returns {gpkg_fn: [layer_type, ...]} with the receptor layers of
+        imports with a receptor catalog that have values without stored
+        geometries.'''
+        pending_layer_types = {}
+        for gpkg_fn in gpkg_fns:
+            if gpkg_fn in pending_layer_types or gpkg_fn in self.materialize_tasks:
+                continue
+            if get_gpkg_metadata(gpkg_fn).get('receptor_catalog') is None:
+                continue
+            layer_types = [
+                layer_type for layer_type in catalog_layer_types
+                if read_values_table_range(gpkg_fn, layer_type) is not None
+            ]
+            if len(layer_types) > 0:
+                pending_layer_types[gpkg_fn] = layer_types
+        return pending_layer_types
+
+    def store_receptor_geometries(self, pending_layer_types, finished_callback=None):
+        '''Stores the receptor geometries from the receptor catalog in the
+        result gpkgs, one task per gpkg, and calls finished_callback when all
+        tasks are finished.'''
+        remaining_gpkg_fns = set(pending_layer_types)
+
+        def task_finished(result, gpkg_fn, layer_types):
+            self.materialize_finished(result, gpkg_fn, layer_types)
+            remaining_gpkg_fns.discard(gpkg_fn)
+            if len(remaining_gpkg_fns) == 0 and finished_callback is not None:
+                finished_callback()
+
+        for gpkg_fn, layer_types in pending_layer_types.items():
+            catalog_fn = get_gpkg_metadata(gpkg_fn).get('receptor_catalog')
+            task = MaterializeReceptorLayerTask(self, gpkg_fn, catalog_fn, layer_types, task_finished)
+            self.materialize_tasks[gpkg_fn] = task
+            self.task_manager.addTask(task)
+
+    def run_materialize_receptor_layer(self):
+        '''Stores the receptor geometries of the active catalog joined layer in
+        its result gpkg, in a task, and reloads it from there.'''
+        layer = self.iface.activeLayer()
+        if layer is None or layer.customProperty('imaer_plugin/values_gpkg') is None:
+            self.log('Select a receptor layer joined to the receptor catalog', lvl='Warning', bar=True)
+            return
+        gpkg_fn = layer.customProperty('imaer_plugin/values_gpkg')
+        if gpkg_fn in self.materialize_tasks:
+            return
+        layer_type = layer.customProperty('imaer_plugin/layer_type')
+        self.store_receptor_geometries({gpkg_fn: [layer_type]})
+
+    def materialize_finished(self, result, gpkg_fn, layer_types):
+        self.materialize_tasks.pop(gpkg_fn, None)
+        if result['status'] != 'ok':
+            self.log(f'Storing receptor geometries in {gpkg_fn} failed: {result["message"]}', lvl='Critical', bar=True, duration=10)
+            return
+        feature_counts = ', '.join(f'{feature_count} {layer_type}' for layer_type, feature_count in result['feature_counts'].items())
+        self.log(f'Stored {feature_counts} in {gpkg_fn} ({result["file_size"] / 1024 ** 2:.1f} MB)', bar=True)
+
+        # Replace the joined layers with the layer from the gpkg, with the same name and tree position
+        project = QgsProject.instance()
+        for layer in list(project.mapLayers().values()):
+            if layer.customProperty('imaer_plugin/values_gpkg') != gpkg_fn:
+                continue
+            layer_type = layer.customProperty('imaer_plugin/layer_type')
+            if layer_type not in layer_types:
+                continue
+            subset = layer.customProperty('imaer_plugin/values_subset', '')
+            data_source = f'{gpkg_fn}|layername={layer_type}{subset}'
+            layer.removeCustomProperty('imaer_plugin/values_gpkg')
+            layer.removeCustomProperty('imaer_plugin/layer_type')
+            layer.removeCustomProperty('imaer_plugin/values_subset')
+            layer.setDataSource(data_source, layer.name(), 'ogr')
+            self.imaer_calc_layers.pop(layer.id(), None)
+        self.iface.mapCanvas().refresh()
+
     def get_imaer_calc_metadata(self, layer):
         '''Returns IMAER gpkg metadata from cache or attempts
         to find metadata.'''
@@ -420,20 +696,19 @@ class ImaerPlugin:
             return self.imaer_calc_layers[layer_id]
 
         ds = provider.dataSourceUri()
-        if '|layername=' in ds:
+        if layer.customProperty('imaer_plugin/values_gpkg') is not None:
+            # Catalog layers joined to the values of a result gpkg
+            gpkg_fn = layer.customProperty('imaer_plugin/values_gpkg')
+            gpkg_layer = layer.customProperty('imaer_plugin/layer_type')
+        elif '|layername=' in ds:
             gpkg_fn, gpkg_layer = ds.split('|layername=')
+            gpkg_layer = gpkg_layer.split('|')[0]  # Without a subset
         else:
             return self.imaer_calc_layers[layer_id]
         if gpkg_layer not in ['receptor_hexagons', 'receptor_points', 'sub_points', 'calculation_points']:
             return self.imaer_calc_layers[layer_id]
 
-        metadata_ds = '{}|layername=imaer_metadata'.format(gpkg_fn)
-        try:
-            md_layer = QgsVectorLayer(metadata_ds, 'metadata', 'ogr')
-        except:
-            return self.imaer_calc_layers[layer_id]
-        for md_feat in md_layer.getFeatures():
-            self.imaer_calc_layers[layer_id][md_feat[1]] = md_feat[2]
+        self.imaer_calc_layers[layer_id].update(get_gpkg_metadata(gpkg_fn))
         self.imaer_calc_layers[layer_id]['is_imaer_calc_layer'] = True
         self.imaer_calc_layers[layer_id]['gpkg_fn'] = gpkg_fn
         self.imaer_calc_layers[layer_id]['imaer_layer_type'] = gpkg_layer
@@ -20,6 +20,7 @@ from qgis.gui import QgsMessageBar
 from qgis import processing
 
 from ImaerPlugin.styles import StyleFactory
+from ImaerPlugin.task_timer import TaskTimer
 
 FORM_CLASS, _ = uic.loadUiType(os.path.join(
     os.path.dirname(__file__), 'relate_calc_results_dlg.ui'))
@@ -111,6 +112,21 @@ class RelateCalcResultsDialog(QDialog, FORM_CLASS):
 
         QgsProject.instance().addMapLayer(layer)
 
+    def run_relate_algorithm(self, alg_id, params, layers, layer_name):
+        '''Runs a relate algorithm, adds the output layer and logs its profile.'''
+        timer = TaskTimer('relate')
+        timer.info['algorithm'] = alg_id
+        with timer.phase('run algorithm'):
+            result = processing.run(alg_id, params)
+            layer = result['OUTPUT']
+            timer.count('input features', sum(input_layer.featureCount() for input_layer in layers))
+            timer.count('features', layer.featureCount())
+
+        with timer.phase('add layer'):
+            self.add_result_layer(layer, layer_name)
+        timer.stop()
+        timer.log_to(self.plugin.log)
+
     def calculate_difference(self, layers, layer_name):
         layer_1 = layers[0]
         layer_2 = layers[1]
@@ -120,27 +136,18 @@ class RelateCalcResultsDialog(QDialog, FORM_CLASS):
             'INPUT_2': layer_2,
             'OUTPUT': 'memory:'
         }
-        result = processing.run("imaer:relate_difference", params)
-        layer = result['OUTPUT']
-
-        self.add_result_layer(layer, layer_name)
+        self.run_relate_algorithm('imaer:relate_difference', params, layers[:2], layer_name)
 
     def calculate_sum(self, layers, layer_name):
         params = {
             'INPUT_LAYERS': layers,
             'OUTPUT': 'memory:'
         }
-        result = processing.run("imaer:relate_sum", params)
-        layer = result['OUTPUT']
-
-        self.add_result_layer(layer, layer_name)
+        self.run_relate_algorithm('imaer:relate_sum', params, layers, layer_name)
 
     def calculate_maximum(self, layers, layer_name):
         params = {
             'INPUT_LAYERS': layers,
             'OUTPUT': 'memory:'
         }
-        result = processing.run("imaer:relate_maximum", params)
-        layer = result['OUTPUT']
-
-        self.add_result_layer(layer, layer_name)
+        self.run_relate_algorithm('imaer:relate_maximum', params, layers, layer_name)
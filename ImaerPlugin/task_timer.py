@@ -1,8 +1,82 @@
+import sys
+import json
 import time
+import platform
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def get_peak_memory():
+    '''Returns the peak memory use (resident set) of this process in bytes
+    since it started, or None if it cannot be determined.'''
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            return max_rss  # bytes on macOS, kilobytes elsewhere
+        return max_rss * 1024
+    if psutil is not None:
+        memory_info = psutil.Process().memory_info()
+        return getattr(memory_info, 'peak_wset', memory_info.rss)
+    return None
+
+
+class TimerPhase():
+    '''Duration, number of calls, counters and peak memory of one phase, and
+    its sub phases by name.'''
+
+    def __init__(self, name):
+        self.name = name
+        self.duration = 0.0
+        self.calls = 0
+        self.counters = {}
+        self.peak_memory = None
+        self.children = {}
+
+    def to_dict(self):
+        result = {
+            'name': self.name,
+            'duration': round(self.duration, 6),
+            'calls': self.calls
+        }
+        if len(self.counters) > 0:
+            result['counters'] = dict(self.counters)
+        if self.peak_memory is not None:
+            result['peak_memory'] = self.peak_memory
+        if len(self.children) > 0:
+            result['phases'] = [child.to_dict() for child in self.children.values()]
+        return result
 
 
 class TaskTimer():
-    def __init__(self):
+    '''Profiler for tasks. Phases are timed with a context manager and can be
+    nested, a phase that is entered more than once adds up:
+
+        timer = TaskTimer('import')
+        with timer.phase('parse'):
+            with timer.phase('hexagons'):
+                ...
+            timer.count('features', 100)
+        timer.stop()
+        timer.log_to(self.log)
+
+    Counters (like features or bytes) are added to the current phase. At the
+    end of every phase the peak memory of the process is sampled, so it shows
+    the highest memory use up to then. to_json() returns the profile with
+    the platform, for comparing runs on different machines and versions.
+
+    The older log()/show() interface times consecutive named steps.'''
+
+    def __init__(self, name='total'):
+        self.name = name
         self.reset()
 
     def show(self):
@@ -23,6 +97,12 @@ class TaskTimer():
         self.prev_name = None
         self.tasks = {}
 
+        self.root = TimerPhase(self.name)
+        self.root.calls = 1
+        self.stack = [self.root]
+        self.root_start_time = time.perf_counter()
+        self.info = {}
+
     def log(self, name):
         if self.prev_time is not None:
             time_delta = time.time() - self.prev_time
@@ -35,6 +115,74 @@ class TaskTimer():
         self.prev_time = time.time()
         self.prev_name = name
 
+    @contextmanager
+    def phase(self, name):
+        '''Context manager that times a (sub) phase of the current phase.'''
+        parent = self.stack[-1]
+        if name not in parent.children:
+            parent.children[name] = TimerPhase(name)
+        current = parent.children[name]
+        self.stack.append(current)
+        start_time = time.perf_counter()
+        try:
+            yield current
+        finally:
+            current.duration += time.perf_counter() - start_time
+            current.calls += 1
+            current.peak_memory = get_peak_memory()
+            self.stack.pop()
+
+    def count(self, name, value=1):
+        '''Adds value to a counter of the current phase.'''
+        counters = self.stack[-1].counters
+        counters[name] = counters.get(name, 0) + value
+
+    def stop(self):
+        '''Sets the total duration and peak memory.'''
+        self.root.duration = time.perf_counter() - self.root_start_time
+        self.root.peak_memory = get_peak_memory()
+
+    def to_dict(self):
+        result = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine()
+        }
+        result.update(self.info)
+        result['profile'] = self.root.to_dict()
+        return result
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    def format_lines(self):
+        '''Returns a line per phase, indented by level, with the duration,
+        share of the total, counters and peak memory.'''
+        result = []
+        total_duration = self.root.duration or 1e-9
+
+        def add_lines(timer_phase, level):
+            line = f'{"  " * level}{timer_phase.name}: {timer_phase.duration:.3f} s ({100 * timer_phase.duration / total_duration:.1f}%)'
+            if timer_phase.calls > 1:
+                line += f', {timer_phase.calls} calls'
+            for counter_name, value in timer_phase.counters.items():
+                line += f', {counter_name}: {value}'
+                if timer_phase.duration > 0:
+                    line += f' ({value / timer_phase.duration:.0f}/s)'
+            if timer_phase.peak_memory is not None:
+                line += f', peak memory: {timer_phase.peak_memory / 1024 / 1024:.0f} MB'
+            result.append(line)
+            for child in timer_phase.children.values():
+                add_lines(child, level + 1)
+
+        add_lines(self.root, 0)
+        return result
+
+    def log_to(self, log_function):
+        '''Logs the profile with a log function, like the log() of a task.'''
+        for line in self.format_lines():
+            log_function(line)
+
 
 if __name__ == '__main__':
     tt = TaskTimer()
@@ -47,3 +195,14 @@ if __name__ == '__main__':
     tt.log('b')
 
     tt.show()
+
+    tt = TaskTimer('example')
+    for i in range(3):
+        with tt.phase('a'):
+            time.sleep(0.01)
+            with tt.phase('b'):
+                time.sleep(0.02)
+                tt.count('items', 10)
+    tt.stop()
+    tt.log_to(print)
+    print(tt.to_json())
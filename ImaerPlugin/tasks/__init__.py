@@ -1 +1,3 @@
 from .import_calc_result import ImportImaerCalculatorResultTask
+from .import_scheduler import ImportScheduler
+from .materialize_receptor_layer import MaterializeReceptorLayerTask
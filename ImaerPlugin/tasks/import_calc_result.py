@@ -1,30 +1,68 @@
 import os
+import json
+import time
 
-from qgis.PyQt.QtCore import QVariant, QFile
 from qgis.core import (
     Qgis,
     QgsTask,
     QgsMessageLog,
-    QgsProviderRegistry,
-    QgsFields,
-    QgsField,
     QgsWkbTypes,
-    QgsFeature,
-    QgsGeometry,
-    QgsVectorLayer,
-    QgsExpressionContextUtils,
 )
 
 from .. task_timer import TaskTimer
 from ImaerPlugin.imaer6 import ImaerDocument
-from ImaerPlugin.gpkg import ImaerGpkg
+from ImaerPlugin.imaer6.result_table import member_layer_types
+from ImaerPlugin.imaer6.gml_file import get_gml_fingerprint, GmlParseError
+from ImaerPlugin.gpkg import ImaerGpkg, ReceptorCatalog, ResultProjection, read_gpkg_metadata, read_gpkg_situations
+from ImaerPlugin.gpkg.layer_config import catalog_layer_types, get_layer_field_names, get_values_table_name
 from ImaerPlugin.config import ui_settings
-from ImaerPlugin.version import VersionNumber
+
+# Increase when the GeoPackages written by the import change, so files
+# imported by an older version are not reused
+importer_version = 3
+
+default_import_options = {
+    # Keep a GeoPackage with an import of the same GML file (fingerprint, importer version and output options)
+    'use_cache': True,
+    # Rows per result table, the batch that is read and bulk inserted at a time
+    'batch_size': 50000,
+    # Generate the receptor hexagons from the receptor points instead of reading them
+    'synthesize_hexagons': False,
+    # Read the hexagons anyway and log the receptors for which the synthesized hexagon differs
+    'verify_hexagons': False,
+    'hexagon_zoom_level': 1,
+    'parser_backend': None,
+    'parse_processes': 1,
+    # Layer types, result types and substances to import, None for all (see ResultProjection)
+    'layer_types': None,
+    'result_types': None,
+    'substances': None,
+    # SpatialFilter in the crs of the GML, None to import all receptors
+    'spatial_filter': None,
+    # Members read between progress updates and cancel checks, progress follows the bytes read
+    'progress_interval': 1000,
+    # Rows per insert statement when writing, the task can be canceled in between (removing the GeoPackage)
+    'write_chunk_size': 10000,
+    # Seconds between progress messages (throughput and ETA) in the log
+    'progress_log_interval': 10,
+    # Write with ImaerGpkg.fast_build_pragmas (no journal and syncing) until the indexes are built,
+    # the layers are created without spatial index, all indexes are built after the rows are written
+    'fast_build': True,
+    # Add the results as a situation to the (shared) GeoPackage, replacing an earlier import of
+    # the same GML file, see ImaerGpkg.begin_append(). The situation_id is set in the result.
+    'append': False,
+    # File name of a ReceptorCatalog, to write only the ids and values of receptor points and hexagons,
+    # the missing receptors are added to the catalog (see ImaerGpkg.materialize_receptor_layer())
+    'receptor_catalog': None
+}
+
+# Options that change the contents of the GeoPackage
+output_option_keys = ['synthesize_hexagons', 'hexagon_zoom_level', 'layer_types', 'result_types', 'substances', 'spatial_filter', 'receptor_catalog']
 
 
 class ImportImaerCalculatorResultTask(QgsTask):
 
-    def __init__(self, plugin, gml_fn, gpkg_fn, result_callback):
+    def __init__(self, plugin, gml_fn, gpkg_fn, result_callback, options=None):
         super().__init__('Import IMAER Calculator Result', QgsTask.CanCancel)
         self.gml_fn = gml_fn
         self.gpkg_fn = gpkg_fn
@@ -32,8 +70,26 @@ class ImportImaerCalculatorResultTask(QgsTask):
         self.result_callback = result_callback
         self.plugin = plugin
         self.do_log = True
+        self.options = dict(default_import_options)
+        if options is not None:
+            self.options.update(options)
+        self.batch_size = self.options['batch_size']
+        self.projection = ResultProjection(self.options['layer_types'], self.options['result_types'], self.options['substances'])
+        self.layers = {}
+        self.gpkg = None
+        self.situation_id = None
+        self.catalog = None
+        self.features_written = 0
+        self.start_time = None
+        self.last_progress_log_time = None
+        self.timer = TaskTimer('import')
 
     def run(self):
+        '''Streams the result members from the GML into the GeoPackage, in
+        columnar result tables of at most self.batch_size rows, so memory use
+        does not grow with the size of the GML file. See default_import_options
+        for the options. The phases are profiled with self.timer and stored as
+        import_profile in the metadata of the GeoPackage.'''
         self.log('Started task "{}"'.format(self.description()))
         self.log(f'source: {self.gml_fn}')
         self.log(f'target: {self.gpkg_fn}')
@@ -42,115 +98,337 @@ class ImportImaerCalculatorResultTask(QgsTask):
 
         self.setProgress(1)  # Cause setting to 0% does not work.
 
-        doc = ImaerDocument()
-        doc.from_xml_file(self.gml_fn)
-        # self.log(f'doc: {str(doc)}')
+        self.timer.reset()
+        self.timer.info['plugin_version'] = getattr(self.plugin, 'version', None)
+        self.timer.info['importer_version'] = importer_version
 
-        self.setProgress(40)
+        with self.timer.phase('fingerprint'):
+            fingerprint = self.get_fingerprint()
+        if self.options['use_cache'] and self.is_imported(fingerprint):
+            self.log(f'already imported, using {self.gpkg_fn}')
+            self.setProgress(100)
+            self.result['status'] = 'ok'
+            self.result['cached'] = True
+            return True
 
-        if os.path.isfile(self.gpkg_fn):
+        if os.path.isfile(self.gpkg_fn) and not self.options['append']:
             os.remove(self.gpkg_fn)
 
-        doc_version = VersionNumber(doc.get_version().to_string())
-        doc_version_str = doc_version.to_string(2)
-        # self.log(doc_version_str)
-        if doc_version_str not in ui_settings['supported_imaer_versions']:
-            self.result['status'] = 'error'
-            self.result['message'] = f'Unsupported IMAER version ({doc.get_version().to_string()}) in {gml_base_name}.'
+        doc = ImaerDocument()
+        with self.timer.phase('read header'):
+            doc.peek_header(self.gml_fn)
+        if not self.is_supported_version(doc, gml_base_name):
             return False
 
-        member_info = doc.get_member_count()
-        result_member_count = 0
-        for k, v in member_info.items():
-            if k in ['ReceptorPoint', 'SubPoint', 'CalculationPoint']:
-                result_member_count += v
-        # self.log(result_member_count)
-
-        if result_member_count == 0:
-            
+        # A byte scan up to the first member, so files without result members are skipped before creating a GeoPackage
+        with self.timer.phase('census'):
+            has_members = doc.has_result_members(self.gml_fn)
+        if not has_members:
             self.result['status'] = 'warning'
             self.result['message'] = f'No result features found in {gml_base_name}.'
             return False
 
+        # Before reading, as the filter can skip all members of a GML in another crs
+        spatial_filter = self.options['spatial_filter']
+        if spatial_filter is not None and spatial_filter.epsg_id is not None:
+            with self.timer.phase('read crs'):
+                gml_epsg_id = doc.peek_epsg_id(self.gml_fn)
+            if gml_epsg_id not in [None, spatial_filter.epsg_id]:
+                self.result['status'] = 'error'
+                self.result['message'] = f'The crs of the spatial filter (EPSG:{spatial_filter.epsg_id}) differs from {gml_base_name} (EPSG:{gml_epsg_id}).'
+                return False
+
+        gpkg = None
+        self.layers = {}
+        self.features_written = 0
+        self.start_time = self.last_progress_log_time = time.perf_counter()
+
+        synthesize_hexagons = self.options['synthesize_hexagons']
+        verify_hexagons = self.options['verify_hexagons']
+        zoom_level = self.options['hexagon_zoom_level']
+        read_hexagons = verify_hexagons or not synthesize_hexagons
+        hexagons_checked = 0
+        hexagon_mismatches = 0
+
+        tables = doc.iter_result_tables(
+            self.gml_fn,
+            self.batch_size,
+            read_hexagons,
+            self.options['parser_backend'],
+            self.options['parse_processes'],
+            self.projection,
+            spatial_filter,
+            self.read_progress_changed,
+            self.options['progress_interval']
+        )
+        while not self.isCanceled():
+            with self.timer.phase('parse'):
+                try:
+                    table = next(tables, None)
+                except GmlParseError as e:
+                    # Never keep (or cache) the results read before the error
+                    self.remove_partial_gpkg()
+                    self.result['status'] = 'error'
+                    self.result['message'] = f'Error reading {gml_base_name}: {e}'
+                    return False
+                if table is not None:
+                    self.timer.count('members', len(table))
+            if table is None:
+                break
+
+            if gpkg is None:
+                with self.timer.phase('create gpkg'):
+                    gpkg = self.gpkg = self.create_gpkg(doc)
+
+            if table.member_type == 'ReceptorPoint' and self.projection.keeps_layer_type('receptor_hexagons'):
+                with self.timer.phase('hexagons'):
+                    if verify_hexagons:
+                        checked, mismatches = table.compare_hexagons(zoom_level)
+                        hexagons_checked += checked
+                        hexagon_mismatches += len(mismatches)
+                        for i in mismatches[:10]:
+                            self.log(f'synthesized hexagon differs for receptor {table.columns["receptor_id"][i]}')
+                    elif synthesize_hexagons:
+                        table.synthesize_hexagons(zoom_level)
+
+            with self.timer.phase('write'):
+                for layer_type in member_layer_types[table.member_type]:
+                    if self.projection.keeps_layer_type(layer_type):
+                        self.write_table(gpkg, layer_type, table)
+
+            self.read_progress_changed(doc.bytes_read, doc.bytes_total)
+
+        tables.close()
+        if self.isCanceled():
+            self.remove_partial_gpkg()
+            return False
+
+        if gpkg is None:
+            self.result['status'] = 'warning'
+            if spatial_filter is None:
+                self.result['message'] = f'No result features found in {gml_base_name}.'
+            else:
+                self.result['message'] = f'No result features found inside the spatial filter in {gml_base_name}.'
+            return False
+
+        with self.timer.phase('finish'):
+            gpkg.finish_bulk_insert()
+        with self.timer.phase('indexes'):
+            gpkg.create_indexes()
+        gpkg.end_fast_build()
+        if self.catalog is not None:
+            self.log(f'{self.catalog}, receptors added: {self.catalog.added_counts}')
+            self.catalog.close()
+        self.log_progress(doc.bytes_total, doc.bytes_total)
+        self.log(f'parser backend: {doc.parser_backend}')
+        if spatial_filter is not None:
+            self.log(f'{spatial_filter}, skipped members: {doc.filtered_count}')
+
+        self.timer.count('bytes', doc.bytes_total)
+        self.timer.count('filtered', doc.filtered_count)
+        self.timer.info['parser_backend'] = doc.parser_backend
+        self.timer.stop()
+        self.timer.log_to(self.log)
+
+        if self.situation_id is not None:
+            gpkg.create_situation_views(self.situation_id)
+            # The fingerprint is written last, so an interrupted import is never reused
+            gpkg.update_situation(self.situation_id, {
+                'import_profile': self.timer.to_json(),
+                'fingerprint': json.dumps(fingerprint, sort_keys=True)
+            })
+        else:
+            gpkg.set_metadata('import_profile', self.timer.to_json())
+            gpkg.set_metadata_items(fingerprint)
+        gpkg.close()
+
+        if verify_hexagons:
+            self.log(f'hexagons verified: {hexagons_checked}, mismatches: {hexagon_mismatches}')
+
+        self.setProgress(100)
+
+        self.result['status'] = 'ok'
+        return True
+
+    def get_fingerprint(self):
+        '''Returns the metadata identifying the source and the way it was
+        imported, see is_imported().'''
+        fingerprint = get_gml_fingerprint(self.gml_fn)
+        fingerprint['importer_version'] = importer_version
+        output_options = {key: self.options[key] for key in output_option_keys}
+        fingerprint['import_options'] = json.dumps(output_options, sort_keys=True, default=lambda value: value.fingerprint)
+        return fingerprint
+
+    def is_imported(self, fingerprint):
+        '''True if the GeoPackage holds a complete import with the same fingerprint.
+        In append mode that is a situation, which is set as the situation_id.'''
+        if not self.options['append']:
+            metadata = read_gpkg_metadata(self.gpkg_fn)
+            return all(metadata.get(key) == value for key, value in fingerprint.items())
+
+        fingerprint_json = json.dumps(fingerprint, sort_keys=True)
+        for situation in read_gpkg_situations(self.gpkg_fn):
+            if situation['gml_fn'] == self.gml_fn and situation['fingerprint'] == fingerprint_json:
+                self.situation_id = self.result['situation_id'] = situation['situation_id']
+                return True
+        return False
+
+    def is_supported_version(self, doc, gml_base_name):
+        doc_version = doc.get_version()
+        if doc_version is not None and doc_version.to_string(2) in ui_settings['supported_imaer_versions']:
+            return True
+
+        version_str = None if doc_version is None else doc_version.to_string()
+        self.result['status'] = 'error'
+        self.result['message'] = f'Unsupported IMAER version ({version_str}) in {gml_base_name}.'
+        return False
+
+    def create_gpkg(self, doc):
         gpkg = ImaerGpkg(self.gpkg_fn, plugin=self.plugin)
         # self.log(str(gpkg))
 
+        if self.options['append']:
+            # No fast build, the GeoPackage holds other imports
+            gpkg.begin_append()
+            for situation in gpkg.get_situations():
+                if situation['gml_fn'] == self.gml_fn:
+                    self.log(f'replacing situation {situation["situation_id"]}')
+                    gpkg.remove_situation(situation['situation_id'])
+            self.situation_id = self.result['situation_id'] = gpkg.add_situation({
+                'situation_name': doc.get_situation_name(),
+                'gml_fn': self.gml_fn,
+                'imaer_version': doc.get_version().to_string(),
+                'import_time': time.strftime('%Y-%m-%dT%H:%M:%S')
+            })
+            return gpkg
+
+        if self.options['fast_build']:
+            gpkg.begin_fast_build()
+
         # metadata
-        gpkg.set_metadata('gml_fn', doc.gml_fn)
-        gpkg.set_metadata('imaer_version', doc.get_version().to_string())
-
-        if doc.metadata is None:
-            situation_name = ''
-        elif doc.metadata.situation is None:
-            situation_name = ''
-        elif 'name' in doc.metadata.situation:
-            situation_name = doc.metadata.situation['name']
-        else:
-            situation_name = ''
-        gpkg.set_metadata('situation_name', situation_name)
+        gpkg.set_metadata_items({
+            'gml_fn': doc.gml_fn,
+            'imaer_version': doc.get_version().to_string(),
+            'situation_name': doc.get_situation_name()
+        })
 
         # self.log(gpkg.get_all_metadata())
+        return gpkg
 
-        receptor_points_layer = None
-        receptor_hexagons_layer = None
-        sub_points_layer = None
-        calculation_points_layer = None
-
-        for member in doc.feature_members:
-            # self.log(member.__class__.__name__)
-            if member.__class__.__name__ == 'ReceptorPoint':
-                feat = member.to_point_feature()
-                if feat is not None:
-                    if receptor_points_layer is None:
-                        epsg_id = int(member.gm_point.epsg_id)
-                        gpkg.create_layer_receptor_points(epsg_id)
-                        receptor_points_layer = QgsVectorLayer(f'{self.gpkg_fn}|layername=receptor_points', 'receptor_points', 'ogr')
-                        receptor_points_layer.startEditing()
-                    receptor_points_layer.addFeature(feat)
-                feat = member.to_polygon_feature()
-                if feat is not None:
-                    if receptor_hexagons_layer is None:
-                        epsg_id = int(member.representation.epsg_id)
-                        gpkg.create_layer_receptor_hexagons(epsg_id)
-                        receptor_hexagons_layer = QgsVectorLayer(f'{self.gpkg_fn}|layername=receptor_hexagons', 'receptor_hexagons', 'ogr')
-                        receptor_hexagons_layer.startEditing()
-                    receptor_hexagons_layer.addFeature(feat)
-
-            elif member.__class__.__name__ == 'SubPoint':
-                feat = member.to_point_feature()
-                if feat is not None:
-                    if sub_points_layer is None:
-                        epsg_id = int(member.gm_point.epsg_id)
-                        gpkg.create_layer_sub_points(epsg_id)
-                        sub_points_layer = QgsVectorLayer(f'{self.gpkg_fn}|layername=sub_points', 'sub_points', 'ogr')
-                        sub_points_layer.startEditing()
-                    sub_points_layer.addFeature(feat)
-
-            elif member.__class__.__name__ == 'CalculationPoint':
-                feat = member.to_point_feature()
-                if feat is not None:
-                    if calculation_points_layer is None:
-                        epsg_id = int(member.gm_point.epsg_id)
-                        gpkg.create_layer_calculation_points(epsg_id)
-                        calculation_points_layer = QgsVectorLayer(f'{self.gpkg_fn}|layername=calculation_points', 'calcultion_points', 'ogr')
-                        calculation_points_layer.startEditing()
-                    calculation_points_layer.addFeature(feat)
-
-        self.setProgress(80)
-
-        if receptor_points_layer is not None:
-            receptor_points_layer.commitChanges()
-        if receptor_hexagons_layer is not None:
-            receptor_hexagons_layer.commitChanges()
-        if sub_points_layer is not None:
-            sub_points_layer.commitChanges()
-        if calculation_points_layer is not None:
-            calculation_points_layer.commitChanges()
+    def write_table(self, gpkg, layer_type, table):
+        '''Bulk inserts the rows of a result table into a layer, creating the
+        layer on first use. With a receptor catalog the geometries go into the
+        catalog and the values into the values table of the layer type.'''
+        if table.epsg_id is None:
+            return
+        srs_id = int(table.epsg_id)
+        rows = list(table.iter_gpkg_rows(layer_type, srs_id))
+        if len(rows) == 0 or self.isCanceled():
+            return
 
-        self.setProgress(100)
+        table_name = layer_type
+        catalog = self.get_catalog(layer_type, srs_id)
+        if catalog is not None:
+            table_name = get_values_table_name(layer_type)
+            receptor_id_index = get_layer_field_names(layer_type, projection=self.projection).index('receptor_id') + 1
+            with self.timer.phase('catalog'):
+                catalog.add_receptors(layer_type, [(row[0], row[receptor_id_index]) for row in rows])
 
-        self.result['status'] = 'ok'
-        return True
+        if layer_type not in self.layers:
+            fields = gpkg.field_factory.create_fields_for_layer_type(layer_type, projection=self.projection)
+            if gpkg.append_mode and gpkg.has_layer(table_name):
+                gpkg.prepare_append_layer(table_name, fields)
+            elif catalog is not None:
+                gpkg.create_layer(table_name, fields, QgsWkbTypes.NoGeometry, srs_id, spatial_index=False)
+                gpkg.set_metadata('receptor_catalog', catalog.filename)
+            else:
+                create_layer_functions = {
+                    'receptor_points': gpkg.create_layer_receptor_points,
+                    'receptor_hexagons': gpkg.create_layer_receptor_hexagons,
+                    'sub_points': gpkg.create_layer_sub_points,
+                    'calculation_points': gpkg.create_layer_calculation_points
+                }
+                create_layer_functions[layer_type](srs_id, self.projection, spatial_index=False)
+            self.layers[layer_type] = fields.names()
+            if gpkg.append_mode:
+                self.layers[layer_type].insert(0, 'situation_id')
+
+        if self.situation_id is not None:
+            rows = [(row[0], self.situation_id, *row[1:]) for row in rows]
+
+        chunk_size = self.options['write_chunk_size']
+        for start in range(0, len(rows), chunk_size):
+            if self.isCanceled():
+                return
+            chunk = rows[start:start + chunk_size]
+            gpkg.bulk_insert(table_name, self.layers[layer_type], chunk)
+            self.features_written += len(chunk)
+            self.timer.count('features', len(chunk))
+
+    def get_catalog(self, layer_type, srs_id):
+        '''Returns the ReceptorCatalog for a layer type, or None if the layer
+        type is written with its geometries.'''
+        if self.options['receptor_catalog'] is None or layer_type not in catalog_layer_types:
+            return None
+        if self.catalog is None:
+            self.catalog = ReceptorCatalog(self.options['receptor_catalog'], srs_id, plugin=self.plugin)
+            if self.catalog.epsg_id != srs_id:
+                self.log(f'{self.catalog} is not in EPSG:{srs_id}, writing geometries')
+                self.catalog.close()
+                self.catalog = None
+                self.options['receptor_catalog'] = None
+        return self.catalog
+
+    def read_progress_changed(self, bytes_read, bytes_total):
+        '''Progress callback of the GML reading, returns True to stop reading
+        when the task is canceled.'''
+        if bytes_total > 0:
+            self.setProgress(max(1, 99 * bytes_read / bytes_total))
+        now = time.perf_counter()
+        if now - self.last_progress_log_time >= self.options['progress_log_interval']:
+            self.last_progress_log_time = now
+            self.log_progress(bytes_read, bytes_total)
+        return self.isCanceled()
+
+    def log_progress(self, bytes_read, bytes_total):
+        '''Logs the bytes read, throughput, features written and estimated time left.'''
+        duration = time.perf_counter() - self.start_time
+        mb_read = bytes_read / 1024 / 1024
+        mb_total = bytes_total / 1024 / 1024
+        throughput = mb_read / duration if duration > 0 else 0
+        message = f'read {mb_read:.1f} of {mb_total:.1f} MB ({throughput:.1f} MB/s), {self.features_written} features written'
+        if 0 < bytes_read < bytes_total:
+            eta = duration * (bytes_total - bytes_read) / bytes_read
+            message += f', ETA {eta:.0f} s'
+        else:
+            message += f' in {duration:.1f} s'
+        self.log(message)
+
+    def remove_partial_gpkg(self):
+        '''Closes and removes the GeoPackage of a canceled or failed import. In append
+        mode only the situation is removed, after building the indexes of the
+        layers it created.'''
+        if self.catalog is not None:
+            self.catalog.close()
+            self.catalog = None
+        if self.gpkg is not None and self.situation_id is not None:
+            self.gpkg.finish_bulk_insert()
+            self.gpkg.create_indexes()
+            self.gpkg.remove_situation(self.situation_id)
+            self.gpkg.close()
+            self.gpkg = None
+            self.log(f'removed partial situation {self.situation_id} from {self.gpkg_fn}')
+            return
+
+        if self.gpkg is not None:
+            self.gpkg.close()
+            self.gpkg = None
+        try:
+            if os.path.isfile(self.gpkg_fn):
+                os.remove(self.gpkg_fn)
+                self.log(f'removed partial {self.gpkg_fn}')
+        except OSError as e:
+            self.log(f'could not remove partial {self.gpkg_fn}: {e}')
 
     def finished(self, result):
         # self.log('finished task')
@@ -158,10 +436,11 @@ class ImportImaerCalculatorResultTask(QgsTask):
         self.result_callback(self.result, self.gpkg_fn)
 
     def cancel(self):
+        self.result['status'] = 'canceled'
         self.result['message'] = 'Task "{name}" was canceled'.format(name=self.description())
         self.log(self.result['message']
         )
-        # TODO delete gpkg file
+        # The partial gpkg file is removed by run(), which checks isCanceled()
         super().cancel()
 
     def log(self, message, tab='IMAER Plugin'):
@@ -0,0 +1,204 @@
+from zipfile import BadZipFile
+
+from qgis.core import (
+    Qgis,
+    QgsMessageLog,
+    QgsProxyProgressTask,
+)
+
+from .import_calc_result import ImportImaerCalculatorResultTask, default_import_options
+from ImaerPlugin.imaer6.gml_file import get_gml_size
+from ImaerPlugin.imaer6.parallel_parse import get_parse_process_count
+
+# Memory use of one ReceptorPoint row with hexagon and two results, measured
+# with tracemalloc: 172 bytes in the ReceptorResultTable, 452 bytes for its
+# hexagon layer row (geometry blob and values) while writing the table
+_bytes_per_table_row = 172 + 452
+# GML bytes of such a ReceptorPoint member, to estimate the rows of small files
+_gml_bytes_per_row = 1700
+# Byte ranges read ahead per parse process (see imaer6.parallel_parse)
+_bytes_per_parse_process = 2 * 64 * 1024 * 1024
+
+
+def estimate_import_memory(gml_fn, options=None):
+    '''Returns an estimate of the peak memory use in bytes of importing a GML
+    file. The import streams the file in batches, so this is the memory of one
+    batch (or of the whole file when it is smaller) plus the read-ahead of the
+    parse processes. A batch of 50000 rows takes about 30 MB, so the memory
+    budget of the scheduler mostly limits imports with parse processes.'''
+    if options is None:
+        options = default_import_options
+    batch_size = options.get('batch_size', default_import_options['batch_size'])
+    parse_processes = options.get('parse_processes', 1)
+
+    batch_rows = batch_size
+    # The compressed size of a gzip file does not tell how many rows it has
+    if not gml_fn.lower().endswith('.gz'):
+        try:
+            batch_rows = min(batch_rows, get_gml_size(gml_fn) // _gml_bytes_per_row + 1)
+        except (OSError, KeyError, BadZipFile):
+            pass
+    memory = batch_rows * _bytes_per_table_row
+
+    parse_processes = get_parse_process_count(gml_fn, parse_processes)
+    if parse_processes != 1:
+        memory += parse_processes * _bytes_per_parse_process
+    return memory
+
+
+class ImportScheduler():
+    '''Imports a list of result GML files with at most max_tasks import tasks
+    running at the same time, and only starting a task when its estimated
+    memory use fits in memory_budget (in bytes) next to the running tasks. One
+    task is always allowed to run, however large its file is.
+
+    A proxy task in the task manager shows the progress of all imports,
+    weighted by file size, canceling it cancels all imports. When all imports are done the resulting GeoPackages
+    are loaded into the project in one batch.
+
+    Files are refused when their GeoPackage is already in the list (like the
+    same file twice, or zip members with the same name), as the imports would
+    overwrite each other. With the append option all files go into one
+    GeoPackage, the tasks writing to the same GeoPackage run one at a time.'''
+
+    def __init__(self, plugin, max_tasks=2, memory_budget=None, options=None):
+        self.plugin = plugin
+        self.max_tasks = max(1, max_tasks)
+        self.append = options is not None and bool(options.get('append'))
+        self.memory_budget = memory_budget
+        self.options = options
+        # (job id, gml_fn, gpkg_fn) per file to import
+        self.queue = []
+        self.gpkg_fns = set()
+        # (job id, gpkg_fn, memory) per running task
+        self.running = {}
+        self.progress = {}
+        self.file_sizes = {}
+        self.results = []
+        self.proxy_task = None
+        self.is_canceled = False
+
+    def add_file(self, gml_fn, gpkg_fn):
+        '''Adds a file to import. Returns False (and does not add it) when
+        another file in the list is imported into the same GeoPackage, except
+        in append mode.'''
+        if gpkg_fn in self.gpkg_fns and not self.append:
+            return False
+        self.gpkg_fns.add(gpkg_fn)
+        job_id = len(self.file_sizes)
+        self.queue.append((job_id, gml_fn, gpkg_fn))
+        try:
+            self.file_sizes[job_id] = max(1, get_gml_size(gml_fn))
+        except (OSError, KeyError, BadZipFile):
+            self.file_sizes[job_id] = 1
+        self.progress[job_id] = 0
+        return True
+
+    def start(self):
+        if len(self.queue) == 0:
+            return
+        self.log(f'Importing {len(self.queue)} files, at most {self.max_tasks} at a time')
+        self.proxy_task = QgsProxyProgressTask(f'Import {len(self.queue)} IMAER Calculator Results', True)
+        self.proxy_task.canceled.connect(self.cancel)
+        self.plugin.task_manager.addTask(self.proxy_task)
+        self.start_next_tasks()
+
+    def start_next_tasks(self):
+        while len(self.queue) > 0 and len(self.running) < self.max_tasks:
+            job = self.get_next_job()
+            if job is None:
+                break
+            job_id, gml_fn, gpkg_fn = job
+            memory = estimate_import_memory(gml_fn, self.options)
+            if len(self.running) > 0 and not self.fits_memory_budget(memory):
+                break
+            self.queue.remove(job)
+
+            task = self.create_task(job_id, gml_fn, gpkg_fn)
+            self.running[task] = (job_id, gpkg_fn, memory)
+            self.plugin.task_manager.addTask(task)
+
+    def create_task(self, job_id, gml_fn, gpkg_fn):
+        task = ImportImaerCalculatorResultTask(
+            self.plugin,
+            gml_fn,
+            gpkg_fn,
+            lambda result, gpkg_fn: self.task_finished(task, result),
+            options=self.options
+        )
+        task.progressChanged.connect(lambda progress: self.task_progress_changed(job_id, progress))
+        return task
+
+    def get_next_job(self):
+        '''Returns the first queued job of which the GeoPackage is not written
+        by a running task, or None.'''
+        running_gpkg_fns = {gpkg_fn for _, gpkg_fn, _ in self.running.values()}
+        for job in self.queue:
+            if job[2] not in running_gpkg_fns:
+                return job
+        return None
+
+    def fits_memory_budget(self, memory):
+        if self.memory_budget is None:
+            return True
+        running_memory = sum(task_memory for _, _, task_memory in self.running.values())
+        return running_memory + memory <= self.memory_budget
+
+    def task_progress_changed(self, job_id, progress):
+        self.progress[job_id] = progress
+        self.update_progress()
+
+    def update_progress(self):
+        if self.proxy_task is None:
+            return
+        total_size = sum(self.file_sizes.values())
+        done_size = sum(self.file_sizes[job_id] * self.progress[job_id] / 100 for job_id in self.file_sizes)
+        self.proxy_task.setProxyProgress(100 * done_size / total_size)
+
+    def task_finished(self, task, result):
+        '''Callback of the import tasks, runs in the main thread.'''
+        job_id, gpkg_fn, _ = self.running.pop(task)
+        self.progress[job_id] = 100
+        self.results.append((result, gpkg_fn))
+        self.update_progress()
+
+        if not self.is_canceled:
+            self.start_next_tasks()
+        if len(self.running) == 0 and (self.is_canceled or len(self.queue) == 0):
+            self.all_finished()
+
+    def cancel(self):
+        '''Cancels the running imports and does not start the queued ones.
+        Connected to canceling the proxy task in the task manager.'''
+        if self.is_canceled:
+            return
+        self.is_canceled = True
+        self.queue = []
+        for task in list(self.running):
+            task.cancel()
+        if len(self.running) == 0:
+            self.all_finished()
+
+    def all_finished(self):
+        ok_count = len([result for result, _ in self.results if result['status'] == 'ok'])
+        if self.proxy_task is not None:
+            self.proxy_task.finalize(ok_count == len(self.results))
+            self.proxy_task = None
+
+        for result, gpkg_fn in self.results:
+            if result['status'] == 'error':
+                self.plugin.log(result['message'], lvl='Critical', bar=True, duration=10)
+            elif result['status'] in ['warning', 'canceled']:
+                self.plugin.log(result['message'], lvl='Warning', bar=True, duration=10)
+
+        ok_results = [(result, gpkg_fn) for result, gpkg_fn in self.results if result['status'] == 'ok']
+        gpkg_fns = [gpkg_fn for _, gpkg_fn in ok_results]
+        situation_ids = [result.get('situation_id') for result, _ in ok_results]
+        self.plugin.load_calculation_results_gpkgs(gpkg_fns, situation_ids)
+        self.log(f'Imported {ok_count} of {len(self.results)} files')
+
+        if self in self.plugin.import_schedulers:
+            self.plugin.import_schedulers.remove(self)
+
+    def log(self, message, tab='IMAER Plugin'):
+        QgsMessageLog.logMessage(str(message), tab, level=Qgis.Info)
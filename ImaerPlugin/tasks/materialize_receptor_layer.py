@@ -0,0 +1,47 @@
+import os
+
+from qgis.core import (
+    Qgis,
+    QgsTask,
+    QgsMessageLog,
+)
+
+from ImaerPlugin.gpkg import ImaerGpkg
+
+
+class MaterializeReceptorLayerTask(QgsTask):
+    '''Stores the receptor geometries from the receptor catalog in a result
+    GeoPackage, which then no longer needs the catalog. The values rows are
+    moved into the receptor layers (see ImaerGpkg.materialize_receptor_layer()).'''
+
+    def __init__(self, plugin, gpkg_fn, catalog_fn, layer_types, result_callback):
+        super().__init__('Store IMAER receptor geometries', QgsTask.Flags())
+        self.plugin = plugin
+        self.gpkg_fn = gpkg_fn
+        self.catalog_fn = catalog_fn
+        self.layer_types = layer_types
+        self.result_callback = result_callback
+        self.result = {'status': 'error', 'message': '', 'feature_counts': {}}
+
+    def run(self):
+        gpkg = ImaerGpkg(self.gpkg_fn, plugin=self.plugin)
+        try:
+            for layer_type in self.layer_types:
+                try:
+                    feature_count = gpkg.materialize_receptor_layer(layer_type, self.catalog_fn)
+                except Exception as e:
+                    self.result['message'] = f'{layer_type}: {e}'
+                    return False
+                self.result['feature_counts'][layer_type] = feature_count
+                self.log(f'{layer_type}: {feature_count} features from {self.catalog_fn}')
+        finally:
+            gpkg.close()
+        self.result['status'] = 'ok'
+        self.result['file_size'] = os.path.getsize(self.gpkg_fn)
+        return True
+
+    def finished(self, result):
+        self.result_callback(self.result, self.gpkg_fn, self.layer_types)
+
+    def log(self, message, tab='IMAER Plugin'):
+        QgsMessageLog.logMessage(repr(message), tab, level=Qgis.Info)
@@ -0,0 +1,109 @@
+'''
+Compares writing receptor hexagons to a new GeoPackage through a QgsVectorLayer
+edit buffer (startEditing, addFeature, commitChanges) with ImaerGpkg.bulk_insert().
+
+Run with the Python interpreter of a QGIS installation from the repository root:
+
+    python3 benchmarks/benchmark_gpkg_write.py 100000 1000000 5000000
+
+Results: open. Both sides need QGIS (QgsVectorLayer for the edit buffer,
+QgsProviderRegistry in ImaerGpkg to create the layer), so there are no
+numbers for 100000, 1000000 and 5000000 receptors yet. Record the table it
+prints here, with the QGIS version and the machine.
+'''
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qgis.core import (
+    QgsApplication,
+    QgsVectorLayer,
+    QgsFeature,
+    QgsGeometry,
+    QgsLineString,
+    QgsPoint,
+    QgsPolygon
+)
+
+qgs = QgsApplication([], False)
+qgs.initQgis()
+
+from ImaerPlugin.gpkg import ImaerGpkg
+from ImaerPlugin.gpkg.gpkg_geometry import encode_polygon
+
+EPSG_ID = 28992
+BATCH_SIZE = 50000
+
+
+def synthetic_hexagons(count):
+    '''Yields (receptor_id, coords) for a simple grid of hexagons.'''
+    radius = 62.04
+    half_height = 53.73
+    for i in range(count):
+        x = 10000 + (i % 2000) * 186.12
+        y = 300000 + (i // 2000) * 107.46
+        coords = [
+            x + radius, y,
+            x + radius / 2, y + half_height,
+            x - radius / 2, y + half_height,
+            x - radius, y,
+            x - radius / 2, y - half_height,
+            x + radius / 2, y - half_height,
+            x + radius, y
+        ]
+        yield i + 1, coords
+
+
+def write_edit_buffer(gpkg_fn, count):
+    gpkg = ImaerGpkg(gpkg_fn)
+    gpkg.create_layer_receptor_hexagons(EPSG_ID)
+    layer = QgsVectorLayer(f'{gpkg_fn}|layername=receptor_hexagons', 'receptor_hexagons', 'ogr')
+    layer.startEditing()
+    for receptor_id, coords in synthetic_hexagons(count):
+        line = QgsLineString()
+        for i in range(0, len(coords), 2):
+            line.addVertex(QgsPoint(coords[i], coords[i + 1]))
+        polygon = QgsPolygon()
+        polygon.setExteriorRing(line)
+        feat = QgsFeature()
+        feat.setGeometry(QgsGeometry(polygon))
+        feat.setAttributes([None, receptor_id, 0, 1.5, 1.0, 0.5])
+        layer.addFeature(feat)
+    layer.commitChanges()
+
+
+def write_bulk(gpkg_fn, count):
+    gpkg = ImaerGpkg(gpkg_fn)
+    gpkg.create_layer_receptor_hexagons(EPSG_ID)
+    column_names = gpkg.field_factory.create_fields_for_layer_type('receptor_hexagons').names()
+    _, srs_id = gpkg.get_geometry_column('receptor_hexagons')
+    rows = []
+    for receptor_id, coords in synthetic_hexagons(count):
+        rows.append([encode_polygon(coords, srs_id), receptor_id, 0, 1.5, 1.0, 0.5])
+        if len(rows) >= BATCH_SIZE:
+            gpkg.bulk_insert('receptor_hexagons', column_names, rows)
+            rows = []
+    gpkg.bulk_insert('receptor_hexagons', column_names, rows)
+    gpkg.finish_bulk_insert()
+
+
+def run(counts):
+    print(f'{"receptors":>10} {"edit buffer (s)":>16} {"bulk insert (s)":>16} {"speedup":>8}')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for count in counts:
+            timings = []
+            for name, write_function in [('edit_buffer', write_edit_buffer), ('bulk', write_bulk)]:
+                gpkg_fn = os.path.join(tmp_dir, f'{name}_{count}.gpkg')
+                start_time = time.perf_counter()
+                write_function(gpkg_fn, count)
+                timings.append(time.perf_counter() - start_time)
+            print(f'{count:>10} {timings[0]:>16.2f} {timings[1]:>16.2f} {timings[0] / timings[1]:>7.1f}x')
+
+
+if __name__ == '__main__':
+    counts = [int(arg) for arg in sys.argv[1:]] or [100000, 1000000, 5000000]
+    run(counts)
+    qgs.exitQgis()
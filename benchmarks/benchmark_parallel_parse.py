@@ -0,0 +1,55 @@
+'''
+Reads a result GML into result tables with an increasing number of worker
+processes and reports MB/s and the speedup over sequential reading for each:
+
+    python3 benchmarks/benchmark_parallel_parse.py result.gml [max processes]
+
+The worker processes are used even where the import would read the file
+sequentially (see get_parse_process_count()), which is reported as well.
+Without a file argument a synthetic file with 1000000 receptors is used.
+'''
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ImaerPlugin.imaer6 import ImaerDocument
+from ImaerPlugin.imaer6.parallel_parse import iter_result_tables_parallel, get_parse_process_count
+from synthetic_gml import write_synthetic_gml
+
+
+def run(gml_fn, max_process_count=None):
+    size_mb = os.path.getsize(gml_fn) / 1024 ** 2
+    print(f'file: {gml_fn} ({size_mb:.1f} MB), {os.cpu_count()} cpus')
+    print(f'the import would use {get_parse_process_count(gml_fn, max_process_count)} processes')
+    max_process_count = max_process_count or os.cpu_count() or 1
+    process_counts = [1]
+    while process_counts[-1] * 2 <= max_process_count:
+        process_counts.append(process_counts[-1] * 2)
+
+    sequential_duration = None
+    for process_count in process_counts:
+        doc = ImaerDocument()
+        start_time = time.perf_counter()
+        if process_count == 1:
+            tables = doc.iter_result_tables(gml_fn)
+        else:
+            tables = iter_result_tables_parallel(doc, gml_fn, process_count)
+        row_count = sum(len(table) for table in tables)
+        duration = time.perf_counter() - start_time
+        if sequential_duration is None:
+            sequential_duration = duration
+        print(f'{process_count:>3} processes: {row_count} rows {duration:8.2f} s {size_mb / duration:8.1f} MB/s {sequential_duration / duration:6.2f}x')
+
+
+if __name__ == '__main__':
+    max_process_count = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    if len(sys.argv) > 1:
+        run(sys.argv[1], max_process_count)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            gml_fn = os.path.join(tmp_dir, 'synthetic.gml')
+            write_synthetic_gml(gml_fn, 1000000)
+            run(gml_fn, max_process_count)
@@ -0,0 +1,68 @@
+'''
+Reports the number of XML elements parsed per second when a result GML is read
+into feature members (ImaerDocument.iter_feature_members) and into result
+tables (ImaerDocument.iter_result_tables), with the qt and the python parser
+backend. Run it on a real result file, on two commits to compare parsers:
+
+    python3 benchmarks/benchmark_parse_elements.py result.gml
+
+Without a file argument a synthetic file with 200000 receptors is used. QGIS
+is not needed, the qt backend needs PyQt5.
+'''
+import os
+import sys
+import time
+import tempfile
+from xml.parsers import expat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ImaerPlugin.imaer6 import ImaerDocument
+from ImaerPlugin.imaer6.parser_backends import get_available_parser_backends
+from synthetic_gml import write_synthetic_gml
+
+
+def count_elements(gml_fn):
+    result = 0
+
+    def start_element(name, attributes):
+        nonlocal result
+        result += 1
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start_element
+    with open(gml_fn, 'rb') as in_file:
+        parser.ParseFile(in_file)
+    return result
+
+
+def read_feature_members(gml_fn, backend_name):
+    for member in ImaerDocument().iter_feature_members(gml_fn, use_qt=backend_name == 'qt'):
+        pass
+
+
+def read_result_tables(gml_fn, backend_name):
+    for table in ImaerDocument().iter_result_tables(gml_fn, parser_backend=backend_name):
+        pass
+
+
+def run(gml_fn):
+    element_count = count_elements(gml_fn)
+    print(f'elements: {element_count}')
+    backend_names = [name for name in ['qt', 'python'] if name in get_available_parser_backends()]
+    for backend_name in backend_names:
+        for name, read_function in [('feature members', read_feature_members), ('result tables', read_result_tables)]:
+            start_time = time.perf_counter()
+            read_function(gml_fn, backend_name)
+            duration = time.perf_counter() - start_time
+            print(f'{backend_name:>6} {name:>16}: {duration:8.2f} s {element_count / duration:12.0f} elements/s')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(sys.argv[1])
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            gml_fn = os.path.join(tmp_dir, 'synthetic.gml')
+            write_synthetic_gml(gml_fn, 200000)
+            run(gml_fn)
@@ -0,0 +1,61 @@
+'''
+Reads a result GML into result tables with every available parser backend,
+reports MB/s for each and checks that all backends produce identical tables.
+
+    python3 benchmarks/benchmark_parser_backends.py result.gml
+
+Without a file argument a synthetic file with 200000 receptors is used.
+'''
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qgis.core import QgsApplication
+
+qgs = QgsApplication([], False)
+qgs.initQgis()
+
+from ImaerPlugin.imaer6 import ImaerDocument
+from ImaerPlugin.imaer6.parser_backends import get_available_parser_backends
+from synthetic_gml import write_synthetic_gml
+
+
+def table_to_tuple(table):
+    return (
+        table.member_type,
+        table.epsg_id,
+        {name: list(values) for name, values in table.columns.items()},
+        list(table.xs),
+        list(table.ys),
+        list(table.hexagon_coords),
+        list(table.hexagon_offsets),
+        {name: [repr(v) for v in values] for name, values in table.results.items()}
+    )
+
+
+def run(gml_fn):
+    size_mb = os.path.getsize(gml_fn) / 1024 ** 2
+    print(f'file: {gml_fn} ({size_mb:.1f} MB)')
+    reference = None
+    for backend_name in get_available_parser_backends():
+        start_time = time.perf_counter()
+        tables = [table_to_tuple(table) for table in ImaerDocument().iter_result_tables(gml_fn, parser_backend=backend_name)]
+        duration = time.perf_counter() - start_time
+        if reference is None:
+            reference = tables
+        identical = 'identical' if tables == reference else 'DIFFERENT'
+        print(f'{backend_name:>8}: {duration:8.2f} s {size_mb / duration:8.1f} MB/s  {identical}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(sys.argv[1])
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            gml_fn = os.path.join(tmp_dir, 'synthetic.gml')
+            write_synthetic_gml(gml_fn, 200000)
+            run(gml_fn)
+    qgs.exitQgis()
@@ -0,0 +1,44 @@
+'''
+Reports the Python memory per parsed receptor when a synthetic result GML is
+read into ImaerDocument.feature_members. Run it on two commits to compare the
+model classes before and after a change:
+
+    python3 benchmarks/benchmark_receptor_memory.py 1000000
+'''
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qgis.core import QgsApplication
+
+qgs = QgsApplication([], False)
+qgs.initQgis()
+
+from ImaerPlugin.imaer6 import ImaerDocument
+from synthetic_gml import write_synthetic_gml
+
+
+def run(receptor_count):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gml_fn = os.path.join(tmp_dir, 'synthetic.gml')
+        write_synthetic_gml(gml_fn, receptor_count)
+
+        tracemalloc.start()
+        doc = ImaerDocument()
+        doc.from_xml_file(gml_fn)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    member_count = len(doc.feature_members)
+    print(f'receptors: {member_count}')
+    print(f'retained: {current / 1024 ** 2:.1f} MB ({current / member_count:.0f} bytes per receptor)')
+    print(f'peak: {peak / 1024 ** 2:.1f} MB ({peak / member_count:.0f} bytes per receptor)')
+
+
+if __name__ == '__main__':
+    receptor_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    run(receptor_count)
+    qgs.exitQgis()
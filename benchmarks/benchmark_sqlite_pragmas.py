@@ -0,0 +1,106 @@
+'''
+Compares writing receptor points and hexagons with sqlite3 under the default
+SQLite settings and under the fast build profile of ImaerGpkg (no journal, no
+syncing, large cache, 16 or 64 KiB pages). The rows are written in 10000-row
+transactions like bulk_insert(), followed by the B-tree indexes on receptor_id
+and ANALYZE like create_indexes(). The R-tree is built by GDAL and not included.
+QGIS is not needed.
+
+    python3 benchmarks/benchmark_sqlite_pragmas.py 2000000
+'''
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ImaerPlugin.gpkg.gpkg_geometry import encode_point, encode_polygon
+from synthetic_gml import hexagon_coords, HEXAGON_RADIUS, HEXAGON_HALF_HEIGHT, ROW_LENGTH
+
+EPSG_ID = 28992
+BATCH_SIZE = 10000
+
+# Copies of fast_build_pragmas and safe_pragmas in ImaerPlugin/gpkg/imaer_gpkg.py,
+# which needs QGIS to import
+fast_build_pragmas = {
+    'journal_mode': 'OFF',
+    'synchronous': 'OFF',
+    'cache_size': -131072,
+    'temp_store': 'MEMORY'
+}
+safe_pragmas = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'cache_size': -2000,
+    'temp_store': 'DEFAULT'
+}
+
+profiles = [
+    ('default settings', safe_pragmas, None),
+    ('fast build, 16 KiB page', fast_build_pragmas, 16384),
+    ('fast build, 64 KiB page', fast_build_pragmas, 65536)
+]
+
+
+def iter_rows(count):
+    for i in range(count):
+        x = 10000 + (i % ROW_LENGTH) * 3 * HEXAGON_RADIUS
+        y = 300000 + (i // ROW_LENGTH) * 2 * HEXAGON_HALF_HEIGHT
+        values = (i + 1, 0, i % 7 / 10, i % 11 / 10, (i % 7 + i % 11) / 10)
+        yield encode_point(x, y, EPSG_ID), encode_polygon(hexagon_coords(x, y), EPSG_ID), values
+
+
+def write(fn, count, pragmas, page_size):
+    conn = sqlite3.connect(fn)
+    if page_size is not None:
+        conn.execute(f'PRAGMA page_size = {page_size};')
+        conn.execute('VACUUM;')
+    for key, value in pragmas.items():
+        conn.execute(f'PRAGMA {key} = {value};')
+
+    columns = 'receptor_id INTEGER, edge_effect INTEGER, deposition_nox REAL, deposition_nh3 REAL, deposition_nox_nh3_sum REAL'
+    for table_name in ['receptor_points', 'receptor_hexagons']:
+        conn.execute(f'CREATE TABLE {table_name} (fid INTEGER PRIMARY KEY AUTOINCREMENT, geom BLOB, {columns});')
+    q = 'INSERT INTO {} (geom, receptor_id, edge_effect, deposition_nox, deposition_nh3, deposition_nox_nh3_sum) VALUES (?, ?, ?, ?, ?, ?);'
+
+    def insert(points, hexagons):
+        with conn:
+            conn.executemany(q.format('receptor_points'), points)
+            conn.executemany(q.format('receptor_hexagons'), hexagons)
+
+    start_time = time.perf_counter()
+    points = []
+    hexagons = []
+    for point, hexagon, values in iter_rows(count):
+        points.append((point, *values))
+        hexagons.append((hexagon, *values))
+        if len(points) >= BATCH_SIZE:
+            insert(points, hexagons)
+            points = []
+            hexagons = []
+    insert(points, hexagons)
+    write_duration = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    with conn:
+        for table_name in ['receptor_points', 'receptor_hexagons']:
+            conn.execute(f'CREATE INDEX idx_{table_name}_receptor_id ON {table_name} (receptor_id);')
+    conn.execute('ANALYZE;')
+    conn.close()
+    return write_duration, time.perf_counter() - start_time
+
+
+def run(count):
+    print(f'receptors: {count}')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for i, (name, pragmas, page_size) in enumerate(profiles):
+            fn = os.path.join(tmp_dir, f'profile_{i}.gpkg')
+            write_duration, index_duration = write(fn, count, pragmas, page_size)
+            size_mb = os.path.getsize(fn) / 1024 ** 2
+            print(f'{name:>24}: write {write_duration:6.1f} s, indexes {index_duration:5.1f} s, {size_mb:7.1f} MB')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000000)
@@ -0,0 +1,101 @@
+'''
+Writes synthetic IMAER 6 calculation result GML files for the benchmarks.
+
+    python3 benchmarks/synthetic_gml.py receptors_1m.gml 1000000
+'''
+import sys
+
+HEXAGON_RADIUS = 62.04
+HEXAGON_HALF_HEIGHT = 53.73
+ROW_LENGTH = 2000
+
+_header = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<imaer:FeatureCollectionCalculator xmlns:imaer="http://imaer.aerius.nl/6.0" xmlns:gml="http://www.opengis.net/gml/3.2" xmlns:xlink="http://www.w3.org/1999/xlink" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" gml:id="NL.IMAER.Collection" xsi:schemaLocation="http://imaer.aerius.nl/6.0 http://imaer.aerius.nl/6.0/IMAER.xsd">
+    <imaer:metadata>
+        <imaer:AeriusCalculatorMetadata>
+            <imaer:project>
+                <imaer:year>2024</imaer:year>
+            </imaer:project>
+            <imaer:situation>
+                <imaer:name>Synthetic</imaer:name>
+                <imaer:reference>synthetic</imaer:reference>
+                <imaer:situationType>PROPOSED</imaer:situationType>
+            </imaer:situation>
+            <imaer:calculation>
+                <imaer:method>FORMAL_ASSESSMENT</imaer:method>
+                <imaer:substance>NOX</imaer:substance>
+                <imaer:substance>NH3</imaer:substance>
+                <imaer:resultType>DEPOSITION</imaer:resultType>
+            </imaer:calculation>
+            <imaer:version>
+                <imaer:aeriusVersion>synthetic</imaer:aeriusVersion>
+                <imaer:databaseVersion>synthetic</imaer:databaseVersion>
+            </imaer:version>
+        </imaer:AeriusCalculatorMetadata>
+    </imaer:metadata>
+'''
+
+_member = '''    <imaer:featureMember>
+        <imaer:ReceptorPoint receptorPointId="{id}" gml:id="CP.{id}">
+            <imaer:identifier>
+                <imaer:NEN3610ID>
+                    <imaer:namespace>NL.IMAER</imaer:namespace>
+                    <imaer:localId>CP.{id}</imaer:localId>
+                </imaer:NEN3610ID>
+            </imaer:identifier>
+            <imaer:GM_Point>
+                <gml:Point srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.{id}.POINT">
+                    <gml:pos>{x:.1f} {y:.1f}</gml:pos>
+                </gml:Point>
+            </imaer:GM_Point>
+            <imaer:representation>
+                <gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.{id}.SURFACE">
+                    <gml:exterior>
+                        <gml:LinearRing>
+                            <gml:posList>{pos_list}</gml:posList>
+                        </gml:LinearRing>
+                    </gml:exterior>
+                </gml:Polygon>
+            </imaer:representation>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NOX">
+                    <imaer:value>{nox:.6f}</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NH3">
+                    <imaer:value>{nh3:.6f}</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:edgeEffect>false</imaer:edgeEffect>
+        </imaer:ReceptorPoint>
+    </imaer:featureMember>
+'''
+
+_footer = '''</imaer:FeatureCollectionCalculator>
+'''
+
+
+def hexagon_coords(x, y):
+    r = HEXAGON_RADIUS
+    h = HEXAGON_HALF_HEIGHT
+    return [
+        x + r, y, x + r / 2, y + h, x - r / 2, y + h, x - r, y,
+        x - r / 2, y - h, x + r / 2, y - h, x + r, y
+    ]
+
+
+def write_synthetic_gml(fn, receptor_count):
+    with open(fn, 'w', encoding='utf-8') as out_file:
+        out_file.write(_header)
+        for i in range(receptor_count):
+            receptor_id = i + 1
+            x = 10000 + (i % ROW_LENGTH) * 3 * HEXAGON_RADIUS
+            y = 300000 + (i // ROW_LENGTH) * 2 * HEXAGON_HALF_HEIGHT
+            pos_list = ' '.join(f'{v:.3f}' for v in hexagon_coords(x, y))
+            out_file.write(_member.format(id=receptor_id, x=x, y=y, pos_list=pos_list, nox=i % 7 / 10, nh3=i % 11 / 10))
+        out_file.write(_footer)
+
+
+if __name__ == '__main__':
+    write_synthetic_gml(sys.argv[1], int(sys.argv[2]))
@@ -0,0 +1,445 @@
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<imaer:FeatureCollectionCalculator xmlns:imaer="http://imaer.aerius.nl/6.0" xmlns:gml="http://www.opengis.net/gml/3.2" xmlns:xlink="http://www.w3.org/1999/xlink" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" gml:id="NL.IMAER.Collection" xsi:schemaLocation="http://imaer.aerius.nl/6.0 http://imaer.aerius.nl/6.0/IMAER.xsd">
+    <imaer:metadata>
+        <imaer:AeriusCalculatorMetadata>
+            <imaer:project>
+                <imaer:year>2024</imaer:year>
+            </imaer:project>
+            <imaer:situation>
+                <imaer:name>Hexagon fixture</imaer:name>
+                <imaer:reference>hexagons</imaer:reference>
+                <imaer:situationType>PROPOSED</imaer:situationType>
+            </imaer:situation>
+            <imaer:calculation>
+                <imaer:method>FORMAL_ASSESSMENT</imaer:method>
+                <imaer:substance>NOX</imaer:substance>
+                <imaer:substance>NH3</imaer:substance>
+                <imaer:resultType>DEPOSITION</imaer:resultType>
+            </imaer:calculation>
+            <imaer:version>
+                <imaer:aeriusVersion>fixture</imaer:aeriusVersion>
+                <imaer:databaseVersion>fixture</imaer:databaseVersion>
+            </imaer:version>
+        </imaer:AeriusCalculatorMetadata>
+    </imaer:metadata>
+    <imaer:featureMember>
+        <imaer:ReceptorPoint receptorPointId="4776050" gml:id="CP.4776050">
+            <imaer:identifier>
+                <imaer:NEN3610ID>
+                    <imaer:namespace>NL.IMAER</imaer:namespace>
+                    <imaer:localId>CP.4776050</imaer:localId>
+                </imaer:NEN3610ID>
+            </imaer:identifier>
+            <imaer:GM_Point>
+                <gml:Point srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4776050.POINT">
+                    <gml:pos>155000.000 463000.000</gml:pos>
+                </gml:Point>
+            </imaer:GM_Point>
+            <imaer:representation>
+                <gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4776050.SURFACE">
+                    <gml:exterior>
+                        <gml:LinearRing>
+                            <gml:posList>154968.980 462946.272 154937.960 463000.000 154968.980 463053.728 155031.020 463053.728 155062.040 463000.000 155031.020 462946.272 154968.980 462946.272</gml:posList>
+                        </gml:LinearRing>
+                    </gml:exterior>
+                </gml:Polygon>
+            </imaer:representation>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NOX">
+                    <imaer:value>0.000000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NH3">
+                    <imaer:value>0.000000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:edgeEffect>false</imaer:edgeEffect>
+        </imaer:ReceptorPoint>
+    </imaer:featureMember>
+    <imaer:featureMember>
+        <imaer:ReceptorPoint receptorPointId="4776051" gml:id="CP.4776051">
+            <imaer:identifier>
+                <imaer:NEN3610ID>
+                    <imaer:namespace>NL.IMAER</imaer:namespace>
+                    <imaer:localId>CP.4776051</imaer:localId>
+                </imaer:NEN3610ID>
+            </imaer:identifier>
+            <imaer:GM_Point>
+                <gml:Point srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4776051.POINT">
+                    <gml:pos>155093.060 463053.728</gml:pos>
+                </gml:Point>
+            </imaer:GM_Point>
+            <imaer:representation>
+                <gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4776051.SURFACE">
+                    <gml:exterior>
+                        <gml:LinearRing>
+                            <gml:posList>155062.040 463000.000 155031.020 463053.728 155062.040 463107.456 155124.080 463107.456 155155.100 463053.728 155124.080 463000.000 155062.040 463000.000</gml:posList>
+                        </gml:LinearRing>
+                    </gml:exterior>
+                </gml:Polygon>
+            </imaer:representation>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NOX">
+                    <imaer:value>0.100000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NH3">
+                    <imaer:value>0.100000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:edgeEffect>false</imaer:edgeEffect>
+        </imaer:ReceptorPoint>
+    </imaer:featureMember>
+    <imaer:featureMember>
+        <imaer:ReceptorPoint receptorPointId="4776052" gml:id="CP.4776052">
+            <imaer:identifier>
+                <imaer:NEN3610ID>
+                    <imaer:namespace>NL.IMAER</imaer:namespace>
+                    <imaer:localId>CP.4776052</imaer:localId>
+                </imaer:NEN3610ID>
+            </imaer:identifier>
+            <imaer:GM_Point>
+                <gml:Point srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4776052.POINT">
+                    <gml:pos>155186.121 463000.000</gml:pos>
+                </gml:Point>
+            </imaer:GM_Point>
+            <imaer:representation>
+                <gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4776052.SURFACE">
+                    <gml:exterior>
+                        <gml:LinearRing>
+                            <gml:posList>155155.101 462946.272 155124.081 463000.000 155155.101 463053.728 155217.141 463053.728 155248.161 463000.000 155217.141 462946.272 155155.101 462946.272</gml:posList>
+                        </gml:LinearRing>
+                    </gml:exterior>
+                </gml:Polygon>
+            </imaer:representation>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NOX">
+                    <imaer:value>0.200000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NH3">
+                    <imaer:value>0.200000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:edgeEffect>false</imaer:edgeEffect>
+        </imaer:ReceptorPoint>
+    </imaer:featureMember>
+    <imaer:featureMember>
+        <imaer:ReceptorPoint receptorPointId="4776053" gml:id="CP.4776053">
+            <imaer:identifier>
+                <imaer:NEN3610ID>
+                    <imaer:namespace>NL.IMAER</imaer:namespace>
+                    <imaer:localId>CP.4776053</imaer:localId>
+                </imaer:NEN3610ID>
+            </imaer:identifier>
+            <imaer:GM_Point>
+                <gml:Point srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4776053.POINT">
+                    <gml:pos>155279.181 463053.728</gml:pos>
+                </gml:Point>
+            </imaer:GM_Point>
+            <imaer:representation>
+                <gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4776053.SURFACE">
+                    <gml:exterior>
+                        <gml:LinearRing>
+                            <gml:posList>155248.161 463000.000 155217.141 463053.728 155248.161 463107.456 155310.201 463107.456 155341.221 463053.728 155310.201 463000.000 155248.161 463000.000</gml:posList>
+                        </gml:LinearRing>
+                    </gml:exterior>
+                </gml:Polygon>
+            </imaer:representation>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NOX">
+                    <imaer:value>0.300000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NH3">
+                    <imaer:value>0.300000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:edgeEffect>false</imaer:edgeEffect>
+        </imaer:ReceptorPoint>
+    </imaer:featureMember>
+    <imaer:featureMember>
+        <imaer:ReceptorPoint receptorPointId="4779108" gml:id="CP.4779108">
+            <imaer:identifier>
+                <imaer:NEN3610ID>
+                    <imaer:namespace>NL.IMAER</imaer:namespace>
+                    <imaer:localId>CP.4779108</imaer:localId>
+                </imaer:NEN3610ID>
+            </imaer:identifier>
+            <imaer:GM_Point>
+                <gml:Point srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4779108.POINT">
+                    <gml:pos>155000.000 463107.457</gml:pos>
+                </gml:Point>
+            </imaer:GM_Point>
+            <imaer:representation>
+                <gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4779108.SURFACE">
+                    <gml:exterior>
+                        <gml:LinearRing>
+                            <gml:posList>154968.980 463053.729 154937.960 463107.457 154968.980 463161.185 155031.020 463161.185 155062.040 463107.457 155031.020 463053.729 154968.980 463053.729</gml:posList>
+                        </gml:LinearRing>
+                    </gml:exterior>
+                </gml:Polygon>
+            </imaer:representation>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NOX">
+                    <imaer:value>0.400000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NH3">
+                    <imaer:value>0.400000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:edgeEffect>false</imaer:edgeEffect>
+        </imaer:ReceptorPoint>
+    </imaer:featureMember>
+    <imaer:featureMember>
+        <imaer:ReceptorPoint receptorPointId="4779109" gml:id="CP.4779109">
+            <imaer:identifier>
+                <imaer:NEN3610ID>
+                    <imaer:namespace>NL.IMAER</imaer:namespace>
+                    <imaer:localId>CP.4779109</imaer:localId>
+                </imaer:NEN3610ID>
+            </imaer:identifier>
+            <imaer:GM_Point>
+                <gml:Point srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4779109.POINT">
+                    <gml:pos>155093.060 463161.185</gml:pos>
+                </gml:Point>
+            </imaer:GM_Point>
+            <imaer:representation>
+                <gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4779109.SURFACE">
+                    <gml:exterior>
+                        <gml:LinearRing>
+                            <gml:posList>155062.040 463107.457 155031.020 463161.185 155062.040 463214.913 155124.080 463214.913 155155.100 463161.185 155124.080 463107.457 155062.040 463107.457</gml:posList>
+                        </gml:LinearRing>
+                    </gml:exterior>
+                </gml:Polygon>
+            </imaer:representation>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NOX">
+                    <imaer:value>0.500000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NH3">
+                    <imaer:value>0.500000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:edgeEffect>false</imaer:edgeEffect>
+        </imaer:ReceptorPoint>
+    </imaer:featureMember>
+    <imaer:featureMember>
+        <imaer:ReceptorPoint receptorPointId="4779110" gml:id="CP.4779110">
+            <imaer:identifier>
+                <imaer:NEN3610ID>
+                    <imaer:namespace>NL.IMAER</imaer:namespace>
+                    <imaer:localId>CP.4779110</imaer:localId>
+                </imaer:NEN3610ID>
+            </imaer:identifier>
+            <imaer:GM_Point>
+                <gml:Point srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4779110.POINT">
+                    <gml:pos>155186.121 463107.457</gml:pos>
+                </gml:Point>
+            </imaer:GM_Point>
+            <imaer:representation>
+                <gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4779110.SURFACE">
+                    <gml:exterior>
+                        <gml:LinearRing>
+                            <gml:posList>155155.101 463053.729 155124.081 463107.457 155155.101 463161.185 155217.141 463161.185 155248.161 463107.457 155217.141 463053.729 155155.101 463053.729</gml:posList>
+                        </gml:LinearRing>
+                    </gml:exterior>
+                </gml:Polygon>
+            </imaer:representation>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NOX">
+                    <imaer:value>0.600000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NH3">
+                    <imaer:value>0.600000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:edgeEffect>false</imaer:edgeEffect>
+        </imaer:ReceptorPoint>
+    </imaer:featureMember>
+    <imaer:featureMember>
+        <imaer:ReceptorPoint receptorPointId="4779111" gml:id="CP.4779111">
+            <imaer:identifier>
+                <imaer:NEN3610ID>
+                    <imaer:namespace>NL.IMAER</imaer:namespace>
+                    <imaer:localId>CP.4779111</imaer:localId>
+                </imaer:NEN3610ID>
+            </imaer:identifier>
+            <imaer:GM_Point>
+                <gml:Point srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4779111.POINT">
+                    <gml:pos>155279.181 463161.185</gml:pos>
+                </gml:Point>
+            </imaer:GM_Point>
+            <imaer:representation>
+                <gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4779111.SURFACE">
+                    <gml:exterior>
+                        <gml:LinearRing>
+                            <gml:posList>155248.161 463107.457 155217.141 463161.185 155248.161 463214.913 155310.201 463214.913 155341.221 463161.185 155310.201 463107.457 155248.161 463107.457</gml:posList>
+                        </gml:LinearRing>
+                    </gml:exterior>
+                </gml:Polygon>
+            </imaer:representation>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NOX">
+                    <imaer:value>0.000000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NH3">
+                    <imaer:value>0.700000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:edgeEffect>false</imaer:edgeEffect>
+        </imaer:ReceptorPoint>
+    </imaer:featureMember>
+    <imaer:featureMember>
+        <imaer:ReceptorPoint receptorPointId="4782166" gml:id="CP.4782166">
+            <imaer:identifier>
+                <imaer:NEN3610ID>
+                    <imaer:namespace>NL.IMAER</imaer:namespace>
+                    <imaer:localId>CP.4782166</imaer:localId>
+                </imaer:NEN3610ID>
+            </imaer:identifier>
+            <imaer:GM_Point>
+                <gml:Point srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4782166.POINT">
+                    <gml:pos>155000.000 463214.914</gml:pos>
+                </gml:Point>
+            </imaer:GM_Point>
+            <imaer:representation>
+                <gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4782166.SURFACE">
+                    <gml:exterior>
+                        <gml:LinearRing>
+                            <gml:posList>154968.980 463161.186 154937.960 463214.914 154968.980 463268.642 155031.020 463268.642 155062.040 463214.914 155031.020 463161.186 154968.980 463161.186</gml:posList>
+                        </gml:LinearRing>
+                    </gml:exterior>
+                </gml:Polygon>
+            </imaer:representation>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NOX">
+                    <imaer:value>0.100000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NH3">
+                    <imaer:value>0.800000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:edgeEffect>false</imaer:edgeEffect>
+        </imaer:ReceptorPoint>
+    </imaer:featureMember>
+    <imaer:featureMember>
+        <imaer:ReceptorPoint receptorPointId="4782167" gml:id="CP.4782167">
+            <imaer:identifier>
+                <imaer:NEN3610ID>
+                    <imaer:namespace>NL.IMAER</imaer:namespace>
+                    <imaer:localId>CP.4782167</imaer:localId>
+                </imaer:NEN3610ID>
+            </imaer:identifier>
+            <imaer:GM_Point>
+                <gml:Point srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4782167.POINT">
+                    <gml:pos>155093.060 463268.642</gml:pos>
+                </gml:Point>
+            </imaer:GM_Point>
+            <imaer:representation>
+                <gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4782167.SURFACE">
+                    <gml:exterior>
+                        <gml:LinearRing>
+                            <gml:posList>155062.040 463214.914 155031.020 463268.642 155062.040 463322.370 155124.080 463322.370 155155.100 463268.642 155124.080 463214.914 155062.040 463214.914</gml:posList>
+                        </gml:LinearRing>
+                    </gml:exterior>
+                </gml:Polygon>
+            </imaer:representation>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NOX">
+                    <imaer:value>0.200000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NH3">
+                    <imaer:value>0.900000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:edgeEffect>false</imaer:edgeEffect>
+        </imaer:ReceptorPoint>
+    </imaer:featureMember>
+    <imaer:featureMember>
+        <imaer:ReceptorPoint receptorPointId="4782168" gml:id="CP.4782168">
+            <imaer:identifier>
+                <imaer:NEN3610ID>
+                    <imaer:namespace>NL.IMAER</imaer:namespace>
+                    <imaer:localId>CP.4782168</imaer:localId>
+                </imaer:NEN3610ID>
+            </imaer:identifier>
+            <imaer:GM_Point>
+                <gml:Point srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4782168.POINT">
+                    <gml:pos>155186.121 463214.914</gml:pos>
+                </gml:Point>
+            </imaer:GM_Point>
+            <imaer:representation>
+                <gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4782168.SURFACE">
+                    <gml:exterior>
+                        <gml:LinearRing>
+                            <gml:posList>155155.101 463161.186 155124.081 463214.914 155155.101 463268.642 155217.141 463268.642 155248.161 463214.914 155217.141 463161.186 155155.101 463161.186</gml:posList>
+                        </gml:LinearRing>
+                    </gml:exterior>
+                </gml:Polygon>
+            </imaer:representation>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NOX">
+                    <imaer:value>0.300000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NH3">
+                    <imaer:value>1.000000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:edgeEffect>false</imaer:edgeEffect>
+        </imaer:ReceptorPoint>
+    </imaer:featureMember>
+    <imaer:featureMember>
+        <imaer:ReceptorPoint receptorPointId="4782169" gml:id="CP.4782169">
+            <imaer:identifier>
+                <imaer:NEN3610ID>
+                    <imaer:namespace>NL.IMAER</imaer:namespace>
+                    <imaer:localId>CP.4782169</imaer:localId>
+                </imaer:NEN3610ID>
+            </imaer:identifier>
+            <imaer:GM_Point>
+                <gml:Point srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4782169.POINT">
+                    <gml:pos>155279.181 463268.642</gml:pos>
+                </gml:Point>
+            </imaer:GM_Point>
+            <imaer:representation>
+                <gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992" gml:id="CP.4782169.SURFACE">
+                    <gml:exterior>
+                        <gml:LinearRing>
+                            <gml:posList>155248.161 463214.914 155217.141 463268.642 155248.161 463322.370 155310.201 463322.370 155341.221 463268.642 155310.201 463214.914 155248.161 463214.914</gml:posList>
+                        </gml:LinearRing>
+                    </gml:exterior>
+                </gml:Polygon>
+            </imaer:representation>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NOX">
+                    <imaer:value>0.400000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:result>
+                <imaer:CalculationResult resultType="DEPOSITION" substance="NH3">
+                    <imaer:value>0.000000</imaer:value>
+                </imaer:CalculationResult>
+            </imaer:result>
+            <imaer:edgeEffect>false</imaer:edgeEffect>
+        </imaer:ReceptorPoint>
+    </imaer:featureMember>
+</imaer:FeatureCollectionCalculator>
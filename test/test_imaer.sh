@@ -11,3 +11,4 @@ echo ${LD_LIBRARY_PATH}
 
 #python connect/test.py
 python3 -m unittest test_imaer_generate
+python3 -m unittest test_xml_reading test_result_import test_parallel_parse test_receptor_catalog
@@ -0,0 +1,129 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Runs without QGIS
+test_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(test_dir, '..'))
+sys.path.append(os.path.join(test_dir, '..', 'benchmarks'))
+
+from synthetic_gml import write_synthetic_gml
+
+from ImaerPlugin.imaer6 import ImaerDocument
+from ImaerPlugin.imaer6.gml_file import GmlParseError
+from ImaerPlugin.imaer6.parallel_parse import (
+    find_feature_member_ranges,
+    get_fragment_start_tag,
+    iter_result_tables_parallel,
+    read_range_tables
+)
+
+_receptor_count = 200
+_feature_collection_end = b'</imaer:FeatureCollectionCalculator>\n'
+
+# Allowed after the featureMembers by FeatureCollectionCalculatorType in IMAER_6.0.0.xsd
+_definitions = b'''    <imaer:definitions>
+        <imaer:Definitions>
+            <imaer:customAdditionalHabitatType>
+                <imaer:name>featureMember</imaer:name>
+            </imaer:customAdditionalHabitatType>
+        </imaer:Definitions>
+    </imaer:definitions>
+'''
+
+
+class TestParallelParse(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.gml_fn = cls.get_fn('receptors.gml')
+        write_synthetic_gml(cls.gml_fn, _receptor_count)
+        with open(cls.gml_fn, 'rb') as in_file:
+            cls.gml_data = in_file.read()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    @classmethod
+    def get_fn(cls, name):
+        return os.path.join(cls.temp_dir.name, name)
+
+    def write_variant(self, name, tail):
+        '''Writes the GML with another tail after the last featureMember.'''
+        fn = self.get_fn(name)
+        data = self.gml_data[:-len(_feature_collection_end)] + tail
+        with open(fn, 'wb') as out_file:
+            out_file.write(data)
+        return fn
+
+    def read_receptor_ids(self, fn, range_size=4096):
+        '''Reads the byte ranges one after the other, like the worker processes.'''
+        doc = ImaerDocument()
+        doc.peek_header(fn)
+        receptor_ids = []
+        for start, end in find_feature_member_ranges(fn, range_size):
+            self.assertLess(start, end)
+            for table in read_range_tables(fn, start, end, get_fragment_start_tag(doc.namespaces), 'python'):
+                receptor_ids.extend(table.columns['receptor_id'])
+        return receptor_ids
+
+    def test_ranges(self):
+        ranges = find_feature_member_ranges(self.gml_fn, 4096)
+        self.assertGreater(len(ranges), 10)
+        for (_, end), (next_start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, next_start)
+        self.assertTrue(self.gml_data[ranges[0][0]:].startswith(b'<imaer:featureMember>'))
+        self.assertTrue(self.gml_data[:ranges[-1][1]].endswith(b'</imaer:featureMember>'))
+        self.assertEqual(self.read_receptor_ids(self.gml_fn), list(range(1, _receptor_count + 1)))
+
+    def test_definitions_tail(self):
+        fn = self.write_variant('definitions.gml', _definitions + _feature_collection_end)
+        self.assertEqual(self.read_receptor_ids(fn), list(range(1, _receptor_count + 1)))
+        sequential_ids = [member.local_id for member in ImaerDocument().iter_feature_members(fn)]
+        self.assertEqual(sequential_ids, [str(i) for i in range(1, _receptor_count + 1)])
+
+    def test_comment_and_processing_instruction_tail(self):
+        tail = b'    <!-- no more members -->\n    <?imaer-test done?>\n' + _feature_collection_end + b'<!-- end -->\n'
+        fn = self.write_variant('comment.gml', tail)
+        self.assertEqual(len(self.read_receptor_ids(fn)), _receptor_count)
+
+    def test_truncated_tail(self):
+        for name, tail in [
+            ('no_end_tag.gml', b''),
+            ('truncated_end_tag.gml', b'</imaer:FeatureCollectionCalc'),
+            ('truncated_definitions.gml', _definitions[:-40]),
+            ('wrong_end_tag.gml', b'</imaer:definitions>\n' + _feature_collection_end)
+        ]:
+            fn = self.write_variant(name, tail)
+            with self.assertRaises(GmlParseError, msg=name):
+                find_feature_member_ranges(fn, 4096)
+
+    def test_truncated_member(self):
+        fn = self.get_fn('truncated_member.gml')
+        with open(fn, 'wb') as out_file:
+            out_file.write(self.gml_data[:len(self.gml_data) // 2])
+        with self.assertRaises(GmlParseError):
+            find_feature_member_ranges(fn, 4096)
+        with self.assertRaises(GmlParseError):
+            for _ in ImaerDocument().iter_feature_members(fn):
+                pass
+        with self.assertRaises(GmlParseError):
+            for _ in ImaerDocument().iter_result_tables(fn, parser_backend='python'):
+                pass
+
+    def test_worker_processes(self):
+        '''Same receptors in the same order as reading sequentially.'''
+        doc = ImaerDocument()
+        doc.bytes_total = len(self.gml_data)
+        tables = list(iter_result_tables_parallel(doc, self.gml_fn, 2, parser_backend='python', range_size=16 * 1024))
+        receptor_ids = [receptor_id for table in tables for receptor_id in table.columns['receptor_id']]
+        self.assertEqual(receptor_ids, list(range(1, _receptor_count + 1)))
+        self.assertEqual(doc.bytes_read, find_feature_member_ranges(self.gml_fn)[-1][1])
+        self.assertEqual(doc.get_situation_name(), 'Synthetic')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+
+# Runs without QGIS
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ImaerPlugin.gpkg.layer_config import get_catalog_join_query, get_values_table_name
+
+
+class TestCatalogJoinQuery(unittest.TestCase):
+    '''Two imports with disjoint receptors, in the same id range, sharing one
+    receptor catalog.'''
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.catalog_fn = os.path.join(self.temp_dir.name, 'catalog.gpkg')
+        conn = sqlite3.connect(self.catalog_fn)
+        conn.execute('CREATE TABLE receptor_hexagons (receptor_id INTEGER PRIMARY KEY, geom BLOB);')
+        conn.executemany('INSERT INTO receptor_hexagons VALUES (?, ?);', [(i, f'hexagon {i}'.encode()) for i in range(1, 101)])
+        conn.commit()
+        conn.close()
+
+        self.values_table_name = get_values_table_name('receptor_hexagons')
+        self.imports = {
+            'odd': [(i, i / 10) for i in range(1, 101, 2)],
+            'low_even': [(i, i / 100) for i in range(2, 40, 2)]
+        }
+        self.result_fns = {}
+        for name, rows in self.imports.items():
+            fn = os.path.join(self.temp_dir.name, f'{name}.gpkg')
+            conn = sqlite3.connect(fn)
+            conn.execute(f'CREATE TABLE "{self.values_table_name}" (ogc_fid INTEGER PRIMARY KEY, receptor_id INTEGER, deposition_nox REAL);')
+            conn.executemany(f'INSERT INTO "{self.values_table_name}" (receptor_id, deposition_nox) VALUES (?, ?);', rows)
+            conn.commit()
+            conn.close()
+            self.result_fns[name] = fn
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def read_joined_layer(self, name):
+        conn = sqlite3.connect(self.result_fns[name])
+        try:
+            conn.execute('ATTACH DATABASE ? AS shared;', (self.catalog_fn,))
+            conn.execute('CREATE TEMP VIEW catalog AS SELECT receptor_id, geom AS geometry FROM shared.receptor_hexagons;')
+            q = get_catalog_join_query(['deposition_nox'], values_table=self.values_table_name)
+            return conn.execute(q).fetchall()
+        finally:
+            conn.close()
+
+    def test_only_imported_receptors(self):
+        for name, rows in self.imports.items():
+            features = self.read_joined_layer(name)
+            self.assertEqual(len(features), len(rows))
+            self.assertEqual(
+                sorted((receptor_id, value) for _, receptor_id, value, _ in features),
+                sorted(rows)
+            )
+
+    def test_geometries_from_catalog(self):
+        for _, receptor_id, _, geometry in self.read_joined_layer('low_even'):
+            self.assertEqual(geometry, f'hexagon {receptor_id}'.encode())
+            self.assertEqual(receptor_id % 2, 0)
+            self.assertLess(receptor_id, 40)
+
+    def test_value_columns(self):
+        q = get_catalog_join_query(['situation_id', 'deposition_nox'])
+        self.assertIn('v."situation_id"', q)
+        self.assertIn('JOIN "catalog" c ON c.receptor_id = v.receptor_id', q)
+        self.assertNotIn('LEFT', q.upper())
+
+
+if __name__ == '__main__':
+    unittest.main()
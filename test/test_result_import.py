@@ -0,0 +1,253 @@
+import os
+import sys
+import math
+import struct
+import tempfile
+import unittest
+
+# Runs without QGIS
+test_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(test_dir, '..'))
+sys.path.append(os.path.join(test_dir, '..', 'benchmarks'))
+
+from synthetic_gml import write_synthetic_gml, hexagon_coords, HEXAGON_RADIUS
+
+from ImaerPlugin.imaer6 import ImaerDocument, ReceptorResultTable
+from ImaerPlugin.imaer6.hexagons import create_hexagon_coords, hexagons_match
+from ImaerPlugin.imaer6.parser_backends import get_available_parser_backends
+from ImaerPlugin.imaer6.spatial_filter import SpatialFilter, PreparedPolygon
+from ImaerPlugin.gpkg.gpkg_geometry import encode_point, encode_polygon, get_envelope
+from ImaerPlugin.gpkg.layer_config import ResultProjection, get_layer_field_names
+
+_receptor_count = 30
+
+
+def get_receptor_x(i):
+    return 10000 + i * 3 * HEXAGON_RADIUS
+
+
+class TestHexagonFixture(unittest.TestCase):
+    '''Hexagons in input/receptor_hexagons.gml start at another vertex and run
+    the other way round than the synthesized ones.'''
+
+    def test_compare_hexagons(self):
+        fn = os.path.join(test_dir, 'input', 'receptor_hexagons.gml')
+        for backend in get_available_parser_backends():
+            tables = list(ImaerDocument().iter_result_tables(fn, parser_backend=backend))
+            self.assertEqual(len(tables), 1, backend)
+            self.assertEqual(tables[0].compare_hexagons(), (12, []), backend)
+
+
+class TestGpkgGeometry(unittest.TestCase):
+
+    def test_point(self):
+        blob = encode_point(1.5, 2.5, 28992)
+        self.assertEqual(blob[:2], b'GP')
+        self.assertEqual(struct.unpack_from('<i', blob, 4)[0], 28992)
+        self.assertEqual(get_envelope(blob), (1.5, 1.5, 2.5, 2.5))
+        self.assertEqual(struct.unpack_from('<BIdd', blob, 40), (1, 1, 1.5, 2.5))
+
+    def test_polygon(self):
+        coords = [0, 0, 2, 0, 2, 3, 0, 0]
+        blob = encode_polygon(coords, 28992)
+        self.assertEqual(get_envelope(blob), (0, 2, 0, 3))
+        byte_order, wkb_type, ring_count, point_count = struct.unpack_from('<BIII', blob, 40)
+        self.assertEqual((byte_order, wkb_type, ring_count, point_count), (1, 3, 1, 4))
+        self.assertEqual(list(struct.unpack_from('<8d', blob, 53)), coords)
+
+    def test_empty(self):
+        self.assertIsNone(get_envelope(None))
+        self.assertIsNone(get_envelope(b'GP'))
+
+
+class TestHexagons(unittest.TestCase):
+
+    def test_synthesized_hexagons(self):
+        xs = [10000.0, 10186.12]
+        ys = [300000.0, 300107.46]
+        coords, offsets = create_hexagon_coords(xs, ys)
+        self.assertEqual(list(offsets), [0, 14, 28])
+        for i in range(2):
+            ring = coords[offsets[i]:offsets[i + 1]]
+            self.assertEqual((ring[0], ring[1]), (ring[-2], ring[-1]))
+            self.assertTrue(hexagons_match(ring, hexagon_coords(xs[i], ys[i]), tolerance=0.01))
+
+    def test_surface_per_zoom_level(self):
+        for zoom_level, surface in [(1, 10000), (2, 40000)]:
+            coords, _ = create_hexagon_coords([0.0], [0.0], zoom_level)
+            area = 0.5 * abs(sum(
+                coords[i] * coords[i + 3] - coords[i + 2] * coords[i + 1] for i in range(0, len(coords) - 2, 2)
+            ))
+            self.assertAlmostEqual(area, surface, delta=1)
+
+    def test_match_ignores_start_vertex(self):
+        ring = hexagon_coords(0, 0)
+        rotated = ring[4:-2] + ring[:4] + ring[4:6]
+        self.assertTrue(hexagons_match(ring, rotated))
+        shifted = [v + 1 for v in ring]
+        self.assertFalse(hexagons_match(ring, shifted))
+
+
+class TestSpatialFilter(unittest.TestCase):
+
+    def test_bbox(self):
+        spatial_filter = SpatialFilter(bbox=(0, 0, 10, 10), epsg_id=28992)
+        self.assertEqual(spatial_filter.epsg_id, '28992')
+        self.assertTrue(spatial_filter.contains(5, 5))
+        self.assertFalse(spatial_filter.contains(11, 5))
+
+    def test_polygon_with_hole(self):
+        exterior = [0, 0, 10, 0, 10, 10, 0, 10, 0, 0]
+        hole = [4, 4, 6, 4, 6, 6, 4, 6, 4, 4]
+        spatial_filter = SpatialFilter(polygons=[[exterior, hole]])
+        self.assertEqual(spatial_filter.bbox, (0.0, 0.0, 10.0, 10.0))
+        self.assertTrue(spatial_filter.contains(2, 2))
+        self.assertFalse(spatial_filter.contains(5, 5))
+        self.assertFalse(spatial_filter.contains(-1, 5))
+
+    def test_bands(self):
+        # A triangle, with many bands for few edges
+        polygon = PreparedPolygon([[0, 0, 10, 0, 0, 10]], band_count=50)
+        self.assertTrue(polygon.contains(1, 1))
+        self.assertFalse(polygon.contains(9, 9))
+
+    def test_fingerprint(self):
+        self.assertEqual(SpatialFilter(bbox=(0, 0, 1, 1)).fingerprint, SpatialFilter(bbox=(0, 0, 1, 1)).fingerprint)
+        self.assertNotEqual(SpatialFilter(bbox=(0, 0, 1, 1)).fingerprint, SpatialFilter(bbox=(0, 0, 2, 1)).fingerprint)
+
+
+class TestResultProjection(unittest.TestCase):
+
+    def test_all(self):
+        projection = ResultProjection()
+        self.assertTrue(projection.keeps_layer_type('receptor_hexagons'))
+        self.assertEqual(
+            get_layer_field_names('receptor_hexagons', projection=projection),
+            get_layer_field_names('receptor_hexagons')
+        )
+
+    def test_substance(self):
+        projection = ResultProjection(substances=['NH3'])
+        self.assertEqual(
+            get_layer_field_names('receptor_hexagons', value_fields_only=True, projection=projection),
+            ['deposition_nh3']
+        )
+        # The sum needs both substances
+        self.assertFalse(projection.keeps_field('deposition_nox_nh3_sum'))
+        self.assertEqual(projection.get_result_names(['receptor_hexagons']), {'deposition_nh3'})
+
+    def test_layer_types(self):
+        projection = ResultProjection(layer_types=['receptor_points'], result_types=['deposition'])
+        self.assertFalse(projection.keeps_layer_type('receptor_hexagons'))
+        # Receptor points have no deposition fields
+        self.assertFalse(projection.keeps_layer_type('receptor_points'))
+        self.assertTrue(ResultProjection(result_types=['deposition']).keeps_layer_type('sub_points'))
+
+    def test_unknown_names(self):
+        for kwargs in [{'layer_types': ['receptor_hexagon']}, {'result_types': ['depositions']}, {'substances': ['NH4']}]:
+            with self.assertRaises(ValueError, msg=kwargs):
+                ResultProjection(**kwargs)
+        ResultProjection(substances=['NH3', 'PM25'])
+
+
+class TestReceptorResultTable(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.gml_fn = os.path.join(cls.temp_dir.name, 'receptors.gml')
+        write_synthetic_gml(cls.gml_fn, _receptor_count)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def read_tables(self, **kwargs):
+        kwargs.setdefault('parser_backend', 'python')
+        return list(ImaerDocument().iter_result_tables(self.gml_fn, **kwargs))
+
+    def test_backends(self):
+        for backend in get_available_parser_backends():
+            tables = self.read_tables(parser_backend=backend)
+            self.assertEqual(len(tables), 1, backend)
+            table = tables[0]
+            self.assertEqual(table.member_type, 'ReceptorPoint')
+            self.assertEqual(len(table), _receptor_count)
+            self.assertEqual(table.epsg_id, '28992')
+            self.assertEqual(list(table.columns['receptor_id']), list(range(1, _receptor_count + 1)))
+            self.assertEqual(table.get_column_values('edge_effect'), [0] * _receptor_count)
+            self.assertAlmostEqual(table.xs[2], get_receptor_x(2), places=1)
+            self.assertAlmostEqual(table.results['deposition_nox'][3], 0.3)
+            self.assertAlmostEqual(table.results['deposition_nh3'][3], 0.3)
+            self.assertAlmostEqual(table.get_column_values('deposition_nox_nh3_sum')[3], 0.6)
+            # The synthetic points are rounded to 0.1 m, the hexagons are not
+            self.assertEqual(table.compare_hexagons(tolerance=0.1), (_receptor_count, []))
+
+    def test_chunks(self):
+        tables = self.read_tables(chunk_size=8)
+        self.assertEqual([len(table) for table in tables], [8, 8, 8, 6])
+        self.assertEqual(tables[1].columns['receptor_id'][0], 9)
+
+    def test_without_hexagons(self):
+        table = self.read_tables(read_hexagons=False)[0]
+        self.assertEqual(len(table.hexagon_coords), 0)
+        self.assertEqual(table.get_geometry_blobs('receptor_hexagons', 28992), [None] * _receptor_count)
+        table.synthesize_hexagons()
+        self.assertEqual(len(table.hexagon_coords), _receptor_count * 14)
+        self.assertEqual(table.compare_hexagons(), (_receptor_count, []))
+
+    def test_projection(self):
+        projection = ResultProjection(substances=['nh3'])
+        table = self.read_tables(projection=projection)[0]
+        self.assertEqual(sorted(table.results), ['deposition_nh3'])
+        rows = list(table.iter_gpkg_rows('receptor_hexagons', 28992))
+        self.assertEqual(len(rows), _receptor_count)
+        # Geometry, receptor_id, edge_effect, deposition_nh3
+        self.assertEqual(len(rows[0]), 4)
+        self.assertAlmostEqual(rows[5][3], 0.5)
+
+    def test_hexagons_skipped_by_projection(self):
+        table = self.read_tables(projection=ResultProjection(layer_types=['receptor_points']))[0]
+        self.assertEqual(len(table), _receptor_count)
+        self.assertEqual(len(table.hexagon_coords), 0)
+        # Receptor points only have concentration fields, the file has depositions
+        self.assertEqual(table.results, {})
+        self.assertEqual(list(table.iter_gpkg_rows('receptor_points', 28992)), [])
+
+    def test_spatial_filter(self):
+        spatial_filter = SpatialFilter(bbox=(get_receptor_x(10) - 1, 0, get_receptor_x(19) + 1, 1e6), epsg_id=28992)
+        doc = ImaerDocument()
+        tables = list(doc.iter_result_tables(self.gml_fn, spatial_filter=spatial_filter, parser_backend='python'))
+        self.assertEqual(list(tables[0].columns['receptor_id']), list(range(11, 21)))
+        self.assertEqual(doc.filtered_count, _receptor_count - 10)
+
+    def test_has_result_members(self):
+        self.assertTrue(ImaerDocument().has_result_members(self.gml_fn))
+        empty_fn = os.path.join(self.temp_dir.name, 'empty.gml')
+        write_synthetic_gml(empty_fn, 0)
+        self.assertFalse(ImaerDocument().has_result_members(empty_fn))
+        # A member start tag split over two blocks
+        self.assertTrue(ImaerDocument().has_result_members(self.gml_fn, chunk_size=7))
+
+    def test_gpkg_rows(self):
+        table = self.read_tables()[0]
+        rows = list(table.iter_gpkg_rows('receptor_hexagons', 28992))
+        self.assertEqual(len(rows), _receptor_count)
+        blob, receptor_id = rows[1][:2]
+        self.assertEqual(receptor_id, 2)
+        min_x, max_x, _, _ = get_envelope(blob)
+        self.assertAlmostEqual((min_x + max_x) / 2, get_receptor_x(1), places=2)
+
+    def test_append(self):
+        table = ReceptorResultTable('ReceptorPoint')
+        table.append({'receptor_id': 1}, 1.0, 2.0, {'deposition_nox': 0.5})
+        table.append({'receptor_id': 2}, 3.0, 4.0, {'deposition_nh3': 0.25})
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.get_column_values('edge_effect'), [None, None])
+        self.assertEqual(table.get_column_values('deposition_nox'), [0.5, None])
+        self.assertTrue(math.isnan(table.results['deposition_nh3'][0]))
+        self.assertEqual(table.get_column_values('deposition_nox_nh3_sum'), [0.5, 0.25])
+
+
+if __name__ == '__main__':
+    unittest.main()
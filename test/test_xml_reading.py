@@ -0,0 +1,170 @@
+import os
+import sys
+import gzip
+import tempfile
+import unittest
+from zipfile import ZipFile
+
+# Runs without QGIS
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ImaerPlugin.imaer6.xml_stream_reader import XmlStreamReader
+from ImaerPlugin.imaer6.gml_file import (
+    GmlFile,
+    get_gml_fingerprint,
+    get_gml_size,
+    get_gml_stem,
+    get_zip_member_fn,
+    is_plain_gml_fn,
+    list_zip_gml_members,
+    parse_zip_member_fn
+)
+
+_xml = b'''<?xml version="1.0" encoding="UTF-8"?>
+<imaer:Root xmlns:imaer="http://imaer.aerius.nl/6.0" xmlns:gml="http://www.opengis.net/gml/3.2" gml:id="root">
+    <imaer:value>1.5</imaer:value>
+    <!-- a comment -->
+    <imaer:skipped><imaer:inner>x</imaer:inner></imaer:skipped>
+    <imaer:text>a <imaer:b>nested</imaer:b> text</imaer:text>
+</imaer:Root>
+'''
+
+
+class TestXmlStreamReader(unittest.TestCase):
+
+    def read_start_elements(self, reader):
+        names = []
+        while not reader.atEnd():
+            if reader.readNext() == reader.StartElement:
+                names.append(reader.name())
+        return names
+
+    def test_local_names(self):
+        reader = XmlStreamReader(_xml)
+        self.assertEqual(self.read_start_elements(reader), ['Root', 'value', 'skipped', 'inner', 'text', 'b'])
+        self.assertFalse(reader.hasError())
+        self.assertEqual(reader.tokenType(), reader.EndDocument)
+
+    def test_attributes_and_namespaces(self):
+        reader = XmlStreamReader(_xml)
+        reader.readNextStartElement()
+        self.assertEqual(reader.name(), 'Root')
+        self.assertEqual(reader.attributes().value('gml:id'), 'root')
+        self.assertEqual(reader.attributes().value('missing'), '')
+        namespaces = {ns.prefix(): ns.namespaceUri() for ns in reader.namespaceDeclarations()}
+        self.assertEqual(namespaces['imaer'], 'http://imaer.aerius.nl/6.0')
+        self.assertEqual(namespaces['gml'], 'http://www.opengis.net/gml/3.2')
+
+    def test_element_text_and_skip(self):
+        reader = XmlStreamReader(_xml)
+        reader.readNextStartElement()
+        reader.readNextStartElement()
+        self.assertEqual(reader.readElementText(), '1.5')
+        reader.readNextStartElement()
+        self.assertEqual(reader.name(), 'skipped')
+        reader.skipCurrentElement()
+        self.assertTrue(reader.isEndElement())
+        self.assertEqual(reader.name(), 'skipped')
+        reader.readNextStartElement()
+        self.assertEqual(reader.readElementText(), 'a  text')
+
+    def test_small_blocks(self):
+        '''Character data split over blocks is returned as one token.'''
+        with tempfile.TemporaryFile() as in_file:
+            in_file.write(_xml)
+            in_file.seek(0)
+            reader = XmlStreamReader(in_file)
+            reader.block_size = 7
+            self.assertEqual(self.read_start_elements(reader), ['Root', 'value', 'skipped', 'inner', 'text', 'b'])
+            self.assertEqual(reader.characterOffset(), len(_xml))
+
+    def test_truncated(self):
+        reader = XmlStreamReader(_xml[:-20])
+        self.read_start_elements(reader)
+        self.assertTrue(reader.hasError())
+        self.assertNotEqual(reader.errorString(), '')
+
+    def test_malformed(self):
+        reader = XmlStreamReader(b'<a><b></a>')
+        self.read_start_elements(reader)
+        self.assertTrue(reader.hasError())
+
+
+class TestGmlFile(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.gml_fn = os.path.join(self.temp_dir.name, 'result.gml')
+        with open(self.gml_fn, 'wb') as out_file:
+            out_file.write(_xml)
+        self.gz_fn = os.path.join(self.temp_dir.name, 'result.gml.gz')
+        with gzip.open(self.gz_fn, 'wb') as out_file:
+            out_file.write(_xml)
+        self.zip_fn = os.path.join(self.temp_dir.name, 'results.zip')
+        with ZipFile(self.zip_fn, 'w') as zip_file:
+            zip_file.writestr('situations/situation_1.gml', _xml)
+            zip_file.writestr('readme.txt', b'not a gml')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def read_all(self, fn):
+        with GmlFile(fn) as gml_file:
+            data = gml_file.read()
+            return data, gml_file.pos(), gml_file.size
+
+    def test_plain(self):
+        data, pos, size = self.read_all(self.gml_fn)
+        self.assertEqual(data, _xml)
+        self.assertEqual(pos, len(_xml))
+        self.assertEqual(size, len(_xml))
+        self.assertTrue(is_plain_gml_fn(self.gml_fn))
+        self.assertEqual(get_gml_stem(self.gml_fn), os.path.join(self.temp_dir.name, 'result'))
+
+    def test_gzip(self):
+        data, pos, size = self.read_all(self.gz_fn)
+        self.assertEqual(data, _xml)
+        # Compressed bytes
+        self.assertEqual(size, os.path.getsize(self.gz_fn))
+        self.assertEqual(pos, size)
+        self.assertEqual(get_gml_size(self.gz_fn), size)
+        self.assertFalse(is_plain_gml_fn(self.gz_fn))
+        self.assertEqual(get_gml_stem(self.gz_fn), os.path.join(self.temp_dir.name, 'result'))
+
+    def test_zip_member(self):
+        member_fns = list_zip_gml_members(self.zip_fn)
+        self.assertEqual(member_fns, [get_zip_member_fn(self.zip_fn, 'situations/situation_1.gml')])
+        member_fn = member_fns[0]
+        self.assertEqual(parse_zip_member_fn(member_fn), (self.zip_fn, 'situations/situation_1.gml'))
+        self.assertIsNone(parse_zip_member_fn(self.gml_fn))
+
+        data, pos, size = self.read_all(member_fn)
+        self.assertEqual(data, _xml)
+        self.assertEqual(size, len(_xml))
+        self.assertEqual(pos, size)
+        self.assertEqual(get_gml_size(member_fn), len(_xml))
+        self.assertFalse(is_plain_gml_fn(member_fn))
+        # Next to the archive
+        self.assertEqual(get_gml_stem(member_fn), os.path.join(self.temp_dir.name, 'situation_1'))
+
+    def test_stream_reader_on_compressed(self):
+        for fn in [self.gz_fn, list_zip_gml_members(self.zip_fn)[0]]:
+            with GmlFile(fn) as gml_file:
+                reader = XmlStreamReader(gml_file)
+                reader.readNextStartElement()
+                self.assertEqual(reader.name(), 'Root')
+
+    def test_fingerprint(self):
+        fingerprint = get_gml_fingerprint(self.gml_fn)
+        self.assertEqual(fingerprint['source_size'], len(_xml))
+        self.assertEqual(fingerprint, get_gml_fingerprint(self.gml_fn))
+        with open(self.gml_fn, 'wb') as out_file:
+            out_file.write(_xml.replace(b'1.5', b'2.5'))
+        self.assertNotEqual(fingerprint['source_hash'], get_gml_fingerprint(self.gml_fn)['source_hash'])
+
+        member_fingerprint = get_gml_fingerprint(list_zip_gml_members(self.zip_fn)[0])
+        self.assertTrue(member_fingerprint['source_hash'].startswith('crc32:'))
+
+
+if __name__ == '__main__':
+    unittest.main()